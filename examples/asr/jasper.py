@@ -159,7 +159,7 @@ def create_all_dags(args, neural_factory):
         )
 
     if spectr_augment_config:
-        processed_signal_t = data_spectr_augmentation(input_spec=processed_signal_t)
+        processed_signal_t = data_spectr_augmentation(input_spec=processed_signal_t, length=p_length_t)
 
     encoded_t, encoded_len_t = jasper_encoder(audio_signal=processed_signal_t, length=p_length_t)
     log_probs_t = jasper_decoder(encoder_output=encoded_t)
@@ -145,7 +145,7 @@ def main():
     # inference
     evaluated_tensors = neural_factory.infer(tensors=eval_tensors, checkpoint_dir=load_dir)
 
-    greedy_hypotheses = post_process_predictions(evaluated_tensors[1], vocab)
+    greedy_hypotheses = post_process_predictions(evaluated_tensors[1], vocab, lengths=evaluated_tensors[4])
     references = post_process_transcripts(evaluated_tensors[2], evaluated_tensors[3], vocab)
 
     wer = word_error_rate(hypotheses=greedy_hypotheses, references=references)
@@ -34,10 +34,11 @@ from .package_info import (
 
 if "NEMO_PACKAGE_BUILDING" not in os.environ:
     from nemo.utils import logging, logging_mode
+    from nemo.utils.lazy_import import lazy_package
 
-    from nemo import backends
-    from nemo import core
-    from nemo import utils
-    from nemo import collections
-
-    from nemo.backends.pytorch import tutorials
+    # Subpackages (and their dependencies such as torch) are imported when they are used for the first time
+    lazy_package(
+        __name__,
+        submodules=["backends", "collections", "constants", "core", "utils"],
+        attributes={"tutorials": ".backends.pytorch"},
+    )
@@ -3,7 +3,13 @@
 This package provides Neural Modules building blocks for building Software
 2.0 projects
 """
-from . import torchvision, tutorials
+import nemo.utils.lazy_import
+from . import tutorials
 from .actions import PtActions
 from .common import *
+from .execution_plan import ExecutionPlan
 from .nm import DataLayerNM, LossNM, NonTrainableNM, TrainableNM
+from .step_profiler import StepProfiler
+
+# torchvision is slow to import and only needed by the image data layers
+nemo.utils.lazy_import.lazy_package(__name__, submodules=["torchvision"])
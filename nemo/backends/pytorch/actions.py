@@ -4,10 +4,10 @@ import importlib
 import itertools
 import json
 import os
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from contextlib import ExitStack
 from pathlib import Path
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
 import torch
 import torch.distributed as dist
@@ -16,14 +16,20 @@ import torch.optim as optim
 from torch.nn.parallel import DistributedDataParallel as DDP
 
 from nemo import logging
+from nemo.backends.pytorch.data_prefetcher import DataPrefetcher
+from nemo.backends.pytorch.disk_cache import DiskCacheReader, DiskCacheWriter, find_disk_cache, tensor_cache_keys
+from nemo.backends.pytorch.distributed_gather import DistributedGatherer
+from nemo.backends.pytorch.execution_plan import ExecutionPlan
 from nemo.backends.pytorch.module_wrapper import TrainableNeuralModuleWrapper
-from nemo.backends.pytorch.nm import DataLayerNM, TrainableNM
+from nemo.backends.pytorch.nm import TrainableNM
 from nemo.backends.pytorch.optimizers import AdamW, Novograd, master_params
+from nemo.backends.pytorch.overflow_monitor import OverflowMonitor
+from nemo.backends.pytorch.step_profiler import StepProfiler
 from nemo.core import DeploymentFormat, DeviceType, NeuralModule, NmTensor
 from nemo.core.callbacks import ActionCallback, EvaluatorCallback, SimpleLossLoggerCallback
 from nemo.core.neural_factory import Actions, ModelMode, Optimization
 from nemo.core.neural_types import *
-from nemo.utils.helpers import get_checkpoint_from_dir
+from nemo.utils.helpers import get_checkpoint_from_dir, is_distributed_placement
 
 # these imports will happen on as-needed basis
 amp = None
@@ -34,6 +40,9 @@ FusedLAMB = None
 FusedAdam = None
 FusedNovoGrad = None
 
+# Number of compiled execution plans kept, least recently used ones are dropped first
+_MAX_EXECUTION_PLANS = 16
+
 AmpOptimizations = {
     Optimization.mxprO0: "O0",
     Optimization.mxprO1: "O1",
@@ -52,36 +61,37 @@ class PtActions(Actions):
     def __init__(
         self, local_rank=None, global_rank=None, tb_writer=None, optimization_level=Optimization.mxprO0,
     ):
-        need_apex = local_rank is not None or optimization_level != Optimization.mxprO0
-        if need_apex:
+        if optimization_level != Optimization.mxprO0:
             try:
-                apex = importlib.import_module('apex')
-                if optimization_level != Optimization.mxprO0:
-                    global amp
-                    amp = importlib.import_module('apex.amp')
-                if local_rank is not None:
-                    # global convert_syncbn
-                    # global create_syncbn_process_group
-                    global LARC
-                    global FusedLAMB
-                    global FusedAdam
-                    global FusedNovoGrad
-                    parallel = importlib.import_module('apex.parallel')
-                    apex_optimizer = importlib.import_module('apex.optimizers')
-                    # convert_syncbn = parallel.convert_syncbn_model
-                    # create_syncbn_process_group = parallel.create_syncbn_process_group
-                    LARC = parallel.LARC
-                    FusedLAMB = apex_optimizer.FusedLAMB
-                    FusedAdam = apex_optimizer.FusedAdam
-                    FusedNovoGrad = apex_optimizer.FusedNovoGrad
-
+                global amp
+                amp = importlib.import_module('apex.amp')
             except ImportError:
                 raise ImportError(
-                    "NVIDIA Apex is necessary for distributed training and"
-                    "mixed precision training. It only works on GPUs."
+                    "NVIDIA Apex is necessary for mixed precision training."
+                    "It only works on GPUs."
                     "Please install Apex from "
                     "https://www.github.com/nvidia/apex"
                 )
+        if local_rank is not None:
+            # Distributed training itself relies on torch.distributed, Apex is only needed for
+            # LARC and the fused optimizers
+            try:
+                # global convert_syncbn
+                # global create_syncbn_process_group
+                global LARC
+                global FusedLAMB
+                global FusedAdam
+                global FusedNovoGrad
+                parallel = importlib.import_module('apex.parallel')
+                apex_optimizer = importlib.import_module('apex.optimizers')
+                # convert_syncbn = parallel.convert_syncbn_model
+                # create_syncbn_process_group = parallel.create_syncbn_process_group
+                LARC = parallel.LARC
+                FusedLAMB = apex_optimizer.FusedLAMB
+                FusedAdam = apex_optimizer.FusedAdam
+                FusedNovoGrad = apex_optimizer.FusedNovoGrad
+            except ImportError:
+                logging.warning("NVIDIA Apex was not found, LARC and fused optimizers will not be available.")
 
         super(PtActions, self).__init__(
             local_rank=local_rank, global_rank=global_rank, optimization_level=optimization_level,
@@ -96,6 +106,13 @@ class PtActions(Actions):
         self._modules = set()
         self.cache = None
         self.amp_initialized = False
+        # will be [frozenset of hook NmTensors -> ExecutionPlan], at most _MAX_EXECUTION_PLANS in LRU order.
+        # Plans keep their NmTensors and modules alive, so tensors created per call must not pile up.
+        self._execution_plans = OrderedDict()
+        # will be [data layer unique instance name -> DataLoader] for evaluation
+        self._eval_dataloaders = {}
+        # will be [data layer unique instance name -> list of batches on the device]
+        self._eval_device_caches = {}
 
     @property
     def modules(self):
@@ -103,7 +120,9 @@ class PtActions(Actions):
 
     def __get_top_sorted_modules_and_dataloader(self, hook):
         """
-        Constructs DAG leading to hook and creates its topological order.
+        Returns the topological order of the DAG leading to hook. The order is
+        compiled into an ExecutionPlan once per set of hook tensors and reused
+        by all subsequent calls.
         It also populates self.module_reference_table.
         Args:
           hook: an NmTensor or a list of NmTensors representing leaf nodes
@@ -112,23 +131,6 @@ class PtActions(Actions):
         Returns:
           list of modules with their call arguments and outputs, and dataset
         """
-
-        def create_node(producer, producer_args):
-            if producer_args is None:
-                return tuple((producer, ()))
-            else:
-                return tuple((producer, tuple([(k, v) for k, v in producer_args.items()]),))
-
-        def is_in_degree_zero(node, processed_nodes):
-            """A node has in degree of zero"""
-            if node[1] == ():
-                return True
-            for portname, nmtensor in node[1]:
-                nd = create_node(nmtensor.producer, nmtensor.producer_args)
-                if nd not in processed_nodes:
-                    return False
-            return True
-
         hooks = hook if isinstance(hook, list) else [hook]
 
         # ensures that no tensors are processed twice
@@ -136,71 +138,33 @@ class PtActions(Actions):
 
         indices_to_remove = []
         # Check for duplicates in hook
-        for i, nmtensor in enumerate(hook):
+        for i, nmtensor in enumerate(hooks):
             if nmtensor in processed_nmtensors:
                 indices_to_remove.append(i)
             else:
                 processed_nmtensors.add(nmtensor)
 
         for i in reversed(indices_to_remove):
-            hook.pop(i)
-
-        _top_sorted_modules = []
-        all_nodes = {}
-
-        # extract all nodes to all_nodes set
-        hooks_lst = list(hooks)
-        while len(hooks_lst) > 0:
-            # take nmtensor from the end of the list
-            nmtensor = hooks_lst.pop()
-            node = create_node(nmtensor.producer, nmtensor.producer_args)
-            # Store nmtensor as an output of its producer
-            # first make sure all keys are present per output port
-            # and nm is inside all_nodes
-            if node not in all_nodes:
-                all_nodes[node] = {k: None for k in nmtensor.producer.output_ports}
-            # second, populate output port with current nmtensor
-            # where applicable
-            all_nodes[node][nmtensor.name] = nmtensor
-            processed_nmtensors.add(nmtensor)
-            if nmtensor.producer_args is not None and nmtensor.producer_args != {}:
-                for _, new_nmtensor in nmtensor.producer_args.items():
-                    if new_nmtensor not in processed_nmtensors:
-                        # put in the start of list
-                        hooks_lst.insert(0, new_nmtensor)
-
-        all_node_with_output = []
-        # Iterate over all_nodes to create new nodes that include its output
-        # now all nodes have (module, input tensors, output tensors)
-        for node in all_nodes:
-            all_node_with_output.append(tuple((node[0], node[1], all_nodes[node])))
-
-        processed_nodes = []
-        while len(all_node_with_output) > 0:
-            for node in all_node_with_output.copy():
-                # if node's in_degree is zero it can be added to
-                # _top_sorted_modules
-                # this will also reduce in_degree of its children
-                if is_in_degree_zero(node, processed_nodes):
-                    _top_sorted_modules.append(node)
-                    processed_nodes.append((node[0], node[1]))
-                    all_node_with_output.remove(node)
-
-        # Create top_sorted_modules aka callchain
-        top_sorted_modules = []
-        for i, m in enumerate(_top_sorted_modules):
-            top_sorted_modules.append((m[0], dict(m[1]), m[2]))
-            # Ensure that there is only one dataset in callchain
-            if i > 0 and isinstance(m[0], DataLayerNM):
-                raise ValueError("There were more than one DataLayer NeuralModule inside your DAG.")
-
-        if not isinstance(top_sorted_modules[0][0], DataLayerNM):
-            raise ValueError("The first module in your DAG was not a DataLayer NeuralModule.")
-
-        tdataset = top_sorted_modules[0][0].dataset
+            hooks.pop(i)
+
+        plan_key = ExecutionPlan.key(hooks)
+        plan = self._execution_plans.get(plan_key)
+        if plan is None:
+            plan = ExecutionPlan.compile(hooks)
+            self._execution_plans[plan_key] = plan
+            if len(self._execution_plans) > _MAX_EXECUTION_PLANS:
+                self._execution_plans.popitem(last=False)
+        else:
+            self._execution_plans.move_to_end(plan_key)
+        top_sorted_modules = plan.call_chain
+
+        tdataset = plan.data_layer.dataset
 
         # populate self.module_reference_table
         for m in top_sorted_modules:
+            key = m[0].unique_instance_id
+            if key in self.module_reference_table:
+                continue
             if m[0].factory is None and self._local_rank is not None:
                 raise ValueError(
                     "Neural module {0} was created without "
@@ -211,15 +175,66 @@ class PtActions(Actions):
                     "Neural Module objects."
                     "".format(str(m[0]))
                 )
-            key = m[0].unique_instance_id
-            if key not in self.module_reference_table:
-                if isinstance(m[0], TrainableNeuralModuleWrapper):
-                    self.module_reference_table[key] = (m[0], m[0]._pt_module)
-                else:
-                    self.module_reference_table[key] = (m[0], m[0])
+            if isinstance(m[0], TrainableNeuralModuleWrapper):
+                self.module_reference_table[key] = (m[0], m[0]._pt_module)
+            else:
+                self.module_reference_table[key] = (m[0], m[0])
 
         return top_sorted_modules, tdataset
 
+    def clear_execution_plans(self):
+        """Drops all compiled execution plans. They will be recompiled on
+        the next train(), eval() or infer() call.
+        """
+        self._execution_plans = OrderedDict()
+
+    def clear_eval_data_cache(self):
+        """Drops all evaluation data loaders (shutting down their persistent
+        workers) and all evaluation batches cached on the device.
+        """
+        self._eval_dataloaders = {}
+        self._eval_device_caches = {}
+
+    def _get_eval_dataloader(self, dl_nm):
+        """Returns the data loader used to evaluate on dl_nm.
+
+        Data loaders are created once per data layer and reused by all
+        subsequent evaluations, so their workers (if any) are started only
+        once and the dataset is not re-pickled on every evaluation.
+
+        Args:
+          dl_nm: DataLayerNM to evaluate on
+
+        Returns:
+          torch.utils.data.DataLoader or dl_nm.data_iterator
+        """
+        if dl_nm.dataset is None:
+            return dl_nm.data_iterator
+
+        eval_dataloader = self._eval_dataloaders.get(dl_nm.unique_instance_id)
+        if eval_dataloader is not None:
+            return eval_dataloader
+
+        # For distributed training it should have disjoint subsets of
+        # all data on every worker
+        if is_distributed_placement(dl_nm.placement):
+            assert dist.is_initialized()
+            sampler = torch.utils.data.distributed.DistributedSampler(dataset=dl_nm.dataset, shuffle=dl_nm.shuffle)
+            shuffle = False
+        else:
+            sampler = None
+            shuffle = dl_nm.shuffle
+        eval_dataloader = torch.utils.data.DataLoader(
+            dataset=dl_nm.dataset,
+            sampler=sampler,
+            num_workers=dl_nm.num_workers,
+            batch_size=dl_nm.batch_size,
+            shuffle=shuffle,
+            persistent_workers=dl_nm.num_workers > 0,
+        )
+        self._eval_dataloaders[dl_nm.unique_instance_id] = eval_dataloader
+        return eval_dataloader
+
     def create_optimizer(self, optimizer, things_to_optimize, optimizer_params=None):
         """
         Wrapper function around __setup_optimizer()
@@ -310,6 +325,7 @@ class PtActions(Actions):
                     lr=lr,
                     weight_decay=optimization_params.get("weight_decay", 0.0),
                     betas=optimization_params.get("betas", (0.9, 0.999)),
+                    foreach=optimization_params.get("foreach", False),
                 )
             elif optimizer_class.lower() == "novograd":
                 optimizer = Novograd(
@@ -319,6 +335,7 @@ class PtActions(Actions):
                     luc=optimization_params.get("luc", False),
                     luc_trust=optimization_params.get("luc_eta", 1e-3),
                     betas=optimization_params.get("betas", (0.95, 0.25)),
+                    foreach=optimization_params.get("foreach", False),
                 )
             elif optimizer_class.lower() == "fused_novograd":
                 optimizer = FusedNovoGrad(
@@ -378,7 +395,7 @@ class PtActions(Actions):
         return optimizer
 
     def __nm_graph_forward_pass(
-        self, call_chain, registered_tensors, mode=ModelMode.train, use_cache=False,
+        self, call_chain, registered_tensors, mode=ModelMode.train, use_cache=False, profiler=None,
     ):
         for ind in range(1, len(call_chain)):
             if use_cache:
@@ -422,10 +439,13 @@ class PtActions(Actions):
                 key = nmtensor.unique_name
                 call_set[tensor_name] = registered_tensors[key]
             # actual PyTorch module call with signature
-            if isinstance(self.module_reference_table[m_id][0], TrainableNeuralModuleWrapper,):
-                new_tensors = pmodule(**call_set)
-            else:
-                new_tensors = pmodule(force_pt=True, **call_set)
+            with ExitStack() as stack:
+                if profiler is not None:
+                    stack.enter_context(profiler.record(f"forward/{profiler.module_name(call_chain[ind][0])}"))
+                if isinstance(self.module_reference_table[m_id][0], TrainableNeuralModuleWrapper,):
+                    new_tensors = pmodule(**call_set)
+                else:
+                    new_tensors = pmodule(force_pt=True, **call_set)
 
             if not isinstance(new_tensors, List):
                 if not isinstance(new_tensors, tuple):
@@ -441,42 +461,6 @@ class PtActions(Actions):
                 else:
                     raise ValueError("A NMTensor was produced twice in " f"the same DAG. {t_name}")
 
-    @staticmethod
-    def pad_tensor(t: torch.Tensor, target_size: torch.Size):
-        padded_shape = target_size.cpu().data.numpy().tolist()
-        padded_t = torch.zeros(padded_shape).cuda().type_as(t)
-        t_size = t.size()
-        if len(t_size) == 0:
-            padded_t = t
-        elif len(t_size) == 1:
-            padded_t[: t_size[0]] = t
-        elif len(t_size) == 2:
-            padded_t[: t_size[0], : t_size[1]] = t
-        elif len(t_size) == 3:
-            padded_t[: t_size[0], : t_size[1], : t_size[2]] = t
-        elif len(t_size) == 4:
-            padded_t[: t_size[0], : t_size[1], : t_size[2], : t_size[3]] = t
-        else:
-            raise NotImplementedError
-        return padded_t
-
-    @staticmethod
-    def depad_tensor(t: torch.Tensor, original_size: torch.Size):
-        t_size = original_size
-        if len(t_size) == 0:
-            depadded_t = t
-        elif len(t_size) == 1:
-            depadded_t = t[: t_size[0]]
-        elif len(t_size) == 2:
-            depadded_t = t[: t_size[0], : t_size[1]]
-        elif len(t_size) == 3:
-            depadded_t = t[: t_size[0], : t_size[1], : t_size[2]]
-        elif len(t_size) == 4:
-            depadded_t = t[: t_size[0], : t_size[1], : t_size[2], : t_size[3]]
-        else:
-            raise NotImplementedError
-        return depadded_t
-
     def _eval(self, tensors_2_evaluate, callback, step, verbose=False):
         """
         Evaluation process.
@@ -496,49 +480,12 @@ class PtActions(Actions):
             # "Retrieve" data layer from call chain.
             dl_nm = call_chain[0][0]
 
+            is_distributed = is_distributed_placement(dl_nm.placement)
+
             # Prepare eval_dataloader
-            # For distributed training it should have disjoint subsets of
-            # all data on every worker
-            is_distributed = False
-            world_size = None
-            if dl_nm.placement == DeviceType.AllGpu:
-                assert dist.is_initialized()
-                is_distributed = True
-                world_size = torch.distributed.get_world_size()
-                # logging.info(
-                #     "Doing distributed evaluation. Rank {0} of {1}".format(
-                #         self.local_rank, world_size
-                #     )
-                # )
-                if dl_nm.dataset is not None:
-                    sampler = torch.utils.data.distributed.DistributedSampler(
-                        dataset=dl_nm.dataset, shuffle=dl_nm.shuffle
-                    )
-                    eval_dataloader = torch.utils.data.DataLoader(
-                        dataset=dl_nm.dataset,
-                        sampler=sampler,
-                        num_workers=dl_nm.num_workers,
-                        batch_size=dl_nm.batch_size,
-                        shuffle=False,
-                    )
-                else:
-                    eval_dataloader = dl_nm.data_iterator
-
-                if hasattr(eval_dataloader, 'sampler'):
-                    eval_dataloader.sampler.set_epoch(0)
-            else:  # Not distributed
-                if dl_nm.dataset is not None:
-                    # Todo: remove local_parameters
-                    eval_dataloader = torch.utils.data.DataLoader(
-                        dataset=dl_nm.dataset,
-                        sampler=None,  # not distributed sampler
-                        num_workers=dl_nm.num_workers,
-                        batch_size=dl_nm.batch_size,
-                        shuffle=dl_nm.shuffle,
-                    )
-                else:
-                    eval_dataloader = dl_nm.data_iterator
-            # after this eval_dataloader is ready to be used
+            eval_dataloader = self._get_eval_dataloader(dl_nm)
+            if hasattr(eval_dataloader, 'sampler') and hasattr(eval_dataloader.sampler, 'set_epoch'):
+                eval_dataloader.sampler.set_epoch(0)
             # reset global_var_dict - results of evaluation will be stored
             # there
 
@@ -549,22 +496,25 @@ class PtActions(Actions):
             num_batches = None
             if hasattr(eval_dataloader, "__len__"):
                 num_batches = len(eval_dataloader)
-            for epoch_i, data in enumerate(eval_dataloader, 0):
+            # Only callbacks which asked for it read the cached batches, others load (and shuffle) the data as usual
+            batches = None
+            if callback.cache_on_device:
+                batches = self._eval_device_caches.get(dl_nm.unique_instance_id)
+            fill_cache = batches is None and callback.cache_on_device
+            if batches is None:
+                batches = DataPrefetcher(eval_dataloader, dl_device, num_batches=dl_nm.prefetch_batches)
+            cached_batches = []
+            if is_distributed:
+                gatherer = DistributedGatherer([t.unique_name for t in tensors_2_evaluate])
+            for epoch_i, tensors in enumerate(batches, 0):
+                if fill_cache:
+                    cached_batches.append(tensors)
                 if (
                     verbose
                     and num_batches is not None
                     and (num_batches < 10 or (epoch_i % int(num_batches / 10) == 0))
                 ):
                     logging.info(f"Evaluating batch {epoch_i} out of {num_batches}")
-                tensors = []
-                if isinstance(data, torch.Tensor):
-                    data = (data,)
-                for d in data:
-                    if isinstance(d, torch.Tensor):
-                        tensors.append(d.to(dl_device))
-                    else:
-                        tensors.append(d)
-
                 registered_e_tensors = {
                     t.unique_name: d for t, d in zip(call_chain[0][2].values(), tensors) if t is not None
                 }
@@ -572,55 +522,42 @@ class PtActions(Actions):
                     call_chain=call_chain, registered_tensors=registered_e_tensors, mode=ModelMode.eval,
                 )
 
-                if not is_distributed or self.global_rank == 0:
-                    values_dict = {}
-                # If distributed. For the outer loop, we need to ensure that
-                # all processes loop through the elements in the same order
+                if is_distributed:
+                    # Outputs are kept in host memory and gathered on worker 0 at once after the last batch
+                    for t2e in tensors_2_evaluate:
+                        key = t2e.unique_name
+                        if key not in registered_e_tensors.keys():
+                            logging.info("WARNING: Tensor {} was not found during eval".format(key))
+                            continue
+                        gatherer.append(key, registered_e_tensors[key])
+                    continue
+
+                values_dict = {"IS_FROM_DIST_EVAL": False}
                 for t2e in tensors_2_evaluate:
                     key = t2e.unique_name
                     if key not in registered_e_tensors.keys():
                         logging.info("WARNING: Tensor {} was not found during eval".format(key))
                         continue
-                    if is_distributed:
-                        # where we will all_gather results from all workers
-                        tensors_list = []
-                        # where we will all_gather tensor sizes
-                        tensor_on_worker = registered_e_tensors[key]
-                        if tensor_on_worker.shape != torch.Size([]):
-                            tensor_on_worker_size_as_tensor = torch.tensor(tensor_on_worker.shape).cuda()
-                            sizes = []
-                            for ind in range(world_size):
-                                sizes.append(torch.empty_like(tensor_on_worker_size_as_tensor))
-                            dist.all_gather(sizes, tensor_on_worker_size_as_tensor)
-                            mx_dim, _ = torch.max(torch.stack(sizes), dim=0)
-                        else:  # this is a singleton. For example, loss value
-                            sizes = [torch.Size([])] * world_size
-                            mx_dim = None
-                        for ind in range(world_size):
-                            # we have to use max shape for all_gather
-                            if mx_dim is None:  # singletons
-                                tensors_list.append(torch.tensor(2).cuda().type_as(tensor_on_worker))
-                            else:  # non-singletons
-                                tensors_list.append(
-                                    torch.empty(mx_dim.cpu().data.numpy().tolist()).cuda().type_as(tensor_on_worker)
-                                )
-
-                        if mx_dim is not None:
-                            t_to_send = self.pad_tensor(tensor_on_worker, mx_dim)
-                        else:
-                            t_to_send = tensor_on_worker
-                        dist.all_gather(tensors_list, t_to_send)
-                        tensors_list = [self.depad_tensor(t, size) for t, size in zip(tensors_list, sizes)]
-                        if self.global_rank == 0:
-                            values_dict["IS_FROM_DIST_EVAL"] = True
-                            values_dict[key] = tensors_list
-                    else:  # NON-DISTRIBUTED TRAINING
-                        values_dict["IS_FROM_DIST_EVAL"] = False
-                        values_dict[key] = [registered_e_tensors[key]]
+                    values_dict[key] = [registered_e_tensors[key]]
                 if callback.user_iter_callback and (self.global_rank is None or self.global_rank == 0):
-                    # values_dict will contain results from all workers
                     callback.user_iter_callback(values_dict, callback._global_var_dict)
 
+            if is_distributed:
+                gathered = gatherer.gather()
+                if callback.user_iter_callback and self.global_rank == 0:
+                    # Replay the batches, values_dict will contain results from all workers
+                    num_gathered_batches = max((len(o) for outputs in gathered.values() for o in outputs), default=0)
+                    for batch_i in range(num_gathered_batches):
+                        values_dict = {"IS_FROM_DIST_EVAL": True}
+                        for key, worker_outputs in gathered.items():
+                            tensors_list = [o[batch_i] for o in worker_outputs if batch_i < len(o)]
+                            if tensors_list:
+                                values_dict[key] = tensors_list
+                        callback.user_iter_callback(values_dict, callback._global_var_dict)
+
+            if fill_cache:
+                self._eval_device_caches[dl_nm.unique_instance_id] = cached_batches
+
             # final aggregation (over minibatches) and logging of results
             # should happend only on one worker
             if callback.user_done_callback and (self.global_rank is None or self.global_rank == 0):
@@ -637,16 +574,33 @@ class PtActions(Actions):
                         callback.wandb_log(vals_to_log)
 
     def _infer(
-        self, tensors_to_return, verbose=False, cache=False, use_cache=False, offload_to_cpu=True,
+        self, tensors_to_return, verbose=False, cache=False, use_cache=False, offload_to_cpu=True, cache_dir=None,
     ):
         """
         Does the same as _eval() just with tensors instead of eval callback.
         """
+        self.__check_infer_cache_args(cache, use_cache, cache_dir)
+        # Everything is collected into a single chunk
+        for chunk in self._infer_chunks(
+            tensors_to_return,
+            verbose=verbose,
+            cache=cache,
+            use_cache=use_cache,
+            offload_to_cpu=offload_to_cpu,
+            cache_dir=cache_dir,
+        ):
+            inferred_tensors = chunk
+        return inferred_tensors
+
+    def __check_infer_cache_args(self, cache, use_cache, cache_dir=None):
         # Checking that cache is used properly
         if cache and use_cache:
             raise ValueError(
                 "cache and use_cache were both set. However cache must first be created prior to using it."
             )
+        if cache_dir is not None:
+            # The on-disk cache is checked when it is opened
+            return
         if cache:
             if self.cache is not None:
                 raise ValueError("cache was set but was not empty")
@@ -655,99 +609,144 @@ class PtActions(Actions):
             if not self.cache:
                 raise ValueError("use_cache was set, but cache was empty")
 
-        with torch.no_grad():
-            # each call chain corresponds to a tensor in tensors_2_evaluate
-            dl_nm = None
-            call_chain, _ = self.__get_top_sorted_modules_and_dataloader(hook=tensors_to_return)
-            dl_nm = call_chain[0][0]
-
-            # Prepare eval_dataloader
-            # For distributed training it should have disjoint subsets of
-            # all data on every worker
-            is_distributed = False
-            world_size = None
-            if dl_nm.placement == DeviceType.AllGpu:
-                if self.cache or use_cache:
-                    raise NotImplementedError("Caching is not available for distributed training.")
-                assert dist.is_initialized()
-                is_distributed = True
-                world_size = torch.distributed.get_world_size()
-                # logging.info(
-                #     "Doing distributed evaluation. Rank {0} of {1}".format(
-                #         self.local_rank, world_size
-                #     )
-                # )
-                if dl_nm.dataset is not None:
-                    sampler = torch.utils.data.distributed.DistributedSampler(
-                        dataset=dl_nm.dataset, shuffle=dl_nm.shuffle
-                    )
-                    eval_dataloader = torch.utils.data.DataLoader(
-                        dataset=dl_nm.dataset,
-                        sampler=sampler,
-                        num_workers=dl_nm.num_workers,
-                        batch_size=dl_nm.batch_size,
-                        shuffle=False,
-                    )
-                else:
-                    eval_dataloader = dl_nm.data_iterator
-                eval_dataloader.sampler.set_epoch(0)
-            elif not use_cache:  # Not distributed and not using cache
-                # Dataloaders are only used if use_cache is False
-                # When caching, the DAG must cache all outputs from dataloader
-                if dl_nm.dataset is not None:
-                    # Todo: remove local_parameters
-                    eval_dataloader = torch.utils.data.DataLoader(
-                        dataset=dl_nm.dataset,
-                        sampler=None,  # not distributed sampler
-                        num_workers=dl_nm.num_workers,
-                        batch_size=dl_nm.batch_size,
-                        shuffle=dl_nm.shuffle,
-                    )
-                else:
-                    eval_dataloader = dl_nm.data_iterator
-            # after this eval_dataloader is ready to be used
-            # reset global_var_dict - results of evaluation will be stored
-            # there
-
-            if not is_distributed or self.global_rank == 0:
-                values_dict = {}
-                for t in tensors_to_return:
-                    values_dict[t.unique_name] = []
-            dl_device = dl_nm._device
+    @torch.no_grad()
+    def _infer_chunks(
+        self,
+        tensors_to_return,
+        verbose=False,
+        cache=False,
+        use_cache=False,
+        offload_to_cpu=True,
+        batches_per_chunk=None,
+        cache_dir=None,
+    ):
+        """Generator running inference batch by batch.
 
-            # Evaluation mini-batch for loop
-            if use_cache:
-                num_batches = len(self.cache)
-                loop_iterator = self.cache
+        Args:
+          tensors_to_return: list of NmTensors to evaluate
+          verbose: whether to log progress
+          cache: whether to add all tensors of every batch to self.cache
+          use_cache: whether to read inputs from self.cache instead of the data layer
+          offload_to_cpu: whether to move results to cpu memory
+          batches_per_chunk: number of batches per yielded chunk, None means
+            that everything is yielded as one chunk after the last batch
+          cache_dir: if set, cache and use_cache write to and read from
+            memory-mapped shards in this directory instead of self.cache
+
+        Yields:
+          lists with an element for each tensor in tensors_to_return, where
+          each element is a list of batches of tensor values. In distributed
+          mode chunks contain batches of all workers on the worker with
+          global rank 0 and are None on all other workers.
+        """
+        # each call chain corresponds to a tensor in tensors_2_evaluate
+        dl_nm = None
+        call_chain, _ = self.__get_top_sorted_modules_and_dataloader(hook=tensors_to_return)
+        dl_nm = call_chain[0][0]
+
+        # Prepare eval_dataloader
+        # For distributed training it should have disjoint subsets of
+        # all data on every worker
+        is_distributed = False
+        if is_distributed_placement(dl_nm.placement):
+            if cache_dir is None and (self.cache or use_cache):
+                raise NotImplementedError("Caching is not available for distributed training.")
+            assert dist.is_initialized()
+            is_distributed = True
+            if dl_nm.dataset is not None:
+                sampler = torch.utils.data.distributed.DistributedSampler(dataset=dl_nm.dataset, shuffle=dl_nm.shuffle)
+                eval_dataloader = torch.utils.data.DataLoader(
+                    dataset=dl_nm.dataset,
+                    sampler=sampler,
+                    num_workers=dl_nm.num_workers,
+                    batch_size=dl_nm.batch_size,
+                    shuffle=False,
+                )
             else:
-                num_batches = len(eval_dataloader)
-                loop_iterator = eval_dataloader
+                eval_dataloader = dl_nm.data_iterator
+            eval_dataloader.sampler.set_epoch(0)
+        elif not use_cache:  # Not distributed and not using cache
+            # Dataloaders are only used if use_cache is False
+            # When caching, the DAG must cache all outputs from dataloader
+            if dl_nm.dataset is not None:
+                # Todo: remove local_parameters
+                eval_dataloader = torch.utils.data.DataLoader(
+                    dataset=dl_nm.dataset,
+                    sampler=None,  # not distributed sampler
+                    num_workers=dl_nm.num_workers,
+                    batch_size=dl_nm.batch_size,
+                    shuffle=dl_nm.shuffle,
+                )
+            else:
+                eval_dataloader = dl_nm.data_iterator
+        # after this eval_dataloader is ready to be used
+        # reset global_var_dict - results of evaluation will be stored
+        # there
+
+        def new_chunk():
+            return {t.unique_name: [] for t in tensors_to_return}
+
+        def finish_chunk(values_dict):
+            if is_distributed:
+                gathered = gatherer.gather()
+                if self.global_rank != 0:
+                    return None
+                for key, worker_outputs in gathered.items():
+                    num_gathered_batches = max(len(o) for o in worker_outputs)
+                    for batch_i in range(num_gathered_batches):
+                        for o in worker_outputs:
+                            if batch_i < len(o):
+                                # Gathered outputs are in host memory
+                                tensor = o[batch_i]
+                                values_dict[key].append(tensor if offload_to_cpu else tensor.to(dl_device))
+            return [values_dict[t.unique_name] for t in tensors_to_return]
+
+        values_dict = new_chunk()
+        num_batches_in_chunk = 0
+        dl_device = dl_nm._device
+
+        disk_cache_writer = None
+        if cache_dir is not None and (cache or use_cache):
+            rank = self.global_rank if is_distributed else 0
+            world_size = dist.get_world_size() if is_distributed else 1
+            cache_keys = tensor_cache_keys(call_chain)
+            if cache:
+                disk_cache_writer = DiskCacheWriter(cache_dir, cache_keys, rank=rank, world_size=world_size)
+            else:
+                data_layer_keys = [cache_keys[t.unique_name] for t in call_chain[0][2].values() if t is not None]
+                shard_dir = find_disk_cache(cache_dir, cache_keys, data_layer_keys, rank=rank, world_size=world_size)
+                if shard_dir is None:
+                    raise ValueError(f"use_cache was set, but no usable cache was found in {cache_dir}")
+                logging.info(f"Using inference cache {shard_dir}")
+
+        # Evaluation mini-batch for loop
+        if use_cache and cache_dir is not None:
+            loop_iterator = DiskCacheReader(shard_dir, cache_keys)
+            num_batches = len(loop_iterator)
+        elif use_cache:
+            num_batches = len(self.cache)
+            loop_iterator = self.cache
+        else:
+            num_batches = len(eval_dataloader)
+            loop_iterator = DataPrefetcher(eval_dataloader, dl_device, num_batches=dl_nm.prefetch_batches)
 
+        if is_distributed:
+            gatherer = DistributedGatherer([t.unique_name for t in tensors_to_return])
+        # The shard of the disk cache is discarded if inference fails or the caller stops iterating early
+        try:
             for epoch_i, data in enumerate(loop_iterator, 0):
                 logging.debug(torch.cuda.memory_allocated())
                 if verbose and (num_batches < 10 or (epoch_i % int(num_batches / 10) == 0)):
                     logging.info(f"Evaluating batch {epoch_i} out of {num_batches}")
-                tensors = []
                 if use_cache:
-                    registered_e_tensors = data
-                    # delete tensors_to_return
-                    for t in tensors_to_return:
-                        if t.unique_name in registered_e_tensors:
-                            del registered_e_tensors[t.unique_name]
-                    # Need to check for device type mismatch
-                    for t in registered_e_tensors:
-                        registered_e_tensors[t].to(dl_device)
+                    # tensors_to_return are always re-computed
+                    returned_names = {t.unique_name for t in tensors_to_return}
+                    registered_e_tensors = {
+                        name: tensor.to(dl_device) for name, tensor in data.items() if name not in returned_names
+                    }
                 else:
-                    if isinstance(data, torch.Tensor):
-                        data = (data,)
-                    for d in data:
-                        if isinstance(d, torch.Tensor):
-                            tensors.append(d.to(dl_device))
-                        else:
-                            tensors.append(d)
-
                     registered_e_tensors = {
-                        t.unique_name: d for t, d in zip(call_chain[0][2].values(), tensors) if t is not None
+                        t.unique_name: d for t, d in zip(call_chain[0][2].values(), data) if t is not None
                     }
                 self.__nm_graph_forward_pass(
                     call_chain=call_chain,
@@ -762,64 +761,40 @@ class PtActions(Actions):
                 #     for name, tensor in registered_e_tensors.items():
                 #         if isinstance(tensor, torch.Tensor):
                 #             registered_e_tensors[name] = tensor.cpu()
-                if cache:
+                if disk_cache_writer is not None:
+                    disk_cache_writer.append(registered_e_tensors)
+                elif cache:
                     self.append_to_cache(registered_e_tensors, offload_to_cpu)
 
-                # If distributed. For the outer loop, we need to ensure that
-                # all processes loop through the elements in the same order
+                # If distributed, outputs are gathered on worker 0 at once at the end of the chunk
                 for t2e in tensors_to_return:
                     key = t2e.unique_name
                     if key not in registered_e_tensors.keys():
                         logging.info("WARNING: Tensor {} was not found during eval".format(key))
                         continue
                     if is_distributed:
-                        # where we will all_gather results from all workers
-                        tensors_list = []
-                        # where we will all_gather tensor sizes
-                        tensor_on_worker = registered_e_tensors[key]
-                        if tensor_on_worker.shape != torch.Size([]):
-                            tensor_on_worker_size_as_tensor = torch.tensor(tensor_on_worker.shape).cuda()
-                            sizes = []
-                            for ind in range(world_size):
-                                sizes.append(torch.empty_like(tensor_on_worker_size_as_tensor))
-                            dist.all_gather(sizes, tensor_on_worker_size_as_tensor)
-                            mx_dim, _ = torch.max(torch.stack(sizes), dim=0)
-                        else:  # this is a singleton. For example, loss value
-                            sizes = [torch.Size([])] * world_size
-                            mx_dim = None
-                        for ind in range(world_size):
-                            # we have to use max shape for all_gather
-                            if mx_dim is None:  # singletons
-                                tensors_list.append(torch.tensor(2).cuda().type_as(tensor_on_worker))
-                            else:  # non-singletons
-                                tensors_list.append(
-                                    torch.empty(mx_dim.cpu().data.numpy().tolist()).cuda().type_as(tensor_on_worker)
-                                )
-
-                        if mx_dim is not None:
-                            t_to_send = self.pad_tensor(tensor_on_worker, mx_dim)
-                        else:
-                            t_to_send = tensor_on_worker
-                        dist.all_gather(tensors_list, t_to_send)
-                        tensors_list = [self.depad_tensor(t, size) for t, size in zip(tensors_list, sizes)]
-                        if offload_to_cpu:
-                            tensors_list = [t.cpu() for t in tensors_list]
-                        if self.global_rank == 0:
-                            values_dict[key] += tensors_list
+                        gatherer.append(key, registered_e_tensors[key])
                     else:  # NON-DISTRIBUTED TRAINING
                         tensor = registered_e_tensors[key]
                         if offload_to_cpu and isinstance(tensor, torch.Tensor):
                             tensor = tensor.cpu()
                         values_dict[key] += [tensor]
 
-            if not is_distributed or self.global_rank == 0:
-                inferred_tensors = []
-                for t in tensors_to_return:
-                    inferred_tensors.append(values_dict[t.unique_name])
-                return inferred_tensors
+                num_batches_in_chunk += 1
+                if batches_per_chunk is not None and num_batches_in_chunk == batches_per_chunk:
+                    yield finish_chunk(values_dict)
+                    values_dict = new_chunk()
+                    num_batches_in_chunk = 0
 
-            # For all other ranks
-            return None
+        except BaseException:
+            if disk_cache_writer is not None:
+                disk_cache_writer.abort()
+            raise
+        if disk_cache_writer is not None:
+            disk_cache_writer.close()
+
+        if batches_per_chunk is None or num_batches_in_chunk > 0:
+            yield finish_chunk(values_dict)
 
     def append_to_cache(self, registered_tensors: dict, offload_to_cpu):
         """Simpler helper function to add results of __nm_graph_forward_pass to
@@ -836,11 +811,12 @@ class PtActions(Actions):
         """
         self.cache = None
 
-    def save_state_to(self, path: str):
+    def save_state_to(self, path: Union[str, BinaryIO]):
         """
         Saves current state such as step, epoch and optimizer parameters
         Args:
-          path:
+          path: path of the file to save to, or a binary file object (such as
+            io.BytesIO) to write to
 
         Returns:
 
@@ -1078,6 +1054,9 @@ class PtActions(Actions):
         synced_batchnorm_groupsize=0,
         gradient_predivide=False,
         amp_max_loss_scale=2.0 ** 24,
+        nan_check_freq=1,
+        nan_policy="skip",
+        profiler=None,
     ):
         if gradient_predivide:
             logging.error(
@@ -1195,7 +1174,7 @@ class PtActions(Actions):
                 )
 
         dataNM = training_loop[0][2][0][0]
-        if dataNM.placement == DeviceType.AllGpu:
+        if is_distributed_placement(dataNM.placement):
             # if len(training_loop) > 1:
             #     raise NotImplementedError(
             #         "Distributed training does nor work with multiple "
@@ -1214,7 +1193,10 @@ class PtActions(Actions):
                 )
             else:
                 train_dataloader = dataNM.data_iterator
-                if hasattr(train_dataloader, 'sampler'):
+                # Batch samplers, such as DurationBucketingBatchSampler, split the data between processes themselves
+                if hasattr(getattr(train_dataloader, 'batch_sampler', None), 'set_epoch'):
+                    train_sampler = train_dataloader.batch_sampler
+                elif hasattr(train_dataloader, 'sampler'):
                     train_sampler = train_dataloader.sampler
                 else:
                     train_sampler = None
@@ -1255,7 +1237,10 @@ class PtActions(Actions):
                         # By default, disable broadcast_buffers. This disables batch norm synchronization on forward
                         # pass
                         pmodule = DDP(
-                            pmodule, device_ids=[self.local_rank], broadcast_buffers=False, find_unused_parameters=True
+                            pmodule,
+                            device_ids=None if dataNM.placement == DeviceType.AllCpu else [self.local_rank],
+                            broadcast_buffers=False,
+                            find_unused_parameters=True,
                         )
 
                     # # Convert batchnorm modules to synced if applicable
@@ -1288,16 +1273,39 @@ class PtActions(Actions):
                 )
             else:
                 train_dataloader = dataNM.data_iterator
-                train_sampler = None
+                # Batch samplers which shuffle depending on the epoch, such as DurationBucketingBatchSampler
+                train_sampler = getattr(train_dataloader, 'batch_sampler', None)
 
         self._init_callbacks(callbacks)
         # Do action start callbacks
         self._perform_on_action_start(callbacks=callbacks)
 
+        # Non-finite losses are checked on the host every nan_check_freq steps only
+        overflow_monitor = None
+        if nan_check_freq > 1:
+            pt_modules = []
+            for module in self.modules:
+                if isinstance(module, TrainableNeuralModuleWrapper):
+                    pt_modules.append(module._pt_module)
+                elif isinstance(module, nn.Module):
+                    pt_modules.append(module)
+            overflow_monitor = OverflowMonitor(
+                policy=nan_policy,
+                modules=pt_modules,
+                optimizers=self.optimizers,
+                stop_on_nan_loss=stop_on_nan_loss,
+                distributed=self._local_rank is not None,
+            )
+
+        if profiler is None:
+            # Profiler with an empty window, records nothing
+            profiler = StepProfiler(first_step=0, num_steps=0)
+        profiler.start(self.step)
+
         # MAIN TRAINING LOOP
         # iteration over epochs
         while num_epochs is None or self.epoch_num < num_epochs:
-            if train_sampler is not None:
+            if train_sampler is not None and hasattr(train_sampler, "set_epoch"):
                 train_sampler.set_epoch(self.epoch_num)
             if max_steps is not None and self.step >= max_steps:
                 break
@@ -1307,7 +1315,8 @@ class PtActions(Actions):
 
             # iteration over batches in epoch
             batch_counter = 0
-            for _, data in enumerate(train_dataloader, 0):
+            prefetcher = DataPrefetcher(train_dataloader, dataNM._device, num_batches=dataNM.prefetch_batches)
+            for _, tensors in enumerate(profiler.iterate(prefetcher), 0):
                 if max_steps is not None and self.step >= max_steps:
                     break
 
@@ -1316,7 +1325,8 @@ class PtActions(Actions):
                     curr_optimizer = training_loop[self.step % len(training_loop)][0]
                     curr_optimizer.zero_grad()
                     # Register iteration start with callbacks
-                    self._perform_on_iteration_start(callbacks=callbacks)
+                    with profiler.record("callbacks"):
+                        self._perform_on_iteration_start(callbacks=callbacks)
 
                 # set learning rate policy
                 if lr_policy is not None:
@@ -1334,31 +1344,23 @@ class PtActions(Actions):
                 # named by output port and uuid of module which created them
                 # Get and properly name tensors returned by data layer
                 curr_call_chain = training_loop[self.step % len(training_loop)][2]
-                dl_device = curr_call_chain[0][0]._device
                 if logging_callchain and self.step % logger_step_freq == 0:
                     curr_call_chain = logging_callchain
-                tensors = []
-                if isinstance(data, torch.Tensor):
-                    data = (data,)
-                for d in data:
-                    if isinstance(d, torch.Tensor):
-                        tensors.append(d.to(dl_device))
-                    else:
-                        tensors.append(d)
 
                 registered_tensors = {
                     t.unique_name: d for t, d in zip(curr_call_chain[0][2].values(), tensors) if t is not None
                 }
                 disable_allreduce = batch_counter < (batches_per_step - 1)
-                self.__nm_graph_forward_pass(
-                    call_chain=curr_call_chain, registered_tensors=registered_tensors,
-                )
+                with profiler.record("forward"):
+                    self.__nm_graph_forward_pass(
+                        call_chain=curr_call_chain, registered_tensors=registered_tensors, profiler=profiler,
+                    )
 
                 curr_tensors_to_optimize = training_loop[self.step % len(training_loop)][1]
                 final_loss = 0
                 nan = False
                 for tensor in curr_tensors_to_optimize:
-                    if (
+                    if overflow_monitor is None and (
                         torch.isnan(registered_tensors[tensor.unique_name]).any()
                         or torch.isinf(registered_tensors[tensor.unique_name]).any()
                     ):
@@ -1371,58 +1373,79 @@ class PtActions(Actions):
                     final_loss += registered_tensors[tensor.unique_name]
                 if nan:
                     continue
-                if self._optim_level in AmpOptimizations and self._optim_level != Optimization.mxprO0:
-                    with amp.scale_loss(final_loss, curr_optimizer, delay_unscale=disable_allreduce) as scaled_loss:
-                        if torch.isnan(scaled_loss).any() or torch.isinf(scaled_loss).any():
-                            if stop_on_nan_loss:
-                                raise ValueError('Loss is NaN or inf -' ' exiting')
-                            logging.warning('WARNING: Loss is NaN or inf')
-                            curr_optimizer.zero_grad()
-                            continue
-                        if disable_allreduce:
-                            with ExitStack() as stack:
-                                for mod in self.get_DDP_modules(curr_call_chain):
-                                    stack.enter_context(mod.no_sync())
-                                scaled_loss.backward(bps_scale.to(scaled_loss.get_device()))
-                        else:
-                            scaled_loss.backward(bps_scale.to(scaled_loss.get_device()))
-                # no AMP optimizations needed
-                else:
-                    # multi-GPU, float32
-                    if self._local_rank is not None:
-                        if disable_allreduce:
-                            with ExitStack() as stack:
-                                for mod in self.get_DDP_modules(curr_call_chain):
-                                    stack.enter_context(mod.no_sync())
-                                final_loss.backward(bps_scale.to(final_loss.get_device()))
-                        else:
-                            final_loss.backward(bps_scale.to(final_loss.get_device()))
-                    # single device (CPU or GPU)
+                if overflow_monitor is not None:
+                    overflow_monitor.update(final_loss)
+                with profiler.record("backward"):
+                    if self._optim_level in AmpOptimizations and self._optim_level != Optimization.mxprO0:
+                        with amp.scale_loss(
+                            final_loss, curr_optimizer, delay_unscale=disable_allreduce
+                        ) as scaled_loss:
+                            if overflow_monitor is None and (
+                                torch.isnan(scaled_loss).any() or torch.isinf(scaled_loss).any()
+                            ):
+                                if stop_on_nan_loss:
+                                    raise ValueError('Loss is NaN or inf -' ' exiting')
+                                logging.warning('WARNING: Loss is NaN or inf')
+                                curr_optimizer.zero_grad()
+                                continue
+                            if disable_allreduce:
+                                with ExitStack() as stack:
+                                    for mod in self.get_DDP_modules(curr_call_chain):
+                                        stack.enter_context(mod.no_sync())
+                                    scaled_loss.backward(bps_scale.to(scaled_loss.device))
+                            else:
+                                scaled_loss.backward(bps_scale.to(scaled_loss.device))
+                    # no AMP optimizations needed
                     else:
-                        # Fix (workaround?) enabling to backpropagate gradiens on CPUs.
-                        if final_loss.get_device() < 0:
-                            final_loss.backward(bps_scale)
+                        # multi-GPU, float32
+                        if self._local_rank is not None:
+                            if disable_allreduce:
+                                with ExitStack() as stack:
+                                    for mod in self.get_DDP_modules(curr_call_chain):
+                                        stack.enter_context(mod.no_sync())
+                                    final_loss.backward(bps_scale.to(final_loss.device))
+                            else:
+                                final_loss.backward(bps_scale.to(final_loss.device))
+                        # single device (CPU or GPU)
                         else:
-                            final_loss.backward(bps_scale.to(final_loss.get_device()))
+                            # Fix (workaround?) enabling to backpropagate gradiens on CPUs.
+                            if final_loss.get_device() < 0:
+                                final_loss.backward(bps_scale)
+                            else:
+                                final_loss.backward(bps_scale.to(final_loss.get_device()))
 
                 batch_counter += 1
 
                 if batch_counter == batches_per_step:
                     # Ended step. Do optimizer update
-                    if grad_norm_clip is not None:
-                        torch.nn.utils.clip_grad_norm_(master_params(curr_optimizer), grad_norm_clip)
-                    curr_optimizer.step()
+                    with profiler.record("optimizer"):
+                        if grad_norm_clip is not None:
+                            torch.nn.utils.clip_grad_norm_(master_params(curr_optimizer), grad_norm_clip)
+                        if overflow_monitor is not None:
+                            overflow_monitor.step(curr_optimizer)
+                            # Check at the end of every window and whenever the loss is logged anyway
+                            if (self.step + 1) % nan_check_freq == 0 or (
+                                logging_callchain and self.step % logger_step_freq == 0
+                            ):
+                                overflow_monitor.check()
+                        else:
+                            curr_optimizer.step()
                     batch_counter = 0
                     # Register iteration end with callbacks
-                    self._update_callbacks(
-                        callbacks=callbacks, registered_tensors=registered_tensors,
-                    )
-                    self._perform_on_iteration_end(callbacks=callbacks)
+                    with profiler.record("callbacks"):
+                        self._update_callbacks(
+                            callbacks=callbacks, registered_tensors=registered_tensors,
+                        )
+                        self._perform_on_iteration_end(callbacks=callbacks)
                     self.step += 1
+                    profiler.step(self.step)
             # End of epoch for loop
+            if overflow_monitor is not None:
+                overflow_monitor.check()
             # Register epochs end with callbacks
             self._perform_on_epoch_end(callbacks=callbacks)
             self.epoch_num += 1
+        profiler.close()
         self._perform_on_action_end(callbacks=callbacks)
 
     def infer(
@@ -1435,10 +1458,85 @@ class PtActions(Actions):
         use_cache=False,
         offload_to_cpu=True,
         modules_to_restore=None,
+        sink=None,
+        batches_per_chunk=1,
+        cache_dir=None,
     ):
         """See NeuralModuleFactory.infer()
         """
+        if sink is not None:
+            for chunk in self.infer_iter(
+                tensors=tensors,
+                checkpoint_dir=checkpoint_dir,
+                ckpt_pattern=ckpt_pattern,
+                verbose=verbose,
+                cache=cache,
+                use_cache=use_cache,
+                offload_to_cpu=offload_to_cpu,
+                modules_to_restore=modules_to_restore,
+                batches_per_chunk=batches_per_chunk,
+                cache_dir=cache_dir,
+            ):
+                sink(chunk)
+            return None
+
+        self.__prepare_infer(tensors, checkpoint_dir, ckpt_pattern, modules_to_restore)
+
+        # Run infer
+        return self._infer(
+            tensors_to_return=tensors,
+            verbose=verbose,
+            cache=cache,
+            use_cache=use_cache,
+            offload_to_cpu=offload_to_cpu,
+            cache_dir=cache_dir,
+        )
 
+    def infer_iter(
+        self,
+        tensors,
+        checkpoint_dir=None,
+        ckpt_pattern='',
+        verbose=True,
+        cache=False,
+        use_cache=False,
+        offload_to_cpu=True,
+        modules_to_restore=None,
+        batches_per_chunk=1,
+        cache_dir=None,
+    ):
+        """See NeuralModuleFactory.infer_iter()
+        """
+        if cache and cache_dir is None:
+            raise ValueError("cache requires cache_dir when streaming because the in-memory cache keeps all tensors.")
+        if batches_per_chunk < 1:
+            raise ValueError(f"batches_per_chunk must be >= 1, but got {batches_per_chunk}")
+        self.__prepare_infer(tensors, checkpoint_dir, ckpt_pattern, modules_to_restore)
+        self.__check_infer_cache_args(cache, use_cache, cache_dir)
+        chunks = self._infer_chunks(
+            tensors_to_return=tensors,
+            verbose=verbose,
+            cache=cache,
+            use_cache=use_cache,
+            offload_to_cpu=offload_to_cpu,
+            batches_per_chunk=batches_per_chunk,
+            cache_dir=cache_dir,
+        )
+
+        def results():
+            try:
+                # In distributed mode only the worker with global rank 0 gets results
+                for chunk in chunks:
+                    if chunk is not None:
+                        yield chunk
+            finally:
+                # Stops inference if the caller closes the iterator early
+                chunks.close()
+
+        return results()
+
+    def __prepare_infer(self, tensors, checkpoint_dir, ckpt_pattern, modules_to_restore):
+        """Restores checkpoints and initializes Amp for inference"""
         call_chain, _ = self.__get_top_sorted_modules_and_dataloader(hook=tensors)
         if checkpoint_dir:
             # Find all modules that need to be restored
@@ -1483,15 +1581,6 @@ class PtActions(Actions):
             )
             self.amp_initialized = True
 
-        # Run infer
-        return self._infer(
-            tensors_to_return=tensors,
-            verbose=verbose,
-            cache=cache,
-            use_cache=use_cache,
-            offload_to_cpu=offload_to_cpu,
-        )
-
     def get_DDP_modules(self, call_chain):
         modules = []
         for ind in range(1, len(call_chain)):
@@ -0,0 +1,200 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['DataPrefetcher', 'move_batch_to_device']
+
+import queue
+import sys
+import threading
+
+import torch
+
+# Marks the end of the wrapped iterator
+_END = object()
+
+
+class _ExceptionWrapper(object):
+    """Carries an exception raised in the background thread to the consumer"""
+
+    def __init__(self, exc_info):
+        self.exc_info = exc_info
+
+    def reraise(self):
+        raise self.exc_info[1].with_traceback(self.exc_info[2])
+
+
+def move_batch_to_device(data, device, non_blocking=False):
+    """Moves all tensors of a batch returned by a data loader to device.
+
+    Args:
+        data: a torch.Tensor or a tuple/list of tensors and other objects
+        device (torch.device): target device
+        non_blocking (bool): whether to issue asynchronous copies
+
+    Returns:
+        list of batch elements
+    """
+    if isinstance(data, torch.Tensor):
+        data = (data,)
+    tensors = []
+    for d in data:
+        if isinstance(d, torch.Tensor):
+            tensors.append(d.to(device, non_blocking=non_blocking))
+        else:
+            tensors.append(d)
+    return tensors
+
+
+class _PinnedBuffers(object):
+    """Ring of pinned host buffers which batches are staged in before non-blocking copies to the device.
+
+    A slot is only reused after the copies from it are done, so the buffers are allocated once and only grow if a
+    batch has larger tensors.
+
+    Args:
+        num_slots (int): number of batches which can be staged at the same time
+    """
+
+    def __init__(self, num_slots):
+        self._buffers = [[] for _ in range(num_slots)]
+        self._events = [None] * num_slots
+        self._next = 0
+
+    def stage(self, data):
+        """Copies the tensors of a batch which are not in pinned or device memory into the buffers of the next slot.
+
+        Returns:
+            slot index and list of batch elements, to be passed to record() after the copies to the device
+        """
+        slot = self._next
+        self._next = (slot + 1) % len(self._buffers)
+        if self._events[slot] is not None:
+            self._events[slot].synchronize()
+            self._events[slot] = None
+        buffers = self._buffers[slot]
+        staged = []
+        for d in data:
+            if not isinstance(d, torch.Tensor) or d.is_cuda or d.is_pinned():
+                staged.append(d)
+                continue
+            i = len(staged)
+            while len(buffers) <= i:
+                buffers.append(None)
+            if buffers[i] is None or buffers[i].dtype != d.dtype or buffers[i].numel() < d.numel():
+                buffers[i] = torch.empty(d.numel(), dtype=d.dtype, pin_memory=True)
+            staged.append(buffers[i][: d.numel()].view(d.shape).copy_(d))
+        return slot, staged
+
+    def record(self, slot, event):
+        """Marks the buffers of slot as in use until event, recorded after the copies from them, is done."""
+        self._events[slot] = event
+
+
+class DataPrefetcher(object):
+    """Wraps an iterable over batches (typically torch.utils.data.DataLoader) and moves batches to the device
+    in a background thread, so that host-to-device copies overlap with model compute.
+
+    On CUDA devices every batch is staged in a ring of reused pinned buffers and copied with non-blocking copies on
+    a side stream.
+    On CPU the batches are just fetched ahead of time by the background thread.
+
+    Args:
+        iterable: iterable returning batches, i.e. a torch.Tensor or a tuple/list of tensors per batch
+        device (torch.device): device to move batches to
+        num_batches (int): number of batches to prefetch. If 0, batches are moved synchronously in the calling thread.
+    """
+
+    def __init__(self, iterable, device, num_batches=2):
+        if num_batches < 0:
+            raise ValueError(f"num_batches must be >= 0, but got {num_batches}")
+        self._iterable = iterable
+        self._device = torch.device(device)
+        if self._device.type == "cuda" and self._device.index is None:
+            # The current device is per thread, so resolve it here
+            self._device = torch.device("cuda", torch.cuda.current_device())
+        self._num_batches = num_batches
+
+    def __len__(self):
+        return len(self._iterable)
+
+    def __iter__(self):
+        if self._num_batches == 0:
+            for data in self._iterable:
+                yield move_batch_to_device(data, self._device)
+            return
+
+        use_cuda = self._device.type == "cuda"
+        stream = torch.cuda.Stream(device=self._device) if use_cuda else None
+        batches = queue.Queue(maxsize=self._num_batches)
+        stop = threading.Event()
+
+        def put(item):
+            # Returns False if the consumer stopped iterating
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker():
+            try:
+                if use_cuda:
+                    torch.cuda.set_device(self._device)
+                    # One more slot than batches in the queue, so staging overlaps with the copies of the last batch
+                    pinned_buffers = _PinnedBuffers(self._num_batches + 1)
+                for data in self._iterable:
+                    if use_cuda:
+                        if isinstance(data, torch.Tensor):
+                            data = (data,)
+                        slot, data = pinned_buffers.stage(data)
+                        with torch.cuda.stream(stream):
+                            tensors = move_batch_to_device(data, self._device, non_blocking=True)
+                            event = torch.cuda.Event()
+                            event.record(stream)
+                        pinned_buffers.record(slot, event)
+                    else:
+                        tensors = move_batch_to_device(data, self._device)
+                        event = None
+                    if not put((tensors, event)):
+                        return
+                put(_END)
+            except BaseException:
+                put(_ExceptionWrapper(sys.exc_info()))
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = batches.get()
+                if item is _END:
+                    break
+                if isinstance(item, _ExceptionWrapper):
+                    item.reraise()
+                tensors, event = item
+                if event is not None:
+                    current_stream = torch.cuda.current_stream(self._device)
+                    current_stream.wait_event(event)
+                    for t in tensors:
+                        if isinstance(t, torch.Tensor):
+                            # Memory was allocated on the side stream, make sure it is not reused too early
+                            t.record_stream(current_stream)
+                yield tensors
+        finally:
+            stop.set()
+            thread.join()
@@ -0,0 +1,224 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['DiskCacheReader', 'DiskCacheWriter', 'find_disk_cache', 'tensor_cache_keys']
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import torch
+
+from nemo import logging
+
+_DATA_FILE = "data.bin"
+_INDEX_FILE = "index.pt"
+_KEYS_FILE = "keys.json"
+# Tensors are aligned in the data file so that they can be viewed in place with any dtype
+_ALIGNMENT = 64
+
+
+def _weights_fingerprint(module):
+    """Returns a hash of the weights (state dict) of a module, None for modules without weights."""
+    if not isinstance(module, torch.nn.Module):
+        return None
+    state = module.state_dict()
+    if not state:
+        return None
+    fingerprint = hashlib.sha1()
+    for name, tensor in sorted(state.items()):
+        data = tensor.detach().cpu().contiguous()
+        fingerprint.update(f"{name}:{str(data.dtype)}:{tuple(data.shape)}:".encode())
+        fingerprint.update(data.reshape(-1).view(torch.uint8).numpy().tobytes())
+    return fingerprint.hexdigest()
+
+
+def tensor_cache_keys(call_chain):
+    """Computes keys of the tensors of a call chain, which do not change across processes and sessions.
+
+    The key of a tensor is derived from the type, the configuration (init params) and the weights of the module
+    producing it, the name of the output port and the keys of the inputs of the module. Tensors computed with other
+    weights, e.g. after loading another checkpoint, get other keys.
+
+    Args:
+        call_chain (list): call chain of an ExecutionPlan
+
+    Returns:
+        dict {unique name of NmTensor -> key}
+
+    Raises:
+        ValueError: if the init params of a module cannot be serialized to JSON
+    """
+    keys = {}
+    for module, inputs, outputs in call_chain:
+        try:
+            config = json.dumps(
+                {
+                    "type": f"{type(module).__module__}.{type(module).__qualname__}",
+                    "init_params": module.init_params,
+                    "weights": _weights_fingerprint(module),
+                    "inputs": {port: keys[nmtensor.unique_name] for port, nmtensor in inputs.items()},
+                },
+                sort_keys=True,
+            )
+        except TypeError as e:
+            raise ValueError(
+                f"Outputs of {type(module).__name__} cannot be cached on disk, "
+                f"its init params cannot be serialized to JSON: {e}"
+            )
+        for port, nmtensor in outputs.items():
+            if nmtensor is not None:
+                keys[nmtensor.unique_name] = hashlib.sha1(f"{config}:{port}".encode()).hexdigest()
+    return keys
+
+
+def _rank_dir(shard_dir, rank, world_size):
+    return os.path.join(shard_dir, f"rank-{rank}-of-{world_size}")
+
+
+class DiskCacheWriter(object):
+    """Writes the tensors of every inference batch of one worker to a shard on disk.
+
+    Shards live in cache_dir/<hash of the cached tensor keys>/rank-<rank>-of-<world size>. The shard is written to a
+    temporary directory and moved into place by close(), so incomplete shards are never picked up by readers.
+
+    Args:
+        cache_dir (str): cache directory
+        keys (dict): {unique name of NmTensor -> key}, see tensor_cache_keys()
+        rank (int): global rank of the worker, 0 if not distributed
+        world_size (int): number of workers
+    """
+
+    def __init__(self, cache_dir, keys, rank=0, world_size=1):
+        self._keys = keys
+        shard_name = hashlib.sha1(",".join(sorted(keys.values())).encode()).hexdigest()
+        self._dir = _rank_dir(os.path.join(cache_dir, shard_name), rank, world_size)
+        self._tmp_dir = f"{self._dir}.tmp-{os.getpid()}"
+        if os.path.exists(self._tmp_dir):
+            shutil.rmtree(self._tmp_dir)
+        os.makedirs(self._tmp_dir)
+        self._data = open(os.path.join(self._tmp_dir, _DATA_FILE), "wb")
+        self._offset = 0
+        self._index = {"keys": sorted(keys.values()), "rank": rank, "world_size": world_size, "batches": []}
+
+    def append(self, registered_tensors):
+        """Writes one batch.
+
+        Args:
+            registered_tensors (dict): {unique name of NmTensor -> torch.Tensor}
+        """
+        batch = {}
+        for name, tensor in registered_tensors.items():
+            key = self._keys.get(name)
+            if key is None or not isinstance(tensor, torch.Tensor):
+                continue
+            data = tensor.detach().cpu().contiguous()
+            padding = -self._offset % _ALIGNMENT
+            self._data.write(b"\0" * padding)
+            self._offset += padding
+            # .numpy() does not support all dtypes, the raw bytes are written through a uint8 view
+            raw = data.reshape(-1).view(torch.uint8).numpy() if data.numel() > 0 else np.empty(0, dtype=np.uint8)
+            self._data.write(raw.tobytes())
+            batch[key] = (str(data.dtype).split(".")[-1], tuple(data.shape), self._offset)
+            self._offset += raw.nbytes
+        self._index["batches"].append(batch)
+
+    def close(self):
+        """Finishes the shard and makes it visible to readers."""
+        self._data.close()
+        torch.save(self._index, os.path.join(self._tmp_dir, _INDEX_FILE))
+        with open(os.path.join(self._tmp_dir, _KEYS_FILE), "w") as f:
+            json.dump(self._index["keys"], f)
+        if os.path.exists(self._dir):
+            shutil.rmtree(self._dir)
+        os.rename(self._tmp_dir, self._dir)
+        logging.info(f"Wrote {len(self._index['batches'])} batches to inference cache {self._dir}")
+
+    def abort(self):
+        """Discards the shard."""
+        self._data.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class DiskCacheReader(object):
+    """Reads batches of a shard written by DiskCacheWriter. Tensors are memory-mapped, so only the pages actually
+    used are loaded into memory.
+
+    Args:
+        rank_dir (str): directory of the shard of this worker, see find_disk_cache()
+        keys (dict): {unique name of NmTensor -> key}, see tensor_cache_keys(). Only these tensors are read.
+    """
+
+    def __init__(self, rank_dir, keys):
+        self._index = torch.load(os.path.join(rank_dir, _INDEX_FILE))
+        names = {key: name for name, key in keys.items()}
+        self._names = {key: names[key] for key in self._index["keys"] if key in names}
+        data_file = os.path.join(rank_dir, _DATA_FILE)
+        if os.path.getsize(data_file) > 0:
+            # Copy-on-write, nothing is ever written back to the file
+            self._data = np.memmap(data_file, dtype=np.uint8, mode="c")
+        else:
+            self._data = np.empty(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self._index["batches"])
+
+    def __iter__(self):
+        for batch in self._index["batches"]:
+            registered_tensors = {}
+            for key, (dtype, shape, offset) in batch.items():
+                name = self._names.get(key)
+                if name is None:
+                    continue
+                dtype = getattr(torch, dtype)
+                nbytes = int(np.prod(shape, dtype=np.int64)) * torch.empty((), dtype=dtype).element_size()
+                raw = torch.from_numpy(self._data[offset : offset + nbytes])
+                registered_tensors[name] = raw.view(dtype).reshape(shape)
+            yield registered_tensors
+
+
+def find_disk_cache(cache_dir, keys, required_keys, rank=0, world_size=1):
+    """Finds the shard in cache_dir that can be reused to compute the tensors in keys.
+
+    Args:
+        cache_dir (str): cache directory
+        keys (dict): {unique name of NmTensor -> key} of the tensors of the current call chain
+        required_keys (list): keys which must be cached, usually the data layer outputs
+        rank (int): global rank of the worker, 0 if not distributed
+        world_size (int): number of workers
+
+    Returns:
+        directory of the shard of this worker with the most tensors of the current call chain, or None
+    """
+    if not os.path.isdir(cache_dir):
+        return None
+    wanted = set(keys.values())
+    best_dir, best_overlap = None, 0
+    for shard_name in sorted(os.listdir(cache_dir)):
+        rank_dir = _rank_dir(os.path.join(cache_dir, shard_name), rank, world_size)
+        if not os.path.isfile(os.path.join(rank_dir, _KEYS_FILE)):
+            continue
+        with open(os.path.join(rank_dir, _KEYS_FILE)) as f:
+            cached = set(json.load(f))
+        if not set(required_keys) <= cached:
+            continue
+        overlap = len(cached & wanted)
+        if overlap > best_overlap:
+            best_dir, best_overlap = rank_dir, overlap
+    return best_dir
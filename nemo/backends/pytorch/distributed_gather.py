@@ -0,0 +1,161 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['DistributedGatherer', 'pack_tensors', 'unpack_tensors']
+
+import torch
+import torch.distributed as dist
+
+# Dtypes which can be packed, a dtype is stored in the header as its index in this list
+_DTYPES = [
+    torch.float32,
+    torch.float64,
+    torch.float16,
+    torch.bfloat16,
+    torch.int64,
+    torch.int32,
+    torch.int16,
+    torch.int8,
+    torch.uint8,
+    torch.bool,
+]
+_DTYPE_INDEX = {dtype: i for i, dtype in enumerate(_DTYPES)}
+
+# Gloo groups of all workers of nccl global groups, see _cpu_group()
+_CPU_GROUPS = {}
+
+
+def pack_tensors(tensors):
+    """Packs a list of tensors of arbitrary shapes and dtypes into one flat uint8 buffer.
+
+    The buffer starts with an int64 header: [header length, number of tensors] followed by
+    [dtype, number of dimensions, *shape, byte offset] for every tensor. The raw bytes of all tensors follow.
+
+    Args:
+        tensors (list): list of torch.Tensors, all on the same device
+
+    Returns:
+        1D torch.Tensor of dtype uint8 on the device of the tensors
+    """
+    header = [0, len(tensors)]
+    data = []
+    offset = 0
+    for t in tensors:
+        if t.dtype not in _DTYPE_INDEX:
+            raise ValueError(f"Tensors of dtype {t.dtype} can not be packed")
+        header += [_DTYPE_INDEX[t.dtype], t.dim(), *t.shape, offset]
+        t = t.detach().contiguous().reshape(-1).view(torch.uint8)
+        data.append(t)
+        offset += t.numel()
+    header[0] = len(header)
+    device = tensors[0].device if tensors else torch.device("cpu")
+    header = torch.tensor(header, dtype=torch.int64, device=device).view(torch.uint8)
+    return torch.cat([header] + data)
+
+
+def unpack_tensors(buffer):
+    """Inverse of pack_tensors().
+
+    Args:
+        buffer (torch.Tensor): 1D uint8 tensor created by pack_tensors(), possibly with trailing padding
+
+    Returns:
+        list of torch.Tensors on the device of buffer
+    """
+    header_len = int(buffer[:8].clone().view(torch.int64).item())
+    header = buffer[: 8 * header_len].clone().view(torch.int64).tolist()
+    data = buffer[8 * header_len :]
+
+    specs = []
+    pos = 2
+    for _ in range(header[1]):
+        dtype, ndim = _DTYPES[header[pos]], header[pos + 1]
+        shape = header[pos + 2 : pos + 2 + ndim]
+        specs.append((dtype, shape, header[pos + 2 + ndim]))
+        pos += 3 + ndim
+
+    tensors = []
+    for dtype, shape, offset in specs:
+        nbytes = torch.Size(shape).numel() * torch.empty((), dtype=dtype).element_size()
+        # clone() makes sure the bytes are properly aligned for dtype
+        tensors.append(data[offset : offset + nbytes].clone().view(dtype).reshape(shape))
+    return tensors
+
+
+def _cpu_group():
+    """Returns the global group if it uses gloo, otherwise a gloo group of all workers, created once."""
+    world = dist.group.WORLD
+    if dist.get_backend(world) == dist.Backend.GLOO:
+        return world
+    if world not in _CPU_GROUPS:
+        _CPU_GROUPS[world] = dist.new_group(backend=dist.Backend.GLOO)
+    return _CPU_GROUPS[world]
+
+
+class DistributedGatherer(object):
+    """Collects evaluation outputs on every worker and gathers them from all workers on worker 0 at once.
+
+    Outputs are moved to host memory as they are buffered by append(), so they do not use device memory until the
+    end of the evaluation. gather() packs the buffered tensors of each name into one flat buffer and sends it to
+    worker 0 with a single variable-size gather per name, plus one all_gather of the buffer sizes of all names.
+    The communication uses a gloo group on the host, with both the nccl and the gloo backends. There is no limit on
+    the number of dimensions and tensors may have different shapes on every worker and in every batch.
+
+    Args:
+        names (list): names of the tensors to gather, must be the same (and in the same order) on all workers
+        group: gloo process group with worker 0 to use, defaults to the global group. If the global group uses nccl,
+            a gloo group of all workers is created by the first gatherer.
+    """
+
+    def __init__(self, names, group=None):
+        self._names = list(names)
+        self._group = group if group is not None else _cpu_group()
+        self._buffers = {name: [] for name in self._names}
+
+    def append(self, name, tensor):
+        """Buffers a tensor (usually one batch of outputs) under name in host memory. No communication happens
+        here.
+        """
+        self._buffers[name].append(tensor.detach().cpu())
+
+    def gather(self):
+        """Gathers all buffered tensors from all workers on worker 0 and clears the buffers.
+
+        Returns:
+            on worker 0, dict {name -> list over workers (in rank order) of lists of tensors in the order they were
+            appended}, None on other workers
+        """
+        world_size = dist.get_world_size(self._group)
+        is_root = dist.get_rank(self._group) == 0
+        packed = [pack_tensors(self._buffers[name]) for name in self._names]
+        self._buffers = {name: [] for name in self._names}
+
+        local_sizes = torch.tensor([p.numel() for p in packed], dtype=torch.int64)
+        all_sizes = [torch.empty_like(local_sizes) for _ in range(world_size)]
+        dist.all_gather(all_sizes, local_sizes, group=self._group)
+        all_sizes = torch.stack(all_sizes)
+        max_sizes = all_sizes.max(dim=0)[0].tolist()
+
+        results = {}
+        for i, name in enumerate(self._names):
+            buffer = torch.zeros(max_sizes[i], dtype=torch.uint8)
+            buffer[: packed[i].numel()] = packed[i]
+            gathered = [torch.empty_like(buffer) for _ in range(world_size)] if is_root else None
+            dist.gather(buffer, gather_list=gathered, dst=0, group=self._group)
+            if is_root:
+                results[name] = [unpack_tensors(g[: all_sizes[rank, i]]) for rank, g in enumerate(gathered)]
+        return results if is_root else None
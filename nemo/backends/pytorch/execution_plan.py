@@ -0,0 +1,132 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['ExecutionPlan']
+
+from collections import deque
+
+from nemo.backends.pytorch.nm import DataLayerNM
+
+
+class ExecutionPlan(object):
+    """Compiled, topologically sorted call chain of the Neural Modules leading to a set of output NmTensors.
+
+    NmTensors are immutable once created (their producer and producer arguments never change), so the plan for a
+    given set of output tensors stays valid for as long as those tensors exist. Plans are therefore compiled once
+    and reused by every subsequent train/eval/infer call on the same outputs.
+
+    Args:
+        call_chain (list): list of (module, call arguments, output tensors) tuples in execution order. The first
+            module is always the data layer.
+    """
+
+    def __init__(self, call_chain):
+        self._call_chain = call_chain
+
+    @property
+    def call_chain(self):
+        """List of (module, {port name -> input NmTensor}, {port name -> output NmTensor or None}) tuples"""
+        return self._call_chain
+
+    @property
+    def data_layer(self):
+        """DataLayerNM feeding the plan"""
+        return self._call_chain[0][0]
+
+    @property
+    def modules(self):
+        """List of Neural Modules in execution order"""
+        return [m[0] for m in self._call_chain]
+
+    def __len__(self):
+        return len(self._call_chain)
+
+    @staticmethod
+    def key(hooks):
+        """Returns the plan cache key of a list of output NmTensors. Order of the outputs does not matter."""
+        return frozenset(hooks)
+
+    @staticmethod
+    def _node(nmtensor):
+        """A node is a module call, i.e. (producer, call arguments)."""
+        producer_args = nmtensor.producer_args
+        if producer_args is None:
+            return nmtensor.producer, ()
+        return nmtensor.producer, tuple(producer_args.items())
+
+    @classmethod
+    def compile(cls, hooks):
+        """Builds the execution plan for a list of output NmTensors in O(V+E).
+
+        Args:
+            hooks (list): NmTensors representing leaf nodes in the DAG.
+
+        Returns:
+            ExecutionPlan instance
+        """
+        # Collect all nodes (together with the output tensors used by the DAG) with a breadth-first traversal.
+        all_nodes = {}
+        processed_nmtensors = set()
+        queue = deque(reversed(hooks))
+        while queue:
+            nmtensor = queue.popleft()
+            if nmtensor in processed_nmtensors:
+                continue
+            processed_nmtensors.add(nmtensor)
+            node = cls._node(nmtensor)
+            if node not in all_nodes:
+                all_nodes[node] = {k: None for k in nmtensor.producer.output_ports}
+            all_nodes[node][nmtensor.name] = nmtensor
+            if nmtensor.producer_args:
+                for new_nmtensor in nmtensor.producer_args.values():
+                    if new_nmtensor not in processed_nmtensors:
+                        queue.append(new_nmtensor)
+
+        # Kahn's algorithm: count the distinct producers every node depends on.
+        in_degree = {}
+        children = {node: [] for node in all_nodes}
+        for node in all_nodes:
+            parents = {cls._node(nmtensor) for _, nmtensor in node[1]}
+            in_degree[node] = len(parents)
+            for parent in parents:
+                children[parent].append(node)
+
+        # Data layers go first so that the data layer check below does not depend on traversal order.
+        roots = [node for node in all_nodes if in_degree[node] == 0]
+        roots.sort(key=lambda node: not isinstance(node[0], DataLayerNM))
+        ready = deque(roots)
+        call_chain = []
+        while ready:
+            node = ready.popleft()
+            call_chain.append((node[0], dict(node[1]), all_nodes[node]))
+            for child in children[node]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    ready.append(child)
+
+        if len(call_chain) != len(all_nodes):
+            raise ValueError("The DAG of Neural Modules contains a cycle.")
+
+        # Ensure that there is only one dataset in callchain
+        for m in call_chain[1:]:
+            if isinstance(m[0], DataLayerNM):
+                raise ValueError("There were more than one DataLayer NeuralModule inside your DAG.")
+
+        if not isinstance(call_chain[0][0], DataLayerNM):
+            raise ValueError("The first module in your DAG was not a DataLayer NeuralModule.")
+
+        return cls(call_chain)
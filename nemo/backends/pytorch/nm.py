@@ -1,7 +1,7 @@
 # Copyright (c) 2019 NVIDIA Corporation
 import os
 from abc import abstractmethod
-from typing import Dict, List, Optional, Set, Tuple
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple, Union
 
 import torch as t
 import torch.nn as nn
@@ -167,7 +167,7 @@ class NonTrainableNM(NeuralModule):
     ):
         pass
 
-    def save_to(self, path: str):
+    def save_to(self, path: Union[str, BinaryIO]):
         pass
 
     def restore_from(self, path: str):
@@ -206,6 +206,7 @@ class DataLayerNM(NeuralModule):
         self._batch_size = 1
         self._num_workers = os.cpu_count()  # Use all CPUs by default.
         self._shuffle = False  # Don't shuffle by default.
+        self._prefetch_batches = 2  # Number of batches moved to the device ahead of time, 0 disables prefetching.
 
     @property
     def input_ports(self):
@@ -319,6 +320,18 @@ class DataLayerNM(NeuralModule):
     #    """ Property setting the number of workers. """
     #    self._num_workers = nw
 
+    @property
+    def prefetch_batches(self):
+        """ Property returning the number of batches prefetched to the device by a background thread. """
+        return self._prefetch_batches
+
+    @prefetch_batches.setter
+    def prefetch_batches(self, num_batches):
+        """ Property setting the number of batches prefetched to the device, 0 disables prefetching. """
+        if num_batches < 0:
+            raise ValueError(f"prefetch_batches must be >= 0, but got {num_batches}")
+        self._prefetch_batches = num_batches
+
 
 class LossNM(NeuralModule):
     """A helper Base class for creating Pytorch-based loss function modules.
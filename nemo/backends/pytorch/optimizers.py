@@ -1,8 +1,14 @@
 import math
+from collections import defaultdict
 
 import torch
 from torch.optim import Optimizer
 
+from nemo import logging
+
+# Multi-tensor operations which apply an elementwise op to a list of tensors with few kernel launches
+_HAS_FOREACH = hasattr(torch, "_foreach_norm") and hasattr(torch, "_foreach_maximum_")
+
 
 def _check_valid_opt_params(lr, eps, betas):
     if lr < 0:
@@ -24,6 +30,89 @@ def master_params(optimizer):
             yield p
 
 
+def _check_foreach(foreach):
+    if foreach and not _HAS_FOREACH:
+        logging.warning("This PyTorch version has no multi-tensor operations, foreach=True is ignored.")
+        return False
+    return foreach
+
+
+def _bucket_params(params, key):
+    """Groups params with a gradient by device, dtype and key(p), so every group can be updated by multi-tensor
+    operations.
+
+    Returns:
+        list of lists of params
+    """
+    buckets = defaultdict(list)
+    for p in params:
+        if p.grad is None:
+            continue
+        if p.grad.is_sparse:
+            raise RuntimeError("Sparse gradients are not supported.")
+        buckets[(p.device, p.dtype, key(p))].append(p)
+    return list(buckets.values())
+
+
+def _copy_into(tensors, values):
+    """Copies every element of the 1-D tensor values into the corresponding 0-dim tensor of tensors."""
+    if hasattr(torch, "_foreach_copy_"):
+        torch._foreach_copy_(tensors, list(values.unbind()))
+    else:
+        for tensor, value in zip(tensors, values.unbind()):
+            tensor.copy_(value)
+
+
+def _keep_factor(skip, device):
+    """Returns a 0-dim float tensor on device, 1 if the step is applied and 0 if skip is set, or None without skip."""
+    if skip is None:
+        return None
+    return (~skip.bool()).to(device=device, dtype=torch.float32)
+
+
+def _decay(beta, keep):
+    """Decay of a running average, 1 (no change) in skipped steps."""
+    return beta if keep is None else 1 - (1 - beta) * keep
+
+
+def _foreach_scale_(tensors, factor):
+    """Multiplies all tensors in place by a number or a 0-dim tensor."""
+    torch._foreach_mul_(tensors, [factor] * len(tensors) if torch.is_tensor(factor) else factor)
+
+
+def _mask_grads(grads, keep):
+    """Zeroes the gradients in place in skipped steps, so non-finite values do not reach the optimizer state."""
+    skip = keep == 0
+    for grad in grads:
+        grad.masked_fill_(skip, 0)
+
+
+def _count_steps(states, keep):
+    """Adds an applied step to the step counts of the states of params.
+
+    Steps which may be skipped are counted in 0-dim tensors on the device, so the counts of skipped steps do not
+    advance without synchronizing the host with the device.
+    """
+    if keep is None:
+        for state in states:
+            state["step"] += 1
+        return
+    for state in states:
+        if not torch.is_tensor(state["step"]):
+            state["step"] = torch.tensor(float(state["step"]), device=keep.device)
+    torch._foreach_add_([state["step"] for state in states], [keep] * len(states))
+
+
+def _adam_step_size(lr, beta1, beta2, step, keep=None):
+    """Bias corrected step size of Adam, a tensor if step is one and 0 in skipped steps."""
+    if not torch.is_tensor(step):
+        return lr * math.sqrt(1 - beta2 ** step) / (1 - beta1 ** step)
+    # All steps so far may have been skipped. The bias corrections cancel badly in single precision.
+    step = step.double().clamp(min=1)
+    step_size = (lr * torch.sqrt(1 - beta2 ** step) / (1 - beta1 ** step)).float()
+    return step_size if keep is None else step_size * keep
+
+
 class AdamW(Optimizer):
     """Implements AdamW algorithm.
     It has been proposed in "Decoupled Weight Decay Regularization"
@@ -40,32 +129,49 @@ class AdamW(Optimizer):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         amsgrad (boolean, optional): whether to use the AMSGrad variant of this
             algorithm from the paper "On the Convergence of Adam and Beyond"
+        foreach (boolean, optional): whether to update all parameters of the
+            same device and dtype with multi-tensor operations instead of one
+            parameter at a time (default: False). Gives the same results with
+            far fewer kernel launches for models with many parameter tensors.
     """
 
+    # step() takes skip, see OverflowMonitor
+    _step_supports_skip = True
+
     def __init__(
-        self, params, lr=1e-3, betas=(0.9, 0.999), eps=1e-8, weight_decay=0, amsgrad=False,
+        self, params, lr=1e-3, betas=(0.9, 0.999), eps=1e-8, weight_decay=0, amsgrad=False, foreach=False,
     ):
         _check_valid_opt_params(lr, eps, betas)
-        defaults = dict(lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, amsgrad=amsgrad,)
+        defaults = dict(
+            lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, amsgrad=amsgrad, foreach=_check_foreach(foreach),
+        )
         super(AdamW, self).__init__(params, defaults)
 
     def __setstate__(self, state):
         super(AdamW, self).__setstate__(state)
         for group in self.param_groups:
             group.setdefault("amsgrad", False)
+            group.setdefault("foreach", False)
 
-    def step(self, closure=None):
+    def step(self, closure=None, skip=None):
         """Performs a single optimization step.
 
         Arguments:
             closure (callable, optional): A closure that reevaluates the model
                 and returns the loss.
+            skip (torch.Tensor, optional): 0-dim tensor, if true the step
+                leaves the parameters and the state unchanged. It is applied
+                on the device, so non-finite steps are skipped without
+                synchronizing with the host.
         """
         loss = None
         if closure is not None:
             loss = closure()
 
         for group in self.param_groups:
+            if group["foreach"]:
+                self._multi_tensor_step(group, skip)
+                continue
             for p in group["params"]:
                 if p.grad is None:
                     continue
@@ -91,14 +197,17 @@ class AdamW(Optimizer):
                     max_exp_avg_sq = state["max_exp_avg_sq"]
                 beta1, beta2 = group["betas"]
 
-                state["step"] += 1
+                keep = _keep_factor(skip, p.device)
+                if keep is not None:
+                    _mask_grads([grad], keep)
+                _count_steps([state], keep)
 
                 # if group['weight_decay'] != 0:
                 #     grad = grad.add(group['weight_decay'], p.data)
 
                 # Decay the first and second moment running average coefficient
-                exp_avg.mul_(beta1).add_(1 - beta1, grad)
-                exp_avg_sq.mul_(beta2).addcmul_(1 - beta2, grad, grad)
+                exp_avg.mul_(_decay(beta1, keep)).add_(1 - beta1, grad)
+                exp_avg_sq.mul_(_decay(beta2, keep)).addcmul_(1 - beta2, grad, grad)
                 if amsgrad:
                     # Maintains max of all 2nd moment running avg till now
                     torch.max(max_exp_avg_sq, exp_avg_sq, out=max_exp_avg_sq)
@@ -107,17 +216,70 @@ class AdamW(Optimizer):
                 else:
                     denom = exp_avg_sq.sqrt().add_(group["eps"])
 
-                bias_correction1 = 1 - beta1 ** state["step"]
-                bias_correction2 = 1 - beta2 ** state["step"]
-                step_size = group["lr"] * math.sqrt(bias_correction2) / bias_correction1
+                step_size = _adam_step_size(group["lr"], beta1, beta2, state["step"], keep)
 
                 # p.data.addcdiv_(-step_size, exp_avg, denom)
-                p.data.add_(
-                    -step_size, torch.mul(p.data, group["weight_decay"]).addcdiv_(1, exp_avg, denom),
-                )
+                update = torch.mul(p.data, group["weight_decay"]).addcdiv_(1, exp_avg, denom)
+                if torch.is_tensor(step_size):
+                    p.data.sub_(update.mul_(step_size))
+                else:
+                    p.data.add_(-step_size, update)
 
         return loss
 
+    def _multi_tensor_step(self, group, skip=None):
+        """Same update as in step(), applied to all parameters of the group with multi-tensor operations."""
+        amsgrad = group["amsgrad"]
+        beta1, beta2 = group["betas"]
+        for p in group["params"]:
+            state = self.state[p]
+            if p.grad is not None and not state:
+                state["step"] = 0
+                state["exp_avg"] = torch.zeros_like(p.data)
+                state["exp_avg_sq"] = torch.zeros_like(p.data)
+                if amsgrad:
+                    state["max_exp_avg_sq"] = torch.zeros_like(p.data)
+
+        # The step size depends on the step, which differs between params if some of them had no gradient before.
+        # Steps counted on the device are not known on the host, their step sizes are computed per param.
+        def step_key(p):
+            return None if torch.is_tensor(self.state[p]["step"]) else self.state[p]["step"]
+
+        for params in _bucket_params(group["params"], key=step_key):
+            states = [self.state[p] for p in params]
+            data = [p.data for p in params]
+            grads = [p.grad.data for p in params]
+            exp_avgs = [state["exp_avg"] for state in states]
+            exp_avg_sqs = [state["exp_avg_sq"] for state in states]
+            keep = _keep_factor(skip, params[0].device)
+            if keep is not None:
+                _mask_grads(grads, keep)
+            _count_steps(states, keep)
+
+            # Decay the first and second moment running average coefficient
+            _foreach_scale_(exp_avgs, _decay(beta1, keep))
+            torch._foreach_add_(exp_avgs, grads, alpha=1 - beta1)
+            _foreach_scale_(exp_avg_sqs, _decay(beta2, keep))
+            torch._foreach_addcmul_(exp_avg_sqs, grads, grads, value=1 - beta2)
+            if amsgrad:
+                max_exp_avg_sqs = [state["max_exp_avg_sq"] for state in states]
+                torch._foreach_maximum_(max_exp_avg_sqs, exp_avg_sqs)
+                denoms = torch._foreach_sqrt(max_exp_avg_sqs)
+            else:
+                denoms = torch._foreach_sqrt(exp_avg_sqs)
+            torch._foreach_add_(denoms, group["eps"])
+
+            updates = torch._foreach_mul(data, group["weight_decay"])
+            torch._foreach_addcdiv_(updates, exp_avgs, denoms)
+            if torch.is_tensor(states[0]["step"]):
+                steps = torch.stack([state["step"] for state in states])
+                step_sizes = _adam_step_size(group["lr"], beta1, beta2, steps, keep)
+                torch._foreach_mul_(updates, list(step_sizes.unbind()))
+                torch._foreach_sub_(data, updates)
+            else:
+                step_size = _adam_step_size(group["lr"], beta1, beta2, states[0]["step"])
+                torch._foreach_add_(data, updates, alpha=-step_size)
+
 
 class Novograd(Optimizer):
     """Implements Novograd algorithm.
@@ -136,8 +298,15 @@ class Novograd(Optimizer):
         weight_decay (float, optional): weight decay (L2 penalty) (default: 0)
         amsgrad (boolean, optional): whether to use the AMSGrad variant of this
             algorithm from the paper "On the Convergence of Adam and Beyond"
+        foreach (boolean, optional): whether to update all parameters of the
+            same device and dtype with multi-tensor operations instead of one
+            parameter at a time (default: False). The per-layer gradient norms
+            are computed in one batched reduction.
     """
 
+    # step() takes skip, see OverflowMonitor
+    _step_supports_skip = True
+
     def __init__(
         self,
         params,
@@ -150,10 +319,17 @@ class Novograd(Optimizer):
         luc=False,
         luc_trust=1e-3,
         luc_eps=1e-8,
+        foreach=False,
     ):
         _check_valid_opt_params(lr, eps, betas)
         defaults = dict(
-            lr=lr, betas=betas, eps=eps, weight_decay=weight_decay, grad_averaging=grad_averaging, amsgrad=amsgrad,
+            lr=lr,
+            betas=betas,
+            eps=eps,
+            weight_decay=weight_decay,
+            grad_averaging=grad_averaging,
+            amsgrad=amsgrad,
+            foreach=_check_foreach(foreach),
         )
         self.luc = luc
         self.luc_trust = luc_trust
@@ -164,19 +340,27 @@ class Novograd(Optimizer):
         super(Novograd, self).__setstate__(state)
         for group in self.param_groups:
             group.setdefault("amsgrad", False)
+            group.setdefault("foreach", False)
 
-    def step(self, closure=None):
+    def step(self, closure=None, skip=None):
         """Performs a single optimization step.
 
         Arguments:
             closure (callable, optional): A closure that reevaluates the model
                 and returns the loss.
+            skip (torch.Tensor, optional): 0-dim tensor, if true the step
+                leaves the parameters and the state unchanged. It is applied
+                on the device, so non-finite steps are skipped without
+                synchronizing with the host.
         """
         loss = None
         if closure is not None:
             loss = closure()
 
         for group in self.param_groups:
+            if group["foreach"]:
+                self._multi_tensor_step(group, skip)
+                continue
             for p in group["params"]:
                 if p.grad is None:
                     continue
@@ -202,14 +386,17 @@ class Novograd(Optimizer):
                     max_exp_avg_sq = state["max_exp_avg_sq"]
                 beta1, beta2 = group["betas"]
 
-                state["step"] += 1
+                keep = _keep_factor(skip, p.device)
+                if keep is not None:
+                    _mask_grads([grad], keep)
+                _count_steps([state], keep)
 
                 norm = grad.norm().pow(2)
 
                 if exp_avg_sq == 0:
                     exp_avg_sq.copy_(norm)
                 else:
-                    exp_avg_sq.mul_(beta2).add_(1 - beta2, norm)
+                    exp_avg_sq.mul_(_decay(beta2, keep)).add_(1 - beta2, norm)
 
                 if amsgrad:
                     # Maintains max of all 2nd moment running avg till now
@@ -224,16 +411,84 @@ class Novograd(Optimizer):
                     grad.add_(group["weight_decay"], p.data)
                 if group["grad_averaging"]:
                     grad.mul_(1 - beta1)
-                exp_avg.mul_(beta1).add_(grad)
+                if keep is not None:
+                    # Weight decay of skipped steps
+                    grad.mul_(keep)
+                exp_avg.mul_(_decay(beta1, keep)).add_(grad)
 
+                lr = group["lr"]
                 if self.luc:
                     # Clip update so that updates are less than eta*weights
                     data_norm = torch.norm(p.data)
                     grad_norm = torch.norm(exp_avg.data)
                     luc_factor = self.luc_trust * data_norm / (grad_norm + self.luc_eps)
-                    luc_factor = min(luc_factor, group["lr"])
-                    p.data.add_(-luc_factor, exp_avg)
+                    lr = min(luc_factor, group["lr"])
+                if keep is None:
+                    p.data.add_(-lr, exp_avg)
                 else:
-                    p.data.add_(-group["lr"], exp_avg)
+                    p.data.sub_(exp_avg * (lr * keep))
 
         return loss
+
+    def _multi_tensor_step(self, group, skip=None):
+        """Same update as in step(), applied to all parameters of the group with multi-tensor operations."""
+        amsgrad = group["amsgrad"]
+        beta1, beta2 = group["betas"]
+        for params in _bucket_params(group["params"], key=lambda p: None):
+            for p in params:
+                state = self.state[p]
+                if not state:
+                    state["step"] = 0
+                    state["exp_avg"] = torch.zeros_like(p.data)
+                    state["exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
+                    if amsgrad:
+                        state["max_exp_avg_sq"] = torch.zeros([]).to(state["exp_avg"].device)
+            states = [self.state[p] for p in params]
+            data = [p.data for p in params]
+            grads = [p.grad.data for p in params]
+            exp_avgs = [state["exp_avg"] for state in states]
+            exp_avg_sqs = [state["exp_avg_sq"] for state in states]
+            keep = _keep_factor(skip, params[0].device)
+            if keep is not None:
+                _mask_grads(grads, keep)
+            _count_steps(states, keep)
+
+            # Squared norms of all gradients, the second moments are scalars per layer
+            norms = torch.stack(torch._foreach_norm(grads)).pow(2)
+            exp_avg_sq = torch.stack(exp_avg_sqs)
+            exp_avg_sq = torch.where(
+                exp_avg_sq == 0, norms, exp_avg_sq.mul(_decay(beta2, keep)).add(norms, alpha=1 - beta2)
+            )
+            _copy_into(exp_avg_sqs, exp_avg_sq)
+
+            if amsgrad:
+                max_exp_avg_sqs = [state["max_exp_avg_sq"] for state in states]
+                max_exp_avg_sq = torch.max(torch.stack(max_exp_avg_sqs), exp_avg_sq)
+                _copy_into(max_exp_avg_sqs, max_exp_avg_sq)
+                denom = max_exp_avg_sq.sqrt().add_(group["eps"])
+            else:
+                denom = exp_avg_sq.sqrt().add_(group["eps"])
+
+            torch._foreach_div_(grads, list(denom.unbind()))
+            if group["weight_decay"] != 0:
+                torch._foreach_add_(grads, data, alpha=group["weight_decay"])
+            if group["grad_averaging"]:
+                torch._foreach_mul_(grads, 1 - beta1)
+            if keep is not None:
+                # Weight decay of skipped steps
+                _foreach_scale_(grads, keep)
+            _foreach_scale_(exp_avgs, _decay(beta1, keep))
+            torch._foreach_add_(exp_avgs, grads)
+
+            if self.luc:
+                # Clip update so that updates are less than eta*weights
+                data_norm = torch.stack(torch._foreach_norm(data))
+                grad_norm = torch.stack(torch._foreach_norm(exp_avgs))
+                luc_factor = (self.luc_trust * data_norm / (grad_norm + self.luc_eps)).clamp(max=group["lr"])
+                if keep is not None:
+                    luc_factor = luc_factor * keep
+                torch._foreach_sub_(data, torch._foreach_mul(exp_avgs, list(luc_factor.unbind())))
+            elif keep is not None:
+                torch._foreach_sub_(data, torch._foreach_mul(exp_avgs, [group["lr"] * keep] * len(exp_avgs)))
+            else:
+                torch._foreach_add_(data, exp_avgs, alpha=-group["lr"])
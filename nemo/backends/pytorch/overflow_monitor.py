@@ -0,0 +1,131 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['OverflowMonitor']
+
+import copy
+
+import torch
+import torch.distributed as dist
+
+from nemo import logging
+
+
+class OverflowMonitor(object):
+    """Detects non-finite (NaN or inf) losses without synchronizing the host with the device on every step.
+
+    Non-finite flags are accumulated on the device and only copied to the host by check(), which the training
+    loop calls every few steps. What happens to the updates computed from non-finite losses depends on the policy:
+
+        * "skip": optimizer steps with non-finite losses leave the parameters and the optimizer state unchanged.
+          Optimizers whose step() takes skip (such as AdamW and Novograd, see _step_supports_skip) make the update
+          conditional on the device, without synchronizing. For other optimizers (such as torch SGD and Adam) the
+          flag is copied to the host on every step, as without the monitor, and the step is not run if it is set.
+        * "rollback": the state of all modules and optimizers is snapshotted after every successful check. If a
+          check finds a non-finite loss, all updates since the last snapshot are discarded.
+
+    Args:
+        policy (str): "skip" or "rollback"
+        modules (list): torch.nn.Modules to snapshot for the "rollback" policy
+        optimizers (list): optimizers to snapshot for the "rollback" policy
+        stop_on_nan_loss (bool): raise ValueError from check() if a non-finite loss was found
+        distributed (bool): whether flags should be reduced over all workers
+    """
+
+    POLICIES = ("skip", "rollback")
+
+    def __init__(self, policy="skip", modules=None, optimizers=None, stop_on_nan_loss=False, distributed=False):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown nan_policy: {policy}. Supported policies are: {self.POLICIES}")
+        self._policy = policy
+        self._modules = modules or []
+        self._optimizers = optimizers or []
+        self._stop_on_nan_loss = stop_on_nan_loss
+        self._distributed = distributed
+        # Device flag of the current optimizer step
+        self._step_flag = None
+        # Device counter of non-finite steps since the last check
+        self._num_overflows = None
+        self._snapshot = None
+        if self._policy == "rollback":
+            self._take_snapshot()
+
+    def update(self, loss):
+        """Records whether loss (of the current optimizer step) is finite. Does not synchronize."""
+        flag = (~torch.isfinite(loss.detach())).any().int()
+        if self._step_flag is None:
+            self._step_flag = flag
+        else:
+            self._step_flag = torch.max(self._step_flag, flag)
+
+    def step(self, optimizer):
+        """Runs optimizer.step(), which leaves the parameters and the optimizer state unchanged if the "skip" policy
+        is used and the step had a non-finite loss.
+        """
+        flag = self._step_flag
+        self._step_flag = None
+        if flag is None:
+            optimizer.step()
+            return
+        if self._distributed:
+            dist.all_reduce(flag, op=dist.ReduceOp.MAX)
+        self._num_overflows = flag if self._num_overflows is None else self._num_overflows + flag
+
+        if self._policy != "skip":
+            optimizer.step()
+        elif getattr(optimizer, "_step_supports_skip", False):
+            optimizer.step(skip=flag.bool())
+        elif not flag.item():
+            optimizer.step()
+
+    def check(self):
+        """Copies the accumulated flags to the host and applies the policy.
+
+        Returns:
+            number of optimizer steps with non-finite losses since the last check
+        """
+        if self._num_overflows is None:
+            num_overflows = 0
+        else:
+            num_overflows = int(self._num_overflows.item())
+        self._num_overflows = None
+
+        if num_overflows > 0:
+            if self._stop_on_nan_loss:
+                raise ValueError('Loss is NaN or inf - exiting')
+            if self._policy == "rollback":
+                logging.warning(f'Loss was NaN or inf in {num_overflows} steps, rolling back to the last good state')
+                self._restore_snapshot()
+            else:
+                logging.warning(f'Loss was NaN or inf in {num_overflows} steps, these updates were skipped')
+        elif self._policy == "rollback":
+            self._take_snapshot()
+        return num_overflows
+
+    def _take_snapshot(self):
+        self._snapshot = (
+            [{k: v.detach().clone() for k, v in m.state_dict().items()} for m in self._modules],
+            [copy.deepcopy(opt.state_dict()) for opt in self._optimizers],
+        )
+
+    def _restore_snapshot(self):
+        module_states, optimizer_states = self._snapshot
+        for module, state in zip(self._modules, module_states):
+            module.load_state_dict(state)
+        for opt, state in zip(self._optimizers, optimizer_states):
+            # load_state_dict() may keep references to the given tensors
+            opt.load_state_dict(copy.deepcopy(state))
@@ -0,0 +1,174 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['StepProfiler']
+
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import torch
+
+from nemo import logging
+
+
+class StepProfiler(object):
+    """Records where the time of training steps goes, for a window of steps.
+
+    The training loop reports regions of every step: waiting for the data loader ("data_wait"), the forward pass of
+    every module ("forward/<module>"), the backward pass ("backward"), the optimizer update ("optimizer") and the
+    callbacks ("callbacks"). Outside of the window nothing is recorded. Inside of the window the host is synchronized
+    with the device around every region, so the times are accurate but the profiled steps are slower than usual.
+    If CUDA is used, the change of allocated device memory is recorded for every region as well.
+
+    At the end of every profiled step, the time (in ms) and memory delta (in MB) of every region are written to
+    TensorBoard as "profiler/..." scalars. At the end of the window, all regions are written to trace_file in the
+    Chrome trace event format, which can be opened with chrome://tracing or https://ui.perfetto.dev.
+
+    Args:
+        first_step (int): first step to profile
+        num_steps (int): number of steps to profile
+        tb_writer (SummaryWriter): TensorBoard writer for the scalars, optional
+        trace_file (str): path of the Chrome trace JSON file, optional
+        pid (int): process id used in the trace, usually the global rank
+    """
+
+    def __init__(self, first_step, num_steps, tb_writer=None, trace_file=None, pid=0):
+        if first_step < 0 or num_steps < 0:
+            raise ValueError(f"Invalid profiling window: first_step={first_step}, num_steps={num_steps}")
+        self._first_step = first_step
+        self._last_step = first_step + num_steps
+        self._tb_writer = tb_writer
+        self._trace_file = trace_file
+        self._pid = pid
+        self._step = None
+        self._active = False
+        self._module_names = {}
+        self._class_counts = defaultdict(int)
+        # {region -> [time in s, memory delta in bytes]} of the current step
+        self._step_totals = defaultdict(lambda: [0.0, 0])
+        # {region -> [time in s, number of steps]} of the whole window, for the summary
+        self._window_totals = defaultdict(lambda: [0.0, 0])
+        self._events = []
+        self._origin = time.perf_counter()
+        self._finished = False
+
+    @property
+    def active(self):
+        """Whether the current step is profiled."""
+        return self._active
+
+    def start(self, step):
+        """Starts step, which is profiled if it is in the window."""
+        self._step = step
+        self._active = not self._finished and self._first_step <= step < self._last_step
+
+    def step(self, step):
+        """Finishes the current step and starts step."""
+        if self._active:
+            self._flush_step()
+        self.start(step)
+        if not self._finished and self._step >= self._last_step and self._window_totals:
+            self.close()
+
+    def close(self):
+        """Ends profiling and writes the trace file and the summary. Called at the end of training."""
+        if self._finished:
+            return
+        if self._active:
+            self._flush_step()
+        self._active = False
+        self._finished = True
+        if not self._window_totals:
+            return
+        summary = ", ".join(
+            f"{name}: {1000 * total / count:.2f}ms" for name, (total, count) in sorted(self._window_totals.items())
+        )
+        logging.info(f"Average time per profiled step: {summary}")
+        if self._trace_file is not None:
+            with open(self._trace_file, "w") as f:
+                json.dump({"traceEvents": self._events, "displayTimeUnit": "ms"}, f)
+            logging.info(f"Saved the Chrome trace of the profiled steps to {self._trace_file}")
+
+    def module_name(self, module):
+        """Name of a NeuralModule in the profile: its class name, with a suffix if the class is used more than once."""
+        name = self._module_names.get(module.unique_instance_id)
+        if name is None:
+            class_name = type(module).__name__
+            count = self._class_counts[class_name]
+            self._class_counts[class_name] += 1
+            name = class_name if count == 0 else f"{class_name}_{count}"
+            self._module_names[module.unique_instance_id] = name
+        return name
+
+    @contextmanager
+    def record(self, name):
+        """Context manager recording the time and memory delta of region name if the current step is profiled."""
+        if not self._active:
+            yield
+            return
+        cuda = torch.cuda.is_available() and torch.cuda.is_initialized()
+        if cuda:
+            torch.cuda.synchronize()
+            memory = torch.cuda.memory_allocated()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if cuda:
+                torch.cuda.synchronize()
+            end = time.perf_counter()
+            event = {
+                "name": name,
+                "cat": name.split("/")[0],
+                "ph": "X",
+                "ts": 1e6 * (start - self._origin),
+                "dur": 1e6 * (end - start),
+                "pid": self._pid,
+                "tid": 0,
+                "args": {"step": self._step},
+            }
+            totals = self._step_totals[name]
+            totals[0] += end - start
+            if cuda:
+                memory_delta = torch.cuda.memory_allocated() - memory
+                event["args"]["memory_delta"] = memory_delta
+                totals[1] += memory_delta
+            self._events.append(event)
+
+    def iterate(self, iterable, name="data_wait"):
+        """Wraps iterable and records the time spent waiting for every element as region name."""
+        iterator = iter(iterable)
+        while True:
+            with self.record(name):
+                try:
+                    element = next(iterator)
+                except StopIteration:
+                    return
+            yield element
+
+    def _flush_step(self):
+        for name, (seconds, memory_delta) in self._step_totals.items():
+            window_totals = self._window_totals[name]
+            window_totals[0] += seconds
+            window_totals[1] += 1
+            if self._tb_writer is not None:
+                self._tb_writer.add_scalar(f"profiler/time_ms/{name}", 1000 * seconds, self._step)
+                if memory_delta != 0:
+                    self._tb_writer.add_scalar(f"profiler/memory_delta_mb/{name}", memory_delta / 2 ** 20, self._step)
+        self._step_totals.clear()
@@ -12,15 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =============================================================================
-from .audio_preprocessing import *
-from .beam_search_decoder import BeamSearchDecoderWithLM
-from .data_layer import AudioToSpeechLabelDataLayer, AudioToTextDataLayer, KaldiFeatureDataLayer, TranscriptDataLayer
-from .greedy_ctc_decoder import GreedyCTCDecoder
-from .jasper import JasperDecoderForClassification, JasperDecoderForCTC, JasperEncoder
-from .las.misc import JasperRNNConnector
-from .losses import CTCLossNM
-from nemo.backends.pytorch.common.losses import CrossEntropyLossNM
 from nemo.core import Backend
+from nemo.utils.lazy_import import lazy_package
 
 __all__ = [
     'Backend',
@@ -32,6 +25,7 @@ __all__ = [
     'AudioToMelSpectrogramPreprocessor',
     'AudioToSpectrogramPreprocessor',
     'CropOrPadSpectrogramAugmentation',
+    'FeatureCacheDataLayer',
     'MultiplyBatch',
     'SpectrogramAugmentation',
     'KaldiFeatureDataLayer',
@@ -47,3 +41,43 @@ __all__ = [
 ]
 
 backend = Backend.PyTorch
+
+# Modules (and their dependencies such as librosa and kaldi_io) are imported on first use
+lazy_package(
+    __name__,
+    submodules=[
+        "audio_preprocessing",
+        "beam_search_decoder",
+        "data_layer",
+        "greedy_ctc_decoder",
+        "helpers",
+        "jasper",
+        "las",
+        "losses",
+        "metrics",
+        "parts",
+    ],
+    attributes={
+        "AudioPreprocessing": ".audio_preprocessing",
+        "AudioPreprocessor": ".audio_preprocessing",
+        "AudioToMFCCPreprocessor": ".audio_preprocessing",
+        "AudioToMelSpectrogramPreprocessor": ".audio_preprocessing",
+        "AudioToSpectrogramPreprocessor": ".audio_preprocessing",
+        "CropOrPadSpectrogramAugmentation": ".audio_preprocessing",
+        "MultiplyBatch": ".audio_preprocessing",
+        "SpectrogramAugmentation": ".audio_preprocessing",
+        "BeamSearchDecoderWithLM": ".beam_search_decoder",
+        "AudioToSpeechLabelDataLayer": ".data_layer",
+        "AudioToTextDataLayer": ".data_layer",
+        "FeatureCacheDataLayer": ".data_layer",
+        "KaldiFeatureDataLayer": ".data_layer",
+        "TranscriptDataLayer": ".data_layer",
+        "GreedyCTCDecoder": ".greedy_ctc_decoder",
+        "JasperDecoderForClassification": ".jasper",
+        "JasperDecoderForCTC": ".jasper",
+        "JasperEncoder": ".jasper",
+        "JasperRNNConnector": ".las.misc",
+        "CTCLossNM": ".losses",
+        "CrossEntropyLossNM": "nemo.backends.pytorch.common.losses",
+    },
+)
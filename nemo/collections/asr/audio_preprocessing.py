@@ -378,6 +378,23 @@ class AudioToMelSpectrogramPreprocessor(AudioPreprocessor):
     def get_seq_len(self, seq_len):
         return self.featurizer.get_seq_len(seq_len)
 
+    def stream(self, input_signal, last=False):
+        """Computes the features of the next chunk of a stream of audio, see FilterbankFeatures.stream().
+        Together with JasperEncoder.stream(), features can be encoded while the audio is received.
+
+        Args:
+            input_signal (torch.Tensor): next samples of the stream of shape [batch, time]
+            last (bool): whether input_signal is the end of the stream
+
+        Returns:
+            features of the new frames of shape [batch, features, time]
+        """
+        return self.featurizer.stream(input_signal, last)
+
+    def reset_stream(self):
+        """Forgets the stream processed by stream()."""
+        self.featurizer.reset_stream()
+
     @property
     def filter_banks(self):
         return self.featurizer.filter_banks
@@ -550,6 +567,10 @@ class SpectrogramAugmentation(NonTrainableNM):
         rect_time (int): maximum size of cut rectangles along the time
             dimension
             Defaults to 25.
+
+    If the optional length input is connected, e.g. to the processed_length
+    output of a preprocessor, masks are only applied to the valid time steps
+    of every spectrogram and never to the padding.
     """
 
     @property
@@ -560,7 +581,8 @@ class SpectrogramAugmentation(NonTrainableNM):
         return {
             # "input_spec": NeuralType({0: AxisType(BatchTag), 1: AxisType(SpectrogramSignalTag), 2: AxisType(
             # TimeTag),})
-            "input_spec": NeuralType(('B', 'D', 'T'), SpectrogramType())
+            "input_spec": NeuralType(('B', 'D', 'T'), SpectrogramType()),
+            "length": NeuralType(tuple('B'), LengthsType(), optional=True),
         }
 
     @property
@@ -592,7 +614,7 @@ class SpectrogramAugmentation(NonTrainableNM):
             self.spec_cutout = SpecCutout(rect_masks=rect_masks, rect_time=rect_time, rect_freq=rect_freq, rng=rng,)
             self.spec_cutout.to(self._device)
         else:
-            self.spec_cutout = lambda x: x
+            self.spec_cutout = lambda x, length=None: x
 
         if freq_masks + time_masks > 0:
             self.spec_augment = SpecAugment(
@@ -600,11 +622,11 @@ class SpectrogramAugmentation(NonTrainableNM):
             )
             self.spec_augment.to(self._device)
         else:
-            self.spec_augment = lambda x: x
+            self.spec_augment = lambda x, length=None: x
 
-    def forward(self, input_spec):
-        augmented_spec = self.spec_cutout(input_spec)
-        augmented_spec = self.spec_augment(augmented_spec)
+    def forward(self, input_spec, length=None):
+        augmented_spec = self.spec_cutout(input_spec, length)
+        augmented_spec = self.spec_augment(augmented_spec, length)
         return augmented_spec
 
 
@@ -21,16 +21,20 @@ import torch
 
 import nemo
 from .parts.dataset import AudioDataset, AudioLabelDataset, KaldiFeatureDataset, TranscriptDataset, seq_collate_fn
+from .parts.feature_cache import FeatureCache, FeatureCacheDataset, feature_cache_dir
 from .parts.features import WaveformFeaturizer
 from .parts.perturb import AudioAugmentor, perturbation_types
+from .parts.samplers import DurationBucketingBatchSampler
+from .parts.segment import AudioCache
 from nemo.backends.pytorch import DataLayerNM
-from nemo.core import DeviceType
 from nemo.core.neural_types import *
 from nemo.utils.decorators import add_port_docs
+from nemo.utils.helpers import is_distributed_placement
 from nemo.utils.misc import pad_to
 
 __all__ = [
     'AudioToTextDataLayer',
+    'FeatureCacheDataLayer',
     'KaldiFeatureDataLayer',
     'TranscriptDataLayer',
     'AudioToSpeechLabelDataLayer',
@@ -83,6 +87,9 @@ transcript_n}
             Defaults to True.
         trim_silence (bool): Whether to use trim silence from beginning and end
             of audio signal using librosa.effects.trim().
+            Manifests written by scripts/compute_trim_boundaries.py store the
+            trimmed window of every file as its offset and duration, so only
+            that window is read and trim_silence can be left False.
             Defaults to False.
         load_audio (bool): Dataset parameter.
             Controls whether the dataloader loads the audio signal and
@@ -95,6 +102,27 @@ transcript_n}
         num_workers (int): See PyTorch DataLoader.
             Defaults to 0.
         perturb_config (dict): Currently disabled.
+        num_buckets (int): If set, batches are drawn by a
+            DurationBucketingBatchSampler, which groups files of similar
+            duration into num_buckets buckets so batches need less padding.
+            Defaults to None.
+        max_batch_duration (float): Maximum padded duration of a batch in
+            seconds when num_buckets is set, i.e. the number of files times
+            the duration of the longest one. Batches still have at most
+            batch_size files, use batch_size=-1 to only limit the duration.
+            Defaults to None.
+        columnar_manifest (bool): Dataset parameter.
+            Whether to store the manifest in a few NumPy arrays instead of
+            Python objects, which saves memory with millions of files. The
+            manifest is then parsed by num_workers processes, and
+            manifest_filepath can also be a directory saved by
+            ColumnarAudioText.save(), which is memory-mapped.
+            Defaults to False.
+        audio_cache_mb (float): Memory budget in MB of every data loading
+            process for caching the decoded, resampled and trimmed audio,
+            so later epochs do not decode it again. Workers are then kept
+            alive between epochs, and audio_cache.stats() reports the hit
+            rate. Defaults to 0, which disables the cache.
     """
 
     @property
@@ -136,10 +164,17 @@ transcript_n}
         drop_last=False,
         shuffle=True,
         num_workers=0,
+        num_buckets=None,
+        max_batch_duration=None,
+        columnar_manifest=False,
+        audio_cache_mb=0,
     ):
         super().__init__()
         self._sample_rate = sample_rate
-        self._featurizer = WaveformFeaturizer(sample_rate=self._sample_rate, int_values=int_values, augmentor=None)
+        self._audio_cache = AudioCache(int(audio_cache_mb * 2 ** 20)) if audio_cache_mb > 0 else None
+        self._featurizer = WaveformFeaturizer(
+            sample_rate=self._sample_rate, int_values=int_values, augmentor=None, cache=self._audio_cache
+        )
 
         # Set up dataset
         dataset_params = {
@@ -153,34 +188,233 @@ transcript_n}
             'bos_id': bos_id,
             'eos_id': eos_id,
             'load_audio': load_audio,
+            'columnar_manifest': columnar_manifest,
+            'manifest_workers': num_workers,
         }
         self._dataset = AudioDataset(**dataset_params)
         self._batch_size = batch_size
+        pad_id = 0 if pad_id is None else pad_id
 
         # Set up data loader
-        if self._placement == DeviceType.AllGpu:
-            logging.info("Parallelizing Datalayer.")
-            sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
+        distributed = is_distributed_placement(self._placement)
+        if num_buckets is not None:
+            # The bucketing sampler makes the batches and splits them between processes itself
+            batch_sampler = DurationBucketingBatchSampler(
+                durations=self._dataset.collection.durations,
+                batch_size=None if batch_size == -1 else batch_size,
+                max_batch_duration=max_batch_duration,
+                num_buckets=num_buckets,
+                shuffle=shuffle,
+                drop_last=drop_last,
+                num_replicas=None if distributed else 1,
+                rank=None if distributed else 0,
+            )
+            loader_params = {'batch_sampler': batch_sampler}
         else:
-            sampler = None
+            if max_batch_duration is not None:
+                raise ValueError("max_batch_duration requires num_buckets to be set")
+            if distributed:
+                logging.info("Parallelizing Datalayer.")
+                sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
+            else:
+                sampler = None
 
-        if batch_size == -1:
-            batch_size = len(self._dataset)
+            if batch_size == -1:
+                batch_size = len(self._dataset)
+            loader_params = {
+                'batch_size': batch_size,
+                'drop_last': drop_last,
+                'shuffle': shuffle if sampler is None else False,
+                'sampler': sampler,
+            }
 
-        pad_id = 0 if pad_id is None else pad_id
         self._dataloader = torch.utils.data.DataLoader(
             dataset=self._dataset,
-            batch_size=batch_size,
             collate_fn=partial(seq_collate_fn, token_pad_value=pad_id),
-            drop_last=drop_last,
-            shuffle=shuffle if sampler is None else False,
-            sampler=sampler,
             num_workers=num_workers,
+            # Workers keep their audio caches across epochs
+            persistent_workers=self._audio_cache is not None and num_workers > 0,
+            **loader_params,
         )
 
     def __len__(self):
         return len(self._dataset)
 
+    @property
+    def audio_cache(self):
+        """AudioCache of the decoded audio, None if audio_cache_mb is 0."""
+        return self._audio_cache
+
+    @property
+    def dataset(self):
+        return None
+
+    @property
+    def data_iterator(self):
+        return self._dataloader
+
+
+class FeatureCacheDataLayer(DataLayerNM):
+    """Data layer which reads precomputed log-mel features instead of audio.
+
+    It replaces an AudioToTextDataLayer followed by an AudioToMelSpectrogramPreprocessor when the waveforms are not
+    augmented: audio is neither decoded nor transformed during training, the features are read from memory-mapped
+    shards. Features are computed once with::
+
+        python scripts/precompute_asr_features.py --manifest <manifest> --cache_dir <cache_dir> \
+            --model_config <model yaml with an AudioToMelSpectrogramPreprocessor section>
+
+    The cache is looked up by the contents of the manifest and the featurizer configuration, so both must be the same
+    as the ones the features were computed with. Augmentation of the features, such as SpectrogramAugmentation, can
+    be applied to the output as usual. Note that the dither noise of the preprocessor is computed once and is the same
+    in every epoch.
+
+    Args:
+        cache_dir (str): root directory of the feature cache.
+        manifest_filepath (str): Path to JSON containing data, in the format
+            of AudioToTextDataLayer. Can be comma-separated paths.
+        labels (list): List of characters that can be output by the ASR model.
+        batch_size (int): batch size
+        preprocessor_params (dict): init params of the
+            AudioToMelSpectrogramPreprocessor the features were computed with.
+            Defaults to None, i.e. the default preprocessor.
+        int_values (bool): Whether the audio files are saved as int data.
+            Defaults to False.
+        trim_silence (bool): Whether silence was trimmed from the audio before
+            computing the features. Defaults to False.
+        bos_id (int): Beginning of string symbol id. Defaults to None.
+        eos_id (int): End of string symbol id. Defaults to None.
+        pad_id (int): Id used to pad transcripts. Defaults to 0.
+        min_duration (float): All files shorter than min_duration are dropped.
+            Defaults to 0.1.
+        max_duration (float): All files longer than max_duration are dropped.
+            Defaults to None.
+        normalize_transcripts (bool): Whether to use automatic text cleaning.
+            Defaults to True.
+        pad_to (int): The time dimension of the batches is padded to a
+            multiple of pad_to, as by the preprocessor. Defaults to 16.
+        drop_last (bool): See PyTorch DataLoader. Defaults to False.
+        shuffle (bool): See PyTorch DataLoader. Defaults to True.
+        num_workers (int): See PyTorch DataLoader. Defaults to 0.
+        num_buckets (int): See AudioToTextDataLayer. Defaults to None.
+        max_batch_duration (float): See AudioToTextDataLayer.
+            Defaults to None.
+    """
+
+    @property
+    @add_port_docs()
+    def output_ports(self):
+        """Returns definitions of module output ports.
+        """
+        return {
+            'processed_signal': NeuralType(('B', 'D', 'T'), MelSpectrogramType()),
+            'processed_length': NeuralType(tuple('B'), LengthsType()),
+            'transcripts': NeuralType(('B', 'T'), LabelsType()),
+            'transcript_length': NeuralType(tuple('B'), LengthsType()),
+        }
+
+    def __init__(
+        self,
+        cache_dir,
+        manifest_filepath,
+        labels,
+        batch_size,
+        preprocessor_params=None,
+        int_values=False,
+        trim_silence=False,
+        bos_id=None,
+        eos_id=None,
+        pad_id=None,
+        min_duration=0.1,
+        max_duration=None,
+        normalize_transcripts=True,
+        pad_to=16,
+        drop_last=False,
+        shuffle=True,
+        num_workers=0,
+        num_buckets=None,
+        max_batch_duration=None,
+    ):
+        super().__init__()
+
+        featurizer_config = FeatureCacheDataLayer.featurizer_config(preprocessor_params, int_values, trim_silence)
+        cache = FeatureCache(feature_cache_dir(cache_dir, manifest_filepath, featurizer_config))
+        self._dataset = FeatureCacheDataset(
+            cache=cache,
+            manifest_filepath=manifest_filepath,
+            labels=labels,
+            max_duration=max_duration,
+            min_duration=min_duration,
+            normalize=normalize_transcripts,
+            bos_id=bos_id,
+            eos_id=eos_id,
+        )
+        self._batch_size = batch_size
+        pad_id = 0 if pad_id is None else pad_id
+        pad_value = (preprocessor_params or {}).get('pad_value', 0)
+        collate_fn = partial(self._collate_fn, pad_to=pad_to, pad_value=pad_value, token_pad_value=pad_id)
+
+        # Set up data loader
+        distributed = is_distributed_placement(self._placement)
+        if num_buckets is not None:
+            batch_sampler = DurationBucketingBatchSampler(
+                durations=self._dataset.collection.durations,
+                batch_size=None if batch_size == -1 else batch_size,
+                max_batch_duration=max_batch_duration,
+                num_buckets=num_buckets,
+                shuffle=shuffle,
+                drop_last=drop_last,
+                num_replicas=None if distributed else 1,
+                rank=None if distributed else 0,
+            )
+            loader_params = {'batch_sampler': batch_sampler}
+        else:
+            if max_batch_duration is not None:
+                raise ValueError("max_batch_duration requires num_buckets to be set")
+            sampler = torch.utils.data.distributed.DistributedSampler(self._dataset) if distributed else None
+            loader_params = {
+                'batch_size': len(self._dataset) if batch_size == -1 else batch_size,
+                'drop_last': drop_last,
+                'shuffle': shuffle if sampler is None else False,
+                'sampler': sampler,
+            }
+
+        self._dataloader = torch.utils.data.DataLoader(
+            dataset=self._dataset, collate_fn=collate_fn, num_workers=num_workers, **loader_params,
+        )
+
+    @staticmethod
+    def featurizer_config(preprocessor_params=None, int_values=False, trim_silence=False):
+        """Returns the configuration which identifies features in the cache, see feature_cache_dir()."""
+        return {
+            'preprocessor': dict(preprocessor_params or {}),
+            'int_values': int_values,
+            'trim_silence': trim_silence,
+        }
+
+    @staticmethod
+    def _collate_fn(batch, pad_to=16, pad_value=0, token_pad_value=0):
+        """Collate batch of (features, feature len, tokens, tokens len), padding the features like
+        AudioToMelSpectrogramPreprocessor does.
+        """
+        _, feat_lens, _, _ = zip(*batch)
+        max_feat_len = max(feat_lens).item()
+        if pad_to > 0 and max_feat_len % pad_to != 0:
+            max_feat_len += pad_to - max_feat_len % pad_to
+
+        features = []
+        for feat, feat_len, _, _ in batch:
+            feat_len = feat_len.item()
+            if feat_len < max_feat_len:
+                feat = torch.nn.functional.pad(feat, (0, max_feat_len - feat_len), value=pad_value)
+            features.append(feat)
+        _, _, tokens, token_lens = seq_collate_fn([(None, None, t, tl) for _, _, t, tl in batch], token_pad_value)
+
+        return torch.stack(features), torch.stack(feat_lens), tokens, token_lens
+
+    def __len__(self):
+        return len(self._dataset)
+
     @property
     def dataset(self):
         return None
@@ -268,7 +502,7 @@ class KaldiFeatureDataLayer(DataLayerNM):
         self._dataset = KaldiFeatureDataset(**dataset_params)
 
         # Set up data loader
-        if self._placement == DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             logging.info("Parallelizing DATALAYER")
             sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
         else:
@@ -397,7 +631,7 @@ class TranscriptDataLayer(DataLayerNM):
         self._dataset = TranscriptDataset(**dataset_params)
 
         # Set up data loader
-        if self._placement == DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
         else:
             sampler = None
@@ -556,7 +790,7 @@ target_label_n}
         self._dataset = AudioLabelDataset(**dataset_params)
 
         # Set up data loader
-        if self._placement == DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             logging.info("Parallelizing Datalayer.")
             sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
         else:
@@ -1,5 +1,6 @@
 # Copyright (c) 2019 NVIDIA Corporation
 
+import numpy as np
 import torch
 
 import nemo
@@ -8,27 +9,50 @@ from .metrics import classification_accuracy, word_error_rate
 logging = nemo.logging
 
 
-def __ctc_decoder_predictions_tensor(tensor, labels):
+def ctc_collapse(predictions, blank_id, lengths=None):
+    """Collapses repeated labels and removes blanks from the greedy CTC predictions of a whole batch at once.
+
+    Args:
+        predictions (torch.Tensor): label ids of shape [batch, time], can be padded
+        blank_id (int): id of the blank symbol
+        lengths (torch.Tensor): number of valid frames of every prediction, all frames are valid if None
+
+    Returns:
+        the ids of all hypotheses concatenated in a 1D tensor, and the number of ids of every hypothesis
+    """
+    predictions = predictions.long()
+    keep = predictions != blank_id
+    keep[:, 1:] &= predictions[:, 1:] != predictions[:, :-1]
+    if lengths is not None:
+        keep &= torch.arange(predictions.shape[1], device=predictions.device) < lengths.to(predictions.device)[:, None]
+    return predictions[keep], keep.sum(dim=1)
+
+
+def ids_to_text(ids, counts, labels):
+    """Maps the concatenated label ids of many sequences to their texts with a single lookup.
+
+    Args:
+        ids (torch.Tensor): ids of all sequences concatenated in a 1D tensor
+        counts (torch.Tensor): number of ids of every sequence
+        labels (list): label of every id
+
+    Returns:
+        list of the texts of the sequences
+    """
+    ids = ids.cpu().numpy()
+    label_lengths = np.array([len(label) for label in labels], dtype=np.int64)
+    text = ''.join(np.array(labels, dtype=object)[ids].tolist())
+    # Offsets of the sequences in the ids, and then in the characters of text
+    bounds = np.concatenate(([0], np.cumsum(counts.cpu().numpy())))
+    bounds = np.concatenate(([0], np.cumsum(label_lengths[ids])))[bounds]
+    return [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def __ctc_decoder_predictions_tensor(tensor, labels, lengths=None):
     """
     Decodes a sequence of labels to words
     """
-    blank_id = len(labels)
-    hypotheses = []
-    labels_map = dict([(i, labels[i]) for i in range(len(labels))])
-    prediction_cpu_tensor = tensor.long().cpu()
-    # iterate over batch
-    for ind in range(prediction_cpu_tensor.shape[0]):
-        prediction = prediction_cpu_tensor[ind].numpy().tolist()
-        # CTC decoding procedure
-        decoded_prediction = []
-        previous = len(labels)  # id of a blank symbol
-        for p in prediction:
-            if (p != previous or previous == blank_id) and p != blank_id:
-                decoded_prediction.append(p)
-            previous = p
-        hypothesis = ''.join([labels_map[c] for c in decoded_prediction])
-        hypotheses.append(hypothesis)
-    return hypotheses
+    return ids_to_text(*ctc_collapse(tensor, len(labels), lengths), labels)
 
 
 def monitor_asr_train_progress(tensors: list, labels: list, eval_metric='WER', tb_logger=None):
@@ -44,20 +68,8 @@ def monitor_asr_train_progress(tensors: list, labels: list, eval_metric='WER', t
     Returns:
       None
     """
-    references = []
-
-    labels_map = dict([(i, labels[i]) for i in range(len(labels))])
     with torch.no_grad():
-        # prediction_cpu_tensor = tensors[0].long().cpu()
-        targets_cpu_tensor = tensors[2].long().cpu()
-        tgt_lenths_cpu_tensor = tensors[3].long().cpu()
-
-        # iterate over batch
-        for ind in range(targets_cpu_tensor.shape[0]):
-            tgt_len = tgt_lenths_cpu_tensor[ind].item()
-            target = targets_cpu_tensor[ind][:tgt_len].numpy().tolist()
-            reference = ''.join([labels_map[c] for c in target])
-            references.append(reference)
+        references = __gather_transcripts([tensors[2]], [tensors[3]], labels=labels)
         hypotheses = __ctc_decoder_predictions_tensor(tensors[1], labels=labels)
 
     eval_metric = eval_metric.upper()
@@ -114,26 +126,22 @@ def __gather_losses(losses_list: list) -> list:
     return [torch.mean(torch.stack(losses_list))]
 
 
-def __gather_predictions(predictions_list: list, labels: list) -> list:
+def __gather_predictions(predictions_list: list, labels: list, lengths_list: list = None) -> list:
     results = []
-    for prediction in predictions_list:
-        results += __ctc_decoder_predictions_tensor(prediction, labels=labels)
+    if lengths_list is None:
+        lengths_list = [None] * len(predictions_list)
+    for prediction, lengths in zip(predictions_list, lengths_list):
+        results += __ctc_decoder_predictions_tensor(prediction, labels=labels, lengths=lengths)
     return results
 
 
 def __gather_transcripts(transcript_list: list, transcript_len_list: list, labels: list) -> list:
     results = []
-    labels_map = dict([(i, labels[i]) for i in range(len(labels))])
     # iterate over workers
     for t, ln in zip(transcript_list, transcript_len_list):
-        # iterate over batch
-        t_lc = t.long().cpu()
-        ln_lc = ln.long().cpu()
-        for ind in range(t.shape[0]):
-            tgt_len = ln_lc[ind].item()
-            target = t_lc[ind][:tgt_len].numpy().tolist()
-            reference = ''.join([labels_map[c] for c in target])
-            results.append(reference)
+        t = t.long()
+        valid = torch.arange(t.shape[1], device=t.device) < ln.to(t.device)[:, None]
+        results += ids_to_text(t[valid], valid.sum(dim=1), labels)
     return results
 
 
@@ -194,8 +202,12 @@ def process_evaluation_epoch(global_vars: dict, eval_metric='WER', tag=None):
         }
 
 
-def post_process_predictions(predictions, labels):
-    return __gather_predictions(predictions, labels=labels)
+def post_process_predictions(predictions, labels, lengths=None):
+    """
+    Decodes batches of greedy CTC predictions to text. If the lengths of the
+    encoded sequences are given, predictions on their padding are ignored.
+    """
+    return __gather_predictions(predictions, labels=labels, lengths_list=lengths)
 
 
 def post_process_transcripts(transcript_list, transcript_len_list, labels):
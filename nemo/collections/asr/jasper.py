@@ -133,6 +133,23 @@ class JasperEncoder(TrainableNM):
                 m_count += 1
         logging.warning(f"Turned off {m_count} masked convolutions")
 
+    def optimize_for_inference(self):
+        """Puts the encoder in eval mode and folds its batch normalizations into the convolutions before them, so
+        inference runs one convolution instead of a convolution and a normalization.
+        The outputs are unchanged, but the encoder can no longer be trained, and its checkpoints no longer match the
+        ones of an unoptimized encoder: restore the weights before calling this.
+        Folding is not done by prepare_for_deployment(). To export the folded convolutions, e.g. with
+        NeuralModuleFactory.deployment_export(), call this first on an encoder which is not trained further, such
+        as a copy.deepcopy() of the trained one.
+
+        Returns:
+            number of batch normalizations folded
+        """
+        self.eval()
+        fused = sum(block.fuse_batch_norm() for block in self.encoder)
+        logging.info(f"Folded {fused} batch normalizations into convolutions")
+        return fused
+
     def __init__(
         self,
         jasper,
@@ -203,6 +220,35 @@ class JasperEncoder(TrainableNM):
             return s_input[-1]
         return s_input[-1], length
 
+    def reset_stream(self):
+        """Forgets the stream processed by stream(), so the next call starts a new one."""
+        for block in self.encoder:
+            block.reset_stream()
+
+    @torch.no_grad()
+    def stream(self, audio_signal, last=False):
+        """Encodes the next chunk of a stream of features, e.g. for low latency inference on live audio.
+
+        The convolutions keep the frames they still need from previous chunks, so every call only costs the
+        encoding of the new frames. Outputs lag behind the inputs by the right context of the convolutions, the
+        concatenated outputs of all chunks of a stream are equal to the outputs of forward() on the whole stream.
+        The encoder must be in eval mode, and use batch normalization and no squeeze-and-excitation, as both of them
+        would need the whole utterance. The padding of an utterance is not masked, all streams of a batch should
+        have the same length.
+
+        Args:
+            audio_signal (torch.Tensor): next frames of the features of shape [batch, features, time], chunks can
+                have any number of frames
+            last (bool): whether audio_signal is the end of the stream, the state of the stream is reset afterwards
+
+        Returns:
+            encoded frames which only depend on the frames seen so far, of shape [batch, filters, time]
+        """
+        xs = [audio_signal]
+        for block in self.encoder:
+            xs = block.stream(xs, last)
+        return xs[-1]
+
 
 class JasperDecoderForCTC(TrainableNM):
     """
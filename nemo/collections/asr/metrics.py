@@ -1,30 +1,151 @@
 # Copyright (c) 2019 NVIDIA Corporation
 from typing import List, Optional
 
+import numpy as np
 import torch
 
 
-def __levenshtein(a: List, b: List) -> int:
-    """Calculates the Levenshtein distance between a and b.
-    The code was copied from: http://hetland.org/coding/python/levenshtein.py
+def edit_operations(hypotheses: List[np.ndarray], references: List[np.ndarray], batch_size: int = 256) -> np.ndarray:
+    """Counts the substitutions, insertions and deletions of a minimum edit distance alignment of every hypothesis to
+    its reference.
+
+    The dynamic program runs over the anti-diagonals of the edit distance matrices, whose cells only depend on the
+    two previous anti-diagonals, for batches of pairs at once. Pairs are batched by length to limit padding.
+
+    Args:
+        hypotheses: integer encoded token sequences
+        references: integer encoded token sequences, one for every hypothesis
+        batch_size: number of pairs aligned at once
+
+    Returns:
+        array of shape [number of pairs, 3] with the substitutions, insertions and deletions of every pair
     """
-    n, m = len(a), len(b)
-    if n > m:
-        # Make sure n <= m, to use O(min(n,m)) space
-        a, b = b, a
-        n, m = m, n
+    if len(hypotheses) != len(references):
+        raise ValueError(
+            f"Hypotheses and references must have the same number of elements, got {len(hypotheses)} and "
+            f"{len(references)}"
+        )
+    counts = np.zeros((len(hypotheses), 3), dtype=np.int64)
+    order = sorted(range(len(hypotheses)), key=lambda i: (len(references[i]), len(hypotheses[i])))
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        counts[batch] = _batch_edit_operations([hypotheses[i] for i in batch], [references[i] for i in batch])
+    return counts
+
 
-    current = list(range(n + 1))
-    for i in range(1, m + 1):
-        previous, current = current, [i] + [0] * n
-        for j in range(1, n + 1):
-            add, delete = previous[j] + 1, current[j - 1] + 1
-            change = previous[j - 1]
-            if a[j - 1] != b[i - 1]:
-                change = change + 1
-            current[j] = min(add, delete, change)
+def _batch_edit_operations(hypotheses: List[np.ndarray], references: List[np.ndarray]) -> np.ndarray:
+    """Aligns a batch of pairs, see edit_operations()."""
+    batch_size = len(hypotheses)
+    hyp_len = np.array([len(h) for h in hypotheses], dtype=np.int64)
+    ref_len = np.array([len(r) for r in references], dtype=np.int64)
+    max_hyp, max_ref = int(hyp_len.max()), int(ref_len.max())
+    # Reference token i - 1 at index i, and hypothesis token k at index k + max_ref + 1, so the hypothesis tokens of
+    # the cells of an anti-diagonal are a reversed slice. Padding never matches, its cells are never used.
+    ref = np.full((batch_size, max_ref + 1), -1, dtype=np.int64)
+    hyp = np.full((batch_size, max_hyp + 2 * max_ref + 2), -2, dtype=np.int64)
+    for b in range(batch_size):
+        ref[b, 1 : ref_len[b] + 1] = references[b]
+        hyp[b, max_ref + 1 : max_ref + 1 + hyp_len[b]] = hypotheses[b]
+
+    # Cell (i, j) of anti-diagonal d = i + j aligns the first i reference tokens with the first j hypothesis tokens.
+    # Anti-diagonals are indexed by i and hold the cost and the deletions of the best path to every cell, the
+    # insertions and substitutions follow from the lengths of the sequences.
+    cost_previous = np.zeros((batch_size, max_ref + 1), dtype=np.int32)
+    cost = np.zeros((batch_size, max_ref + 1), dtype=np.int32)
+    deletions_previous = np.zeros((batch_size, max_ref + 1), dtype=np.int32)
+    deletions = np.zeros((batch_size, max_ref + 1), dtype=np.int32)
+    total_cost = np.zeros(batch_size, dtype=np.int64)
+    total_deletions = np.zeros(batch_size, dtype=np.int64)
+    for d in range(1, max_hyp + max_ref + 1):
+        mismatch = ref[:, 1:] != hyp[:, d + max_ref - 1 : d - 1 : -1]
+        substitute = cost_previous[:, :-1] + mismatch
+        delete = cost[:, :-1] + 1
+        insert = cost[:, 1:] + 1
+        new_cost = np.empty_like(cost)
+        new_cost[:, 1:] = np.minimum(np.minimum(substitute, delete), insert)
+        use_substitute = substitute == new_cost[:, 1:]
+        use_delete = delete == new_cost[:, 1:]
+        new_deletions = np.empty_like(deletions)
+        new_deletions[:, 1:] = np.where(
+            use_substitute, deletions_previous[:, :-1], np.where(use_delete, deletions[:, :-1] + 1, deletions[:, 1:])
+        )
+        # First row and column: only insertions or only deletions
+        new_cost[:, 0] = d
+        new_deletions[:, 0] = 0
+        if d <= max_ref:
+            new_cost[:, d] = d
+            new_deletions[:, d] = d
 
-    return current[n]
+        finished = np.nonzero(hyp_len + ref_len == d)[0]
+        total_cost[finished] = new_cost[finished, ref_len[finished]]
+        total_deletions[finished] = new_deletions[finished, ref_len[finished]]
+        cost_previous, cost = cost, new_cost
+        deletions_previous, deletions = deletions, new_deletions
+
+    insertions = total_deletions + hyp_len - ref_len
+    return np.stack([total_cost - insertions - total_deletions, insertions, total_deletions], axis=1)
+
+
+class ErrorRateAccumulator(object):
+    """Accumulates the word or character error rate of hypotheses and references given batch by batch, e.g. by
+    evaluation callbacks which want to report partial results.
+
+    Args:
+        use_cer: bool, set True to compute the character error rate
+    """
+
+    def __init__(self, use_cer=False):
+        self.use_cer = use_cer
+        self._vocabulary = {}
+        self.reset()
+
+    def reset(self):
+        """Forgets the accumulated counts."""
+        self.substitutions = 0
+        self.insertions = 0
+        self.deletions = 0
+        self.reference_tokens = 0
+        self.utterances = 0
+
+    def _encode(self, text: str) -> np.ndarray:
+        tokens = list(text) if self.use_cer else text.split()
+        vocabulary = self._vocabulary
+        return np.array([vocabulary.setdefault(token, len(vocabulary)) for token in tokens], dtype=np.int64)
+
+    def update(self, hypotheses: List[str], references: List[str]) -> np.ndarray:
+        """Adds a batch of hypotheses and their references.
+
+        Args:
+          hypotheses: list of hypotheses
+          references: list of references
+        Returns:
+          array of shape [number of hypotheses, 3] with the substitutions, insertions and deletions of every hypothesis
+        """
+        if len(hypotheses) != len(references):
+            raise ValueError(
+                "In word error rate calculation, hypotheses and reference"
+                " lists must have the same number of elements. But I got:"
+                "{0} and {1} correspondingly".format(len(hypotheses), len(references))
+            )
+        references = [self._encode(r) for r in references]
+        counts = edit_operations([self._encode(h) for h in hypotheses], references)
+        self.substitutions += int(counts[:, 0].sum())
+        self.insertions += int(counts[:, 1].sum())
+        self.deletions += int(counts[:, 2].sum())
+        self.reference_tokens += sum(len(r) for r in references)
+        self.utterances += len(references)
+        return counts
+
+    @property
+    def errors(self) -> int:
+        return self.substitutions + self.insertions + self.deletions
+
+    @property
+    def error_rate(self) -> float:
+        """Errors per reference token, inf if the references had no tokens."""
+        if self.reference_tokens == 0:
+            return float('inf')
+        return 1.0 * self.errors / self.reference_tokens
 
 
 def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False) -> float:
@@ -39,28 +160,9 @@ def word_error_rate(hypotheses: List[str], references: List[str], use_cer=False)
     Returns:
       (float) average word error rate
     """
-    scores = 0
-    words = 0
-    if len(hypotheses) != len(references):
-        raise ValueError(
-            "In word error rate calculation, hypotheses and reference"
-            " lists must have the same number of elements. But I got:"
-            "{0} and {1} correspondingly".format(len(hypotheses), len(references))
-        )
-    for h, r in zip(hypotheses, references):
-        if use_cer:
-            h_list = list(h)
-            r_list = list(r)
-        else:
-            h_list = h.split()
-            r_list = r.split()
-        words += len(r_list)
-        scores += __levenshtein(h_list, r_list)
-    if words != 0:
-        wer = 1.0 * scores / words
-    else:
-        wer = float('inf')
-    return wer
+    accumulator = ErrorRateAccumulator(use_cer=use_cer)
+    accumulator.update(hypotheses, references)
+    return accumulator.error_rate
 
 
 def classification_accuracy(
@@ -1,4 +1,5 @@
 from .dataset import AudioDataset, AudioLabelDataset
 from .features import WaveformFeaturizer
+from .samplers import DurationBucketingBatchSampler
 
-__all__ = ['AudioDataset', 'AudioLabelDataset', 'WaveformFeaturizer']
+__all__ = ['AudioDataset', 'AudioLabelDataset', 'DurationBucketingBatchSampler', 'WaveformFeaturizer']
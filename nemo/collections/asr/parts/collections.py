@@ -1,9 +1,11 @@
 # Copyright (c) 2019 NVIDIA Corporation
 import collections
 import json
+import multiprocessing
 import os
 from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 import nemo
@@ -79,7 +81,9 @@ class FromFileText(Text):
 class AudioText(_Collection):
     """List of audio-transcript text correspondence with preprocessing."""
 
-    OUTPUT_TYPE = collections.namedtuple(typename='AudioTextEntity', field_names='audio_file duration text_tokens',)
+    OUTPUT_TYPE = collections.namedtuple(
+        typename='AudioTextEntity', field_names='audio_file duration text_tokens offset',
+    )
 
     def __init__(
         self,
@@ -91,6 +95,7 @@ class AudioText(_Collection):
         max_duration: Optional[float] = None,
         max_number: Optional[int] = None,
         do_sort_by_duration: bool = False,
+        offsets: Optional[List[Optional[float]]] = None,
     ):
         """Instantiates audio-text manifest with filters and preprocessing.
 
@@ -103,11 +108,15 @@ class AudioText(_Collection):
             max_duration: Maximum duration to keep entry with (default: None).
             max_number: Maximum number of samples to collect.
             do_sort_by_duration: True if sort samples list by duration.
+            offsets: List of offsets in seconds of the entries in their audio files, None for entries spanning the
+                whole file (default: None).
         """
 
         output_type = self.OUTPUT_TYPE
+        if offsets is None:
+            offsets = [None] * len(audio_files)
         data, duration_filtered, num_filtered, total_duration = [], 0.0, 0, 0.0
-        for audio_file, duration, text in zip(audio_files, durations, texts):
+        for audio_file, duration, text, offset in zip(audio_files, durations, texts, offsets):
             # Duration filters.
             if min_duration is not None and duration < min_duration:
                 duration_filtered += duration
@@ -126,7 +135,7 @@ class AudioText(_Collection):
                 continue
 
             total_duration += duration
-            data.append(output_type(audio_file, duration, text_tokens))
+            data.append(output_type(audio_file, duration, text_tokens, offset))
 
             # Max number of entities filter.
             if len(data) == max_number:
@@ -140,6 +149,11 @@ class AudioText(_Collection):
 
         super().__init__(data)
 
+    @property
+    def durations(self) -> List[float]:
+        """Durations of all entries."""
+        return [entity.duration for entity in self.data]
+
 
 class ASRAudioText(AudioText):
     """`AudioText` collector from asr structured json files."""
@@ -154,13 +168,283 @@ class ASRAudioText(AudioText):
             **kwargs: Kwargs to pass to `AudioText` constructor.
         """
 
-        audio_files, durations, texts = [], [], []
+        audio_files, durations, texts, offsets = [], [], [], []
         for item in manifest.item_iter(manifests_files):
             audio_files.append(item['audio_file'])
             durations.append(item['duration'])
             texts.append(item['text'])
+            offsets.append(item['offset'])
+
+        super().__init__(audio_files, durations, texts, *args, offsets=offsets, **kwargs)
+
+
+class ColumnarAudioText(object):
+    """Audio-transcript correspondence of `AudioText` stored in a few NumPy arrays instead of a list of Python objects.
+
+    Durations and offsets are arrays, the tokens of all transcripts are packed into a single buffer indexed by the
+    offset of every transcript, and every distinct audio file path is stored once. With millions of entries this
+    takes a fraction of the memory of `AudioText`, and data loader workers do not copy it page by page because of
+    reference counting. Collections can be saved to a directory of .npy files, which `load()` memory-maps, so all
+    processes reading the same manifest share its pages.
+
+    Entries are returned as the `OUTPUT_TYPE` of `AudioText`, so the collection can replace one in datasets.
+    """
+
+    OUTPUT_TYPE = AudioText.OUTPUT_TYPE
+    VERSION = 1
+    _COLUMNS = ('durations', 'offsets', 'path_ids', 'path_data', 'path_offsets', 'tokens', 'token_offsets')
+
+    def __init__(self, columns: Dict[str, np.ndarray], index: Optional[np.ndarray] = None):
+        """Wraps columns, use `from_manifests()` or `load()` to create a collection.
+
+        Args:
+            columns: Dict with the arrays of `_COLUMNS`.
+            index: Entries of the columns in the collection, in order, all of them if None.
+        """
+        self._columns = columns
+        self._index = index
+
+    @classmethod
+    def from_manifests(
+        cls,
+        manifests_files: Union[str, List[str]],
+        parser: parsers.CharParser,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        max_number: Optional[int] = None,
+        do_sort_by_duration: bool = False,
+        num_workers: int = 0,
+    ) -> 'ColumnarAudioText':
+        """Parses manifests in parallel processes, see `ASRAudioText` for the format and the args.
+
+        Args:
+            num_workers: Number of processes parsing the manifests, they are parsed in this process if 0.
+        """
+        if isinstance(manifests_files, str):
+            manifests_files = [manifests_files]
+        tasks = []
+        for manifest_file in manifests_files:
+            for start, end in manifest.byte_ranges(manifest_file, max(num_workers, 1) * 4):
+                tasks.append((manifest_file, start, end, parser, min_duration, max_duration))
+
+        if num_workers > 0:
+            with multiprocessing.Pool(num_workers) as pool:
+                chunks = pool.map(_parse_audio_text_range, tasks)
+        else:
+            chunks = [_parse_audio_text_range(task) for task in tasks]
+
+        num_filtered = sum(chunk['num_filtered'] for chunk in chunks)
+        duration_filtered = sum(chunk['duration_filtered'] for chunk in chunks)
+        paths = {}
+        path_ids = []
+        for chunk in chunks:
+            path_ids.extend(paths.setdefault(path, len(paths)) for path in chunk['audio_files'])
+        token_lengths = np.concatenate([np.zeros(1, dtype=np.int64)] + [chunk['token_lengths'] for chunk in chunks])
+        columns = dict(
+            durations=np.concatenate([chunk['durations'] for chunk in chunks]),
+            offsets=np.concatenate([chunk['offsets'] for chunk in chunks]),
+            path_ids=np.array(path_ids, dtype=np.int32),
+            tokens=_smallest_int_array(np.concatenate([chunk['tokens'] for chunk in chunks])),
+            token_offsets=np.cumsum(token_lengths),
+        )
+        columns['path_data'], columns['path_offsets'] = _pack_strings(list(paths))
+
+        # Like in AudioText, max_number keeps the first entries and 0 keeps all of them
+        index = None
+        if max_number and max_number < len(columns['durations']):
+            index = np.arange(max_number)
+        collection = cls(columns, index)
+        if do_sort_by_duration:
+            collection = collection.sorted_by_duration()
+
+        logging.info(
+            "Dataset loaded with %d files totalling %.2f hours", len(collection), collection.durations.sum() / 3600
+        )
+        logging.info("%d files were filtered totalling %.2f hours", num_filtered, duration_filtered / 3600)
+        return collection
+
+    def sorted_by_duration(self) -> 'ColumnarAudioText':
+        """Returns the collection sorted by duration, sharing the columns."""
+        order = np.argsort(self.durations, kind='stable')
+        return ColumnarAudioText(self._columns, self._entries()[order])
+
+    def save(self, directory: str, parser: Optional[parsers.CharParser] = None):
+        """Saves the entries of the collection to a directory which `load()` memory-maps.
+
+        Args:
+            directory: Directory to create.
+            parser: Parser the tokens were made with, checked by `load()`.
+        """
+        collection = self if self._index is None else self._compacted()
+        os.makedirs(directory, exist_ok=True)
+        for name in self._COLUMNS:
+            np.save(os.path.join(directory, f'{name}.npy'), collection._columns[name])
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'version': self.VERSION, 'parser': _parser_description(parser)}, f)
+
+    @classmethod
+    def load(
+        cls,
+        directory: str,
+        parser: Optional[parsers.CharParser] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        max_number: Optional[int] = None,
+        do_sort_by_duration: bool = False,
+    ) -> 'ColumnarAudioText':
+        """Memory-maps a collection saved by `save()`, filtered like in `AudioText`.
+
+        Args:
+            directory: Directory written by `save()`.
+            parser: If given, must be configured like the parser of the saved collection.
+            Other args: See `AudioText`.
+        """
+        meta_file = os.path.join(directory, 'meta.json')
+        if not os.path.isfile(meta_file):
+            raise ValueError(f"{directory} is not a directory saved by ColumnarAudioText.save()")
+        with open(meta_file) as f:
+            meta = json.load(f)
+        if meta['version'] != cls.VERSION:
+            raise ValueError(f"{directory} was saved in version {meta['version']}, expected {cls.VERSION}")
+        if parser is not None and meta['parser'] is not None and meta['parser'] != _parser_description(parser):
+            raise ValueError(f"The transcripts in {directory} were tokenized with another parser configuration")
+
+        columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in cls._COLUMNS}
+        durations = columns['durations']
+        keep = np.ones(len(durations), dtype=bool)
+        if min_duration is not None:
+            keep &= durations >= min_duration
+        if max_duration is not None:
+            keep &= durations <= max_duration
+        index = None if keep.all() else np.nonzero(keep)[0]
+        if max_number and max_number < keep.sum():
+            index = np.nonzero(keep)[0][:max_number]
+        collection = cls(columns, index)
+        if do_sort_by_duration:
+            collection = collection.sorted_by_duration()
+        logging.info("Dataset loaded with %d files from %s", len(collection), directory)
+        return collection
+
+    def _entries(self) -> np.ndarray:
+        if self._index is None:
+            return np.arange(len(self._columns['durations']))
+        return self._index
+
+    def _compacted(self) -> 'ColumnarAudioText':
+        """Returns a collection with the columns of the entries of this one only."""
+        entries = self._entries()
+        columns = self._columns
+        starts, ends = columns['token_offsets'][entries], columns['token_offsets'][entries + 1]
+        lengths = ends - starts
+        token_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        # Index of every token of the entries in the packed buffer
+        token_index = np.repeat(starts - token_offsets[:-1], lengths) + np.arange(token_offsets[-1])
+        return ColumnarAudioText(
+            dict(
+                durations=np.asarray(columns['durations'][entries]),
+                offsets=np.asarray(columns['offsets'][entries]),
+                path_ids=np.asarray(columns['path_ids'][entries]),
+                path_data=np.asarray(columns['path_data']),
+                path_offsets=np.asarray(columns['path_offsets']),
+                tokens=np.asarray(columns['tokens'][token_index]),
+                token_offsets=token_offsets,
+            )
+        )
 
-        super().__init__(audio_files, durations, texts, *args, **kwargs)
+    @property
+    def durations(self) -> np.ndarray:
+        """Durations of all entries."""
+        if self._index is None:
+            return np.asarray(self._columns['durations'])
+        return self._columns['durations'][self._index]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Offsets of all entries in their audio files, NaN if the manifest has none."""
+        if self._index is None:
+            return np.asarray(self._columns['offsets'])
+        return self._columns['offsets'][self._index]
+
+    def __len__(self):
+        return len(self._columns['durations']) if self._index is None else len(self._index)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"Index {i} is out of range for a collection of {len(self)} entries")
+        if self._index is not None:
+            i = self._index[i]
+        columns = self._columns
+        path_id = columns['path_ids'][i]
+        path_start, path_end = columns['path_offsets'][path_id], columns['path_offsets'][path_id + 1]
+        audio_file = columns['path_data'][path_start:path_end].tobytes().decode('utf-8')
+        tokens = columns['tokens'][columns['token_offsets'][i] : columns['token_offsets'][i + 1]].tolist()
+        offset = float(columns['offsets'][i])
+        offset = None if np.isnan(offset) else offset
+        return self.OUTPUT_TYPE(audio_file, float(columns['durations'][i]), tokens, offset)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _pack_strings(strings: List[str]):
+    """Returns the utf-8 bytes of all strings in one array, and the offsets of every string in it."""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.cumsum([0] + [len(e) for e in encoded], dtype=np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8).copy(), offsets
+
+
+def _smallest_int_array(values: np.ndarray) -> np.ndarray:
+    """Returns values as int16 if they fit, which halves the size of the tokens of character vocabularies."""
+    info = np.iinfo(np.int16)
+    if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+        return values.astype(np.int16)
+    return values
+
+
+def _parser_description(parser: Optional[parsers.CharParser]) -> Optional[str]:
+    if parser is None:
+        return None
+    return json.dumps({'type': type(parser).__name__, **vars(parser)}, sort_keys=True, default=str)
+
+
+def _parse_audio_text_range(task) -> Dict[str, Any]:
+    """Parses and tokenizes the entries of a byte range of a manifest, see `ColumnarAudioText.from_manifests()`."""
+    manifest_file, start, end, parser, min_duration, max_duration = task
+    audio_files, durations, offsets, tokens, token_lengths = [], [], [], [], []
+    num_filtered, duration_filtered = 0, 0.0
+    for item in manifest.range_item_iter(manifest_file, start, end):
+        duration = item['duration']
+        if (min_duration is not None and duration < min_duration) or (
+            max_duration is not None and duration > max_duration
+        ):
+            duration_filtered += duration
+            num_filtered += 1
+            continue
+
+        text_tokens = parser(item['text'])
+        if text_tokens is None:
+            duration_filtered += duration
+            num_filtered += 1
+            continue
+
+        audio_files.append(item['audio_file'])
+        durations.append(duration)
+        offsets.append(np.nan if item['offset'] is None else item['offset'])
+        tokens.extend(text_tokens)
+        token_lengths.append(len(text_tokens))
+
+    return dict(
+        audio_files=audio_files,
+        durations=np.array(durations, dtype=np.float64),
+        offsets=np.array(offsets, dtype=np.float64),
+        tokens=np.array(tokens, dtype=np.int32),
+        token_lengths=np.array(token_lengths, dtype=np.int64),
+        num_filtered=num_filtered,
+        duration_filtered=duration_filtered,
+    )
 
 
 class SpeechLabel(_Collection):
@@ -115,6 +115,10 @@ class AudioDataset(Dataset):
         bos_id: Id of beginning of sequence symbol to append if not None
         eos_id: Id of end of sequence symbol to append if not None
         load_audio: Boolean flag indicate whether do or not load audio
+        columnar_manifest: Store the manifest in NumPy arrays instead of
+            Python objects, see ColumnarAudioText. manifest_filepath can then
+            also be a directory saved by ColumnarAudioText.save()
+        manifest_workers: Number of processes parsing a columnar manifest
     """
 
     def __init__(
@@ -133,16 +137,37 @@ class AudioDataset(Dataset):
         eos_id=None,
         load_audio=True,
         parser='en',
+        columnar_manifest=False,
+        manifest_workers=0,
     ):
-        self.collection = collections.ASRAudioText(
-            manifests_files=manifest_filepath.split(','),
-            parser=parsers.make_parser(
-                labels=labels, name=parser, unk_id=unk_index, blank_id=blank_index, do_normalize=normalize,
-            ),
-            min_duration=min_duration,
-            max_duration=max_duration,
-            max_number=max_utts,
+        parser = parsers.make_parser(
+            labels=labels, name=parser, unk_id=unk_index, blank_id=blank_index, do_normalize=normalize,
         )
+        if columnar_manifest and os.path.isdir(manifest_filepath):
+            self.collection = collections.ColumnarAudioText.load(
+                manifest_filepath,
+                parser=parser,
+                min_duration=min_duration,
+                max_duration=max_duration,
+                max_number=max_utts,
+            )
+        elif columnar_manifest:
+            self.collection = collections.ColumnarAudioText.from_manifests(
+                manifest_filepath.split(','),
+                parser=parser,
+                min_duration=min_duration,
+                max_duration=max_duration,
+                max_number=max_utts,
+                num_workers=manifest_workers,
+            )
+        else:
+            self.collection = collections.ASRAudioText(
+                manifests_files=manifest_filepath.split(','),
+                parser=parser,
+                min_duration=min_duration,
+                max_duration=max_duration,
+                max_number=max_utts,
+            )
 
         self.featurizer = featurizer
         self.trim = trim
@@ -153,7 +178,14 @@ class AudioDataset(Dataset):
     def __getitem__(self, index):
         sample = self.collection[index]
         if self.load_audio:
-            features = self.featurizer.process(sample.audio_file, offset=0, duration=sample.duration, trim=self.trim,)
+            # Entries with an offset are segments of longer recordings, kept open to read their other segments
+            features = self.featurizer.process(
+                sample.audio_file,
+                offset=sample.offset or 0,
+                duration=sample.duration,
+                trim=self.trim,
+                keep_open=sample.offset is not None,
+            )
             f, fl = features, torch.tensor(features.shape[0]).long()
         else:
             f, fl = None, None
@@ -0,0 +1,257 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of precomputed features of the audio files of ASR manifests.
+
+A cache directory holds one sub-directory per pair of manifests and featurizer configuration, named after a hash of
+the contents of the manifests and the configuration, so changing either of them never reads stale features. Every
+sub-directory contains shard files with the raw features of many utterances, which are memory-mapped when reading,
+and an index.json describing where the features of each audio file are.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from os.path import expanduser
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from nemo import logging
+from nemo.collections.asr.parts import collections, parsers
+
+__all__ = ['FeatureCache', 'FeatureCacheDataset', 'FeatureCacheWriter', 'feature_cache_dir', 'segment_key']
+
+_INDEX_FILE = "index.json"
+
+
+def feature_cache_dir(cache_dir, manifest_filepath, featurizer_config):
+    """Returns the directory of the features of the audio files in the manifests computed with featurizer_config.
+
+    Args:
+        cache_dir (str): root directory of the feature cache
+        manifest_filepath (str): path to the manifest, can be comma-separated paths
+        featurizer_config (dict): everything that affects the features, e.g. the init params of the preprocessor
+
+    Returns:
+        path of the directory, which exists only if the features were computed
+    """
+    manifests = []
+    for manifest_file in manifest_filepath.split(','):
+        with open(expanduser(manifest_file), 'rb') as f:
+            manifests.append(hashlib.sha1(f.read()).hexdigest())
+    config = json.dumps({"manifests": manifests, "featurizer": featurizer_config}, sort_keys=True, default=str)
+    return os.path.join(cache_dir, hashlib.sha1(config.encode()).hexdigest())
+
+
+def segment_key(audio_file, offset=None, duration=None):
+    """Returns the key of the features of a manifest entry in the cache.
+
+    Entries without an offset span their whole audio file and are keyed by its path, segments of longer recordings
+    by the path, offset and duration.
+    """
+    if offset is None:
+        return audio_file
+    return f"{audio_file}@{offset}+{duration}"
+
+
+class FeatureCacheWriter(object):
+    """Writes the features of audio files to a new cache directory.
+
+    The features are written to a temporary directory which close() moves into place, so readers never see an
+    incomplete cache.
+
+    Args:
+        directory (str): directory of the cache, see feature_cache_dir()
+        featurizer_config (dict): configuration the features were computed with, stored for reference
+        dtype (str): numpy dtype the features are stored with, float16 halves the size of the cache
+        shard_size (int): approximate size of a shard file in bytes
+    """
+
+    def __init__(self, directory, featurizer_config=None, dtype="float32", shard_size=2 ** 30):
+        self._dir = directory
+        self._tmp_dir = f"{directory}.tmp-{os.getpid()}"
+        if os.path.exists(self._tmp_dir):
+            shutil.rmtree(self._tmp_dir)
+        os.makedirs(self._tmp_dir)
+        self._dtype = np.dtype(dtype)
+        self._shard_size = shard_size
+        self._shard = None
+        self._index = {"featurizer": featurizer_config, "dtype": self._dtype.name, "shards": [], "files": {}}
+
+    def append(self, audio_file, features):
+        """Writes the features of one audio file.
+
+        Args:
+            audio_file (str): path of the audio file as given in the manifest, see segment_key() for segments
+            features (torch.Tensor): features of shape [features, time] without padding
+        """
+        data = features.detach().cpu().numpy().astype(self._dtype)
+        if self._shard is None or self._shard.tell() + data.nbytes > self._shard_size:
+            self._next_shard()
+        self._index["files"][audio_file] = {
+            "shard": len(self._index["shards"]) - 1,
+            "offset": self._shard.tell(),
+            "shape": list(data.shape),
+        }
+        self._shard.write(np.ascontiguousarray(data).tobytes())
+
+    def _next_shard(self):
+        if self._shard is not None:
+            self._shard.close()
+        name = f"shard-{len(self._index['shards']):05d}.bin"
+        self._index["shards"].append(name)
+        self._shard = open(os.path.join(self._tmp_dir, name), "wb")
+
+    def close(self):
+        """Finishes the cache and makes it visible to readers."""
+        if self._shard is not None:
+            self._shard.close()
+        with open(os.path.join(self._tmp_dir, _INDEX_FILE), "w") as f:
+            json.dump(self._index, f)
+        if os.path.exists(self._dir):
+            shutil.rmtree(self._dir)
+        os.rename(self._tmp_dir, self._dir)
+        logging.info(f"Wrote features of {len(self._index['files'])} files to {self._dir}")
+
+    def abort(self):
+        """Discards the cache."""
+        if self._shard is not None:
+            self._shard.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class FeatureCache(object):
+    """Reads features from a cache directory written by FeatureCacheWriter.
+
+    Shards are memory-mapped on first use in every process, so data loader workers share the page cache and only the
+    features actually used are read from disk.
+
+    Args:
+        directory (str): directory of the cache, see feature_cache_dir()
+    """
+
+    def __init__(self, directory):
+        index_file = os.path.join(directory, _INDEX_FILE)
+        if not os.path.isfile(index_file):
+            raise ValueError(
+                f"Feature cache {directory} does not exist, compute the features with "
+                f"scripts/precompute_asr_features.py for the same manifest and featurizer configuration first."
+            )
+        with open(index_file) as f:
+            index = json.load(f)
+        self._dir = directory
+        self._dtype = np.dtype(index["dtype"])
+        self._shard_names = index["shards"]
+        self._files = index["files"]
+        self._shards = {}
+
+    def __contains__(self, audio_file):
+        return audio_file in self._files
+
+    def __len__(self):
+        return len(self._files)
+
+    def __getitem__(self, audio_file):
+        """Returns the features of audio_file as a float tensor of shape [features, time]."""
+        entry = self._files[audio_file]
+        shard = self._shards.get(entry["shard"])
+        if shard is None:
+            path = os.path.join(self._dir, self._shard_names[entry["shard"]])
+            shard = self._shards[entry["shard"]] = np.memmap(path, dtype=np.uint8, mode="r")
+        shape = entry["shape"]
+        nbytes = int(np.prod(shape)) * self._dtype.itemsize
+        data = shard[entry["offset"] : entry["offset"] + nbytes].view(self._dtype).reshape(shape)
+        return torch.from_numpy(data.astype(np.float32))
+
+    def __getstate__(self):
+        # Memory maps are opened again in data loader workers instead of being pickled
+        state = self.__dict__.copy()
+        state["_shards"] = {}
+        return state
+
+
+class FeatureCacheDataset(Dataset):
+    """Dataset of precomputed features and transcripts of the files in a manifest.
+
+    The manifest is read and filtered like in AudioDataset, but instead of loading audio, the features of every file
+    are read from a FeatureCache.
+
+    Args:
+        cache (FeatureCache): features of the files in the manifest
+        manifest_filepath: Path to manifest json, can be comma-separated paths
+        labels: String containing all the possible characters to map to
+        max_duration: If audio exceeds this length, do not include in dataset
+        min_duration: If audio is less than this length, do not include in dataset
+        max_utts: Limit number of utterances
+        blank_index: blank character index, default = -1
+        unk_index: unk_character index, default = -1
+        normalize: whether to normalize transcript text (default): True
+        bos_id: Id of beginning of sequence symbol to append if not None
+        eos_id: Id of end of sequence symbol to append if not None
+    """
+
+    def __init__(
+        self,
+        cache,
+        manifest_filepath,
+        labels,
+        max_duration=None,
+        min_duration=None,
+        max_utts=0,
+        blank_index=-1,
+        unk_index=-1,
+        normalize=True,
+        bos_id=None,
+        eos_id=None,
+        parser='en',
+    ):
+        self.collection = collections.ASRAudioText(
+            manifests_files=manifest_filepath.split(','),
+            parser=parsers.make_parser(
+                labels=labels, name=parser, unk_id=unk_index, blank_id=blank_index, do_normalize=normalize,
+            ),
+            min_duration=min_duration,
+            max_duration=max_duration,
+            max_number=max_utts,
+        )
+        missing = [
+            segment_key(sample.audio_file, sample.offset, sample.duration)
+            for sample in self.collection
+            if segment_key(sample.audio_file, sample.offset, sample.duration) not in cache
+        ]
+        if missing:
+            raise ValueError(f"Features of {len(missing)} files are not in the feature cache, e.g. {missing[0]}")
+        self.cache = cache
+        self.bos_id = bos_id
+        self.eos_id = eos_id
+
+    def __getitem__(self, index):
+        sample = self.collection[index]
+        f = self.cache[segment_key(sample.audio_file, sample.offset, sample.duration)]
+        fl = torch.tensor(f.shape[1]).long()
+
+        t, tl = sample.text_tokens, len(sample.text_tokens)
+        if self.bos_id is not None:
+            t = [self.bos_id] + t
+            tl += 1
+        if self.eos_id is not None:
+            t = t + [self.eos_id]
+            tl += 1
+
+        return f, fl, torch.tensor(t).long(), torch.tensor(tl).long()
+
+    def __len__(self):
+        return len(self.collection)
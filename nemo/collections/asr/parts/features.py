@@ -15,24 +15,32 @@ CONSTANT = 1e-5
 
 
 def normalize_batch(x, seq_len, normalize_type):
-    if normalize_type == "per_feature":
-        x_mean = torch.zeros((seq_len.shape[0], x.shape[1]), dtype=x.dtype, device=x.device)
-        x_std = torch.zeros((seq_len.shape[0], x.shape[1]), dtype=x.dtype, device=x.device)
-        for i in range(x.shape[0]):
-            x_mean[i, :] = x[i, :, : seq_len[i]].mean(dim=1)
-            x_std[i, :] = x[i, :, : seq_len[i]].std(dim=1)
-        # make sure x_std is not zero
-        x_std += CONSTANT
-        return (x - x_mean.unsqueeze(2)) / x_std.unsqueeze(2)
-    elif normalize_type == "all_features":
-        x_mean = torch.zeros(seq_len.shape, dtype=x.dtype, device=x.device)
-        x_std = torch.zeros(seq_len.shape, dtype=x.dtype, device=x.device)
-        for i in range(x.shape[0]):
-            x_mean[i] = x[i, :, : seq_len[i].item()].mean()
-            x_std[i] = x[i, :, : seq_len[i].item()].std()
+    """Normalizes a batch of features to zero mean and unit std, ignoring the frames beyond seq_len.
+
+    Args:
+        x: features of shape [batch, features, time]
+        seq_len: number of valid frames of every item of the batch
+        normalize_type: "per_feature" normalizes every feature of every item, "all_features" every item as a whole,
+            a dict with "fixed_mean" and "fixed_std" uses the given statistics. Anything else disables normalization.
+    """
+    if normalize_type == "per_feature" or normalize_type == "all_features":
+        # All items are normalized at once, the masked sums over time are computed as batched matrix products
+        valid = torch.arange(x.shape[2], device=x.device).unsqueeze(0) < seq_len.to(x.device).unsqueeze(1)
+        weights = valid.to(x.dtype).unsqueeze(2)
+        num_values = weights.sum(dim=1, keepdim=True)
+        x_sum = torch.bmm(x, weights)
+        if normalize_type == "all_features":
+            x_sum = x_sum.sum(dim=1, keepdim=True)
+            num_values = num_values * x.shape[1]
+        x_mean = x_sum / num_values
+        centered = x - x_mean
+        # Unbiased std of the centered values, as computed by torch.std()
+        squares_sum = torch.bmm(centered * centered, weights)
+        if normalize_type == "all_features":
+            squares_sum = squares_sum.sum(dim=1, keepdim=True)
         # make sure x_std is not zero
-        x_std += CONSTANT
-        return (x - x_mean.view(-1, 1, 1)) / x_std.view(-1, 1, 1)
+        x_std = (squares_sum / (num_values - 1)).sqrt() + CONSTANT
+        return centered.div_(x_std)
     elif "fixed_mean" in normalize_type and "fixed_std" in normalize_type:
         x_mean = torch.tensor(normalize_type["fixed_mean"], device=x.device)
         x_std = torch.tensor(normalize_type["fixed_std"], device=x.device)
@@ -55,15 +63,16 @@ def splice_frames(x, frame_splicing):
 
 
 class WaveformFeaturizer(object):
-    def __init__(self, sample_rate=16000, int_values=False, augmentor=None):
+    def __init__(self, sample_rate=16000, int_values=False, augmentor=None, cache=None):
         self.augmentor = augmentor if augmentor is not None else AudioAugmentor()
         self.sample_rate = sample_rate
         self.int_values = int_values
+        self.cache = cache
 
     def max_augmentation_length(self, length):
         return self.augmentor.max_augmentation_length(length)
 
-    def process(self, file_path, offset=0, duration=0, trim=False):
+    def process(self, file_path, offset=0, duration=0, trim=False, keep_open=False):
         audio = AudioSegment.from_file(
             file_path,
             target_sr=self.sample_rate,
@@ -71,6 +80,8 @@ class WaveformFeaturizer(object):
             offset=offset,
             duration=duration,
             trim=trim,
+            keep_open=keep_open,
+            cache=self.cache,
         )
         return self.process_segment(audio)
 
@@ -229,6 +240,7 @@ class FilterbankFeatures(nn.Module):
                     f"number, 'tiny', or 'eps'"
                 )
         self.log_zero_guard_type = log_zero_guard_type
+        self._stream_state = None
 
     def get_seq_len(self, seq_len):
         return torch.ceil(seq_len / self.hop_length).to(dtype=torch.long)
@@ -237,18 +249,8 @@ class FilterbankFeatures(nn.Module):
     def filter_banks(self):
         return self.fb
 
-    @torch.no_grad()
-    def forward(self, x, seq_len):
-        seq_len = self.get_seq_len(seq_len.float())
-
-        # dither
-        if self.dither > 0:
-            x += self.dither * torch.randn_like(x)
-
-        # do preemphasis
-        if self.preemph is not None:
-            x = torch.cat((x[:, 0].unsqueeze(1), x[:, 1:] - self.preemph * x[:, :-1]), dim=1,)
-
+    def _filterbank_features(self, x):
+        """Features of every frame of the pre-emphasized signal x, before normalization."""
         x = self.stft(x)
 
         # get power spectrum
@@ -273,6 +275,22 @@ class FilterbankFeatures(nn.Module):
         if self.frame_splicing > 1:
             x = splice_frames(x, self.frame_splicing)
 
+        return x
+
+    @torch.no_grad()
+    def forward(self, x, seq_len):
+        seq_len = self.get_seq_len(seq_len.float())
+
+        # dither
+        if self.dither > 0:
+            x += self.dither * torch.randn_like(x)
+
+        # do preemphasis
+        if self.preemph is not None:
+            x = torch.cat((x[:, 0].unsqueeze(1), x[:, 1:] - self.preemph * x[:, :-1]), dim=1,)
+
+        x = self._filterbank_features(x)
+
         # normalize if required
         if self.normalize:
             x = normalize_batch(x, seq_len, normalize_type=self.normalize)
@@ -294,3 +312,73 @@ class FilterbankFeatures(nn.Module):
             if pad_amt != 0:
                 x = nn.functional.pad(x, (0, pad_to - pad_amt), value=self.pad_value)
         return x
+
+    def reset_stream(self):
+        """Forgets the stream processed by stream(), so the next call starts a new one."""
+        self._stream_state = None
+
+    @torch.no_grad()
+    def stream(self, x, last=False):
+        """Computes the features of the next chunk of a stream of audio.
+
+        The features of a frame are returned as soon as all samples of its window were seen. Only the samples needed
+        by the windows of the next frames are kept, so every call only costs the features of the new frames. The
+        concatenated features of all chunks of a stream are equal to the valid frames returned by forward() on the
+        whole stream without dither, which is not applied. Normalization with statistics of the utterance cannot be
+        computed incrementally, so only fixed or no normalization is supported.
+
+        Args:
+            x (torch.Tensor): next samples of the stream of shape [batch, time], chunks can have any number of samples
+            last (bool): whether x is the end of the stream, the state of the stream is reset afterwards
+
+        Returns:
+            features of the new frames of shape [batch, features, time]
+        """
+        if self.normalize and not isinstance(self.normalize, dict):
+            raise ValueError(f"Normalization {self.normalize} uses the whole utterance and cannot be streamed")
+        state = self._stream_state
+        if state is None:
+            # samples is the pre-emphasized signal from sample offset on
+            state = self._stream_state = {
+                "samples": x[:, :0],
+                "offset": 0,
+                "previous": x.new_zeros(x.shape[0], 1),
+                "frames": 0,
+            }
+
+        if self.preemph is not None and x.shape[1] > 0:
+            # The first sample of the stream is kept as is, like in forward()
+            previous = torch.cat((state["previous"], x[:, :-1]), dim=1)
+            state["previous"] = x[:, -1:]
+            x = x - self.preemph * previous
+        samples = torch.cat((state["samples"], x), dim=1)
+        num_samples = state["offset"] + samples.shape[1]
+
+        # Windows are centered on the frames, frames before context_frames see the reflection of the start of the
+        # stream like in forward(), and the ones after the last complete frame wait for more samples
+        half_window = self.n_fft // 2
+        context_frames = -(-half_window // self.hop_length)
+        if last:
+            end_frame = -(-num_samples // self.hop_length)
+        else:
+            end_frame = max((num_samples - half_window - 1) // self.hop_length + 1, 0)
+        start_frame = state["frames"]
+        features = None
+        if end_frame > start_frame:
+            features = self._filterbank_features(samples)
+            first_frame = state["offset"] // self.hop_length
+            features = features[:, :, start_frame - first_frame : end_frame - first_frame]
+            if self.normalize:
+                features = normalize_batch(features, None, normalize_type=self.normalize)
+            state["frames"] = end_frame
+
+        if last:
+            self.reset_stream()
+        else:
+            # The segment kept starts on a frame, so its frames are the frames of the stream
+            offset = max(end_frame - context_frames, 0) * self.hop_length
+            state["samples"] = samples[:, offset - state["offset"] :]
+            state["offset"] = offset
+        if features is None:
+            return x.new_zeros(x.shape[0], self.nfilt * self.frame_splicing, 0)
+        return features
@@ -16,6 +16,7 @@ from typing import List, Optional, Tuple
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 from torch import Tensor
 
 jasper_activations = {
@@ -65,6 +66,42 @@ def get_same_padding(kernel_size, stride, dilation):
     return kernel_size // 2
 
 
+def get_mask(lens, max_len: int, device: torch.device):
+    """Returns the mask of shape [batch, 1, max_len] which is True on the frames beyond lens."""
+    lens = lens.to(device=device, dtype=torch.long)
+    return (torch.arange(max_len, device=device).unsqueeze(0) >= lens.unsqueeze(1)).unsqueeze(1)
+
+
+def fuse_conv_bn(conv, bn):
+    """Folds the running statistics and the affine transformation of a batch normalization into the weights and the
+    bias of the convolution it follows, so the convolution alone computes the eval mode output of both.
+
+    Args:
+        conv (MaskedConv1d or nn.Conv1d): convolution, modified in place
+        bn (nn.BatchNorm1d): batch normalization of the outputs of conv
+
+    Returns:
+        whether bn was folded, convolutions with heads share weights between channels and cannot be fused
+    """
+    if isinstance(conv, MaskedConv1d):
+        if conv.heads != -1:
+            return False
+        conv = conv.conv
+    if not bn.track_running_stats or bn.running_mean is None:
+        return False
+
+    with torch.no_grad():
+        scale = torch.rsqrt(bn.running_var + bn.eps)
+        shift = -bn.running_mean * scale
+        if bn.affine:
+            scale = scale * bn.weight
+            shift = shift * bn.weight + bn.bias
+        bias = shift if conv.bias is None else conv.bias * scale + shift
+        conv.weight = nn.Parameter(conv.weight * scale.view(-1, 1, 1))
+        conv.bias = nn.Parameter(bias)
+    return True
+
+
 class MaskedConv1d(nn.Module):
     __constants__ = ["use_conv_mask", "real_out_channels", "heads"]
 
@@ -110,14 +147,13 @@ class MaskedConv1d(nn.Module):
             lens + 2 * self.conv.padding[0] - self.conv.dilation[0] * (self.conv.kernel_size[0] - 1) - 1
         ) / self.conv.stride[0] + 1
 
-    def forward(self, x, lens):
+    def forward(self, x, lens, mask: Optional[Tensor] = None):
+        # mask of the padding of x can be given if it is shared with other convolutions, see get_mask()
         if self.use_mask:
-            lens = lens.to(dtype=torch.long)
-            max_len = x.size(2)
-            mask = torch.arange(max_len).to(lens.device).expand(len(lens), max_len) >= lens.unsqueeze(1)
-            x = x.masked_fill(mask.unsqueeze(1).to(device=x.device), 0)
-            # del mask
-            lens = self.get_seq_len(lens)
+            if mask is None:
+                mask = get_mask(lens, x.size(2), x.device)
+            x = x.masked_fill(mask, 0)
+            lens = self.get_seq_len(lens.to(dtype=torch.long))
 
         sh = x.shape
         if self.heads != -1:
@@ -131,6 +167,49 @@ class MaskedConv1d(nn.Module):
         return out, lens
 
 
+def stream_conv(conv, x, cache, last=False):
+    """Applies a convolution with 'same' padding to the next chunk of a stream.
+
+    The padding of the left side is prepended to the first chunk and the one of the right side appended to the last
+    chunk, in between, the frames which are still needed by the next outputs are kept in the cache. The concatenated
+    outputs of all chunks are equal to the output of the convolution applied to the whole stream at once.
+
+    Args:
+        conv (MaskedConv1d or nn.Conv1d): convolution, its mask is not applied
+        x (torch.Tensor): next frames of the stream of shape [batch, channels, time]
+        cache (torch.Tensor): cache returned by the previous call, None at the start of the stream
+        last (bool): whether x is the end of the stream
+
+    Returns:
+        the outputs which only depend on the frames seen so far, and the cache for the next call
+    """
+    heads = -1
+    out_channels = conv.out_channels if isinstance(conv, nn.Conv1d) else conv.real_out_channels
+    if isinstance(conv, MaskedConv1d):
+        heads = conv.heads
+        conv = conv.conv
+    padding, stride = conv.padding[0], conv.stride[0]
+    span = conv.dilation[0] * (conv.kernel_size[0] - 1) + 1
+
+    if cache is None:
+        cache = x.new_zeros(x.shape[0], x.shape[1], padding)
+    x = torch.cat([cache, x], dim=2)
+    if last:
+        x = F.pad(x, (0, padding))
+    num_outputs = (x.shape[2] - span) // stride + 1 if x.shape[2] >= span else 0
+    if num_outputs == 0:
+        return x.new_zeros(x.shape[0], out_channels, 0), x
+
+    inputs = x[:, :, : (num_outputs - 1) * stride + span]
+    sh = inputs.shape
+    if heads != -1:
+        inputs = inputs.reshape(-1, heads, sh[-1])
+    out = F.conv1d(inputs, conv.weight, conv.bias, conv.stride, 0, conv.dilation, conv.groups)
+    if heads != -1:
+        out = out.view(sh[0], out_channels, -1)
+    return out, x[:, :, num_outputs * stride :]
+
+
 class GroupShuffle(nn.Module):
     def __init__(self, groups, channels):
         super(GroupShuffle, self).__init__()
@@ -285,6 +364,7 @@ class JasperBlock(nn.Module):
             self.res = None
 
         self.mout = nn.Sequential(*self._get_act_dropout_layer(drop_prob=dropout, activation=activation))
+        self._stream_state = None
 
     def _get_conv(
         self,
@@ -415,22 +495,28 @@ class JasperBlock(nn.Module):
         out = xs[-1]
 
         lens = lens_orig
+        # The mask only changes where a strided convolution shortens the sequences, so the convolutions share it
+        mask: Optional[Tensor] = None
         for i, l in enumerate(self.mconv):
             # if we're doing masked convolutions, we need to pass in and
             # possibly update the sequence lengths
-            # if (i % 4) == 0 and self.conv_mask:
             if isinstance(l, MaskedConv1d):
-                out, lens = l(out, lens)
+                if l.use_mask and (mask is None or mask.size(2) != out.size(2)):
+                    mask = get_mask(lens, out.size(2), out.device)
+                out, lens = l(out, lens, mask)
             else:
                 out = l(out)
 
         # compute the residuals
         if self.res is not None:
+            res_mask: Optional[Tensor] = None
             for i, layer in enumerate(self.res):
                 res_out = xs[i]
                 for j, res_layer in enumerate(layer):
                     if isinstance(res_layer, MaskedConv1d):
-                        res_out, _ = res_layer(res_out, lens_orig)
+                        if res_layer.use_mask and (res_mask is None or res_mask.size(2) != res_out.size(2)):
+                            res_mask = get_mask(lens_orig, res_out.size(2), res_out.device)
+                        res_out, _ = res_layer(res_out, lens_orig, res_mask)
                     else:
                         res_out = res_layer(res_out)
 
@@ -445,3 +531,91 @@ class JasperBlock(nn.Module):
             return xs + [out], lens
 
         return [out], lens
+
+    def fuse_batch_norm(self):
+        """Folds every batch normalization into the convolution it follows, see fuse_conv_bn(). The outputs in eval
+        mode are unchanged, but the block can no longer be trained.
+
+        Returns:
+            number of batch normalizations folded
+        """
+
+        def fuse(layers):
+            kept = []
+            for layer in layers:
+                if (
+                    isinstance(layer, nn.BatchNorm1d)
+                    and kept
+                    and isinstance(kept[-1], (MaskedConv1d, nn.Conv1d))
+                    and fuse_conv_bn(kept[-1], layer)
+                ):
+                    continue
+                kept.append(layer)
+            return nn.ModuleList(kept)
+
+        num_layers = sum(1 for _ in self.modules())
+        self.mconv = fuse(self.mconv)
+        if self.res is not None:
+            self.res = nn.ModuleList([fuse(layer) for layer in self.res])
+        self.reset_stream()
+        return num_layers - sum(1 for _ in self.modules())
+
+    def reset_stream(self):
+        """Forgets the stream processed by stream()."""
+        self._stream_state = None
+
+    def stream(self, xs: List[Tensor], last: bool = False) -> List[Tensor]:
+        """Processes the next chunk of a stream, see JasperEncoder.stream().
+
+        The convolutions keep the frames they still need in caches, and the outputs of the residual branches wait in
+        queues until the main branch, which lags behind them by the right padding of its convolutions, has produced
+        the matching frames.
+
+        Args:
+            xs (list): next chunks of the streams of the inputs of the block, as returned by the previous block
+            last (bool): whether the chunks are the end of the streams
+
+        Returns:
+            list of the chunks of the streams of the outputs, like forward()
+        """
+        if self.training:
+            raise ValueError("Streaming requires the block to be in eval mode")
+        if self._stream_state is None:
+            for m in self.modules():
+                if isinstance(m, (SqueezeExcite, nn.GroupNorm)):
+                    raise ValueError(f"{type(m).__name__} uses the whole utterance and cannot be streamed")
+            self._stream_state = {"conv": {}, "res": {}}
+        conv_cache, res_queue = self._stream_state["conv"], self._stream_state["res"]
+
+        out = xs[-1]
+        for i, l in enumerate(self.mconv):
+            if isinstance(l, (MaskedConv1d, nn.Conv1d)):
+                out, conv_cache[i] = stream_conv(l, out, conv_cache.get(i), last)
+            elif out.shape[2] > 0:
+                out = l(out)
+
+        if self.res is not None:
+            for i, layer in enumerate(self.res):
+                res_out = xs[i]
+                for j, res_layer in enumerate(layer):
+                    if isinstance(res_layer, (MaskedConv1d, nn.Conv1d)):
+                        res_out, _ = stream_conv(res_layer, res_out, None, last)
+                    else:
+                        res_out = res_layer(res_out)
+                if i in res_queue:
+                    res_out = torch.cat([res_queue[i], res_out], dim=2)
+                res_queue[i] = res_out[:, :, out.shape[2] :]
+                res_out = res_out[:, :, : out.shape[2]]
+
+                if self.residual_mode == 'add':
+                    out = out + res_out
+                else:
+                    out = torch.max(out, res_out)
+
+        out = self.mout(out)
+        if last:
+            self.reset_stream()
+        if self.res is not None and self.dense_residual:
+            return xs + [out]
+
+        return [out]
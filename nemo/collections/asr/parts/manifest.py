@@ -1,7 +1,8 @@
 # Copyright (c) 2019 NVIDIA Corporation
 import json
+import os
 from os.path import expanduser
-from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 
 class ManifestBase:
@@ -59,6 +60,64 @@ def item_iter(
                 yield item
 
 
+def byte_ranges(manifest_file: str, num_ranges: int) -> List[Tuple[int, int]]:
+    """Splits a manifest into contiguous byte ranges of about the same size
+    which start at the beginning of a line, so they can be parsed in parallel.
+
+    Args:
+        manifest_file: Path to the manifest.
+        num_ranges: Number of ranges to split into, fewer ranges are returned
+            for small manifests.
+
+    Returns:
+        List of (start, end) byte offsets covering the whole manifest.
+    """
+    size = os.path.getsize(expanduser(manifest_file))
+    bounds = [0]
+    with open(expanduser(manifest_file), 'rb') as f:
+        for i in range(1, num_ranges):
+            position = max(size * i // num_ranges, bounds[-1])
+            f.seek(position)
+            if position > 0:
+                # Move to the start of the next line
+                f.seek(position - 1)
+                f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def range_item_iter(
+    manifest_file: str, start: int, end: int, parse_func: Callable[[str, Optional[str]], Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Iterate through the json lines of a manifest which start in the byte
+    range [start, end), see byte_ranges().
+
+    Args:
+        manifest_file: Path to the manifest.
+        start: Byte offset of the first line.
+        end: Byte offset after the last line.
+        parse_func: See item_iter().
+
+    Yields:
+        Parsed key to value item dicts.
+    """
+
+    if parse_func is None:
+        parse_func = __parse_item
+
+    with open(expanduser(manifest_file), 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield parse_func(line.decode('utf-8'), manifest_file)
+
+
 def __parse_item(line: str, manifest_file: str) -> Dict[str, Any]:
     item = json.loads(line)
 
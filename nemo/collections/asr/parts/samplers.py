@@ -0,0 +1,153 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+import torch
+from torch.utils.data import Sampler
+
+
+class DurationBucketingBatchSampler(Sampler):
+    """Batch sampler which puts utterances of similar duration into the same batch, so batches need little padding.
+
+    The utterances are sorted by duration and split into num_buckets buckets of equal size. Every epoch, the
+    utterances are shuffled within their bucket and cut into batches, and the batches of all buckets are shuffled.
+    A batch holds at most batch_size utterances and, if max_batch_duration is given, at most max_batch_duration
+    seconds of padded audio, i.e. the number of utterances times the longest duration in the batch.
+
+    Like torch.utils.data.distributed.DistributedSampler, the sampler gives every one of num_replicas processes a
+    disjoint part of the data and must get the same seed and set_epoch() calls on all of them. The batches of a
+    training step come from the same bucket, so every process gets a similar amount of audio, and every process gets
+    the same number of batches: the missing batches of the last step are repeated, or dropped if drop_last is set.
+
+    Args:
+        durations (list): duration of every utterance of the dataset in seconds
+        batch_size (int): maximum number of utterances in a batch, None for no limit
+        max_batch_duration (float): maximum padded duration of a batch in seconds, None for no limit
+        num_buckets (int): number of duration buckets
+        shuffle (bool): whether to shuffle the utterances and batches every epoch
+        drop_last (bool): whether to drop the last batch of every bucket if it is smaller than batch_size, and the
+            batches of the last step which do not fill all processes
+        num_replicas (int): number of processes, defaults to the world size if torch.distributed is initialized
+        rank (int): rank of this process, defaults to the rank in torch.distributed if it is initialized
+        seed (int): random seed, must be the same on all processes
+    """
+
+    def __init__(
+        self,
+        durations,
+        batch_size=None,
+        max_batch_duration=None,
+        num_buckets=10,
+        shuffle=True,
+        drop_last=False,
+        num_replicas=None,
+        rank=None,
+        seed=0,
+    ):
+        if batch_size is None and max_batch_duration is None:
+            raise ValueError("Either batch_size or max_batch_duration has to be given")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if num_buckets < 1:
+            raise ValueError(f"num_buckets must be positive, got {num_buckets}")
+        if num_replicas is None:
+            distributed = torch.distributed.is_available() and torch.distributed.is_initialized()
+            num_replicas = torch.distributed.get_world_size() if distributed else 1
+        if rank is None:
+            distributed = torch.distributed.is_available() and torch.distributed.is_initialized()
+            rank = torch.distributed.get_rank() if distributed else 0
+        if not 0 <= rank < num_replicas:
+            raise ValueError(f"rank must be in [0, {num_replicas}), got {rank}")
+
+        self.durations = list(durations)
+        self.batch_size = batch_size
+        self.max_batch_duration = max_batch_duration
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+
+        order = sorted(range(len(self.durations)), key=lambda i: self.durations[i])
+        num_buckets = min(num_buckets, max(len(order), 1))
+        self.buckets = [
+            order[len(order) * b // num_buckets : len(order) * (b + 1) // num_buckets] for b in range(num_buckets)
+        ]
+        # Batches of the current epoch, computed on first use
+        self._batches = None
+
+    def set_epoch(self, epoch):
+        """Sets the epoch which seeds the shuffling. Call it before every epoch, as for DistributedSampler."""
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self._batches = None
+
+    def _make_batches(self, indices):
+        batches, batch, longest = [], [], 0.0
+        for index in indices:
+            duration = self.durations[index]
+            too_many = self.batch_size is not None and len(batch) == self.batch_size
+            too_long = (
+                self.max_batch_duration is not None
+                and (len(batch) + 1) * max(longest, duration) > self.max_batch_duration
+            )
+            # Utterances longer than max_batch_duration get a batch of their own
+            if batch and (too_many or too_long):
+                batches.append(batch)
+                batch, longest = [], 0.0
+            batch.append(index)
+            longest = max(longest, duration)
+        if batch and not (self.drop_last and self.batch_size is not None and len(batch) < self.batch_size):
+            batches.append(batch)
+        return batches
+
+    def _epoch_batches(self):
+        """Returns the batches of this process in the current epoch."""
+        if self._batches is not None:
+            return self._batches
+        rng = random.Random(self.seed + self.epoch)
+        steps = []
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = list(bucket)
+                rng.shuffle(bucket)
+            batches = self._make_batches(bucket)
+            # Every step consists of num_replicas batches of the same bucket
+            steps.extend(batches[i : i + self.num_replicas] for i in range(0, len(batches), self.num_replicas))
+        if self.shuffle:
+            rng.shuffle(steps)
+
+        # Only the last step of the epoch may have fewer batches than processes
+        full_steps = [step for step in steps if len(step) == self.num_replicas]
+        partial_steps = [step for step in steps if len(step) < self.num_replicas]
+        rank_batches = [step[self.rank] for step in full_steps]
+        leftover = [batch for step in partial_steps for batch in step]
+        if leftover and not self.drop_last:
+            for i in range(len(leftover) // self.num_replicas):
+                rank_batches.append(leftover[i * self.num_replicas + self.rank])
+            remainder = len(leftover) % self.num_replicas
+            if remainder:
+                # Pad the last step by repeating batches, as DistributedSampler repeats samples
+                last_step = leftover[len(leftover) - remainder :]
+                rank_batches.append(last_step[self.rank % remainder])
+        self._batches = rank_batches
+        return rank_batches
+
+    def __iter__(self):
+        return iter(self._epoch_batches())
+
+    def __len__(self):
+        return len(self._epoch_batches())
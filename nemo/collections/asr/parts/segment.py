@@ -1,11 +1,117 @@
 # Taken straight from Patter https://github.com/ryanleary/patter
 # TODO: review, and copyright and fix/add comments
+import multiprocessing
+import os
 import random
+from collections import OrderedDict
 
 import librosa
 import numpy as np
 import soundfile as sf
 
+# Open files of segment reads, per process: handles inherited through fork share their file position with the parent
+_MAX_OPEN_FILES = 64
+_open_files = OrderedDict()
+_open_files_pid = None
+
+
+def _open_sound_file(filename):
+    """Returns an open SoundFile of filename from the cache of the process, opening it if needed.
+
+    The least recently used files are closed once more than _MAX_OPEN_FILES are open.
+    """
+    global _open_files_pid
+    if _open_files_pid != os.getpid():
+        # Forked worker, drop the handles of the parent without closing them
+        _open_files.clear()
+        _open_files_pid = os.getpid()
+    f = _open_files.pop(filename, None)
+    if f is None or f.closed:
+        f = sf.SoundFile(filename, 'r')
+    _open_files[filename] = f
+    while len(_open_files) > _MAX_OPEN_FILES:
+        _open_files.popitem(last=False)[1].close()
+    return f
+
+
+def close_open_files():
+    """Closes the files kept open by segment reads of this process."""
+    while _open_files:
+        _open_files.popitem()[1].close()
+
+
+class AudioCache(object):
+    """LRU cache of decoded, resampled and trimmed audio of a process, bounded by the memory of the samples.
+
+    Data loader workers each fill their own copy of the cache, and keep it across epochs if the workers are
+    persistent. Hits and misses are counted in shared memory, so stats() of the process which created the cache
+    covers its workers.
+
+    Args:
+        max_bytes (int): memory budget of the cached samples of a process in bytes
+    """
+
+    def __init__(self, max_bytes):
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes of the audio cache must be positive, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._hits = multiprocessing.Value('q', 0)
+        self._misses = multiprocessing.Value('q', 0)
+
+    def get(self, key):
+        """Returns the (samples, sample_rate) cached for key, or None."""
+        entry = self._entries.get(key)
+        counter = self._misses if entry is None else self._hits
+        with counter.get_lock():
+            counter.value += 1
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, samples, sample_rate):
+        """Caches samples for key, evicting the least recently used audio to stay within the budget."""
+        if samples.nbytes > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = (samples, sample_rate)
+        self._nbytes += samples.nbytes
+        while self._nbytes > self.max_bytes:
+            self._nbytes -= self._entries.popitem(last=False)[1][0].nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Returns the hits, misses and hit_rate of all processes, and the entries and bytes cached by this one."""
+        hits, misses = self._hits.value, self._misses.value
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses > 0 else 0.0,
+            'entries': len(self._entries),
+            'bytes': self._nbytes,
+        }
+
+
+def trim_boundaries(filename, target_sr=None, offset=0, duration=0, trim_db=60):
+    """Returns the window of audio which trimming silence with AudioSegment(trim=True) would keep.
+
+    Storing it in the manifest lets loaders read only the trimmed audio instead of trimming every time.
+    :param filename: path of the audio file
+    :param target_sr: sample rate the audio is trimmed at, as in AudioSegment
+    :param offset: offset in seconds of the audio in the file
+    :param duration: duration in seconds of the audio, 0 for the rest of the file
+    :param trim_db: threshold in decibels below the peak considered silence
+    :return: offset and duration in seconds of the trimmed audio in the file,
+        the whole audio if it is all silence
+    """
+    audio = AudioSegment.from_file(filename, target_sr=target_sr, offset=offset, duration=duration)
+    _, (start, end) = librosa.effects.trim(audio._samples, top_db=trim_db)
+    if end <= start:
+        return offset, audio.duration
+    return offset + start / audio.sample_rate, (end - start) / audio.sample_rate
+
 
 class AudioSegment(object):
     """Monaural audio segment abstraction.
@@ -75,30 +181,61 @@ class AudioSegment(object):
 
     @classmethod
     def from_file(
-        cls, filename, target_sr=None, int_values=False, offset=0, duration=0, trim=False,
+        cls, filename, target_sr=None, int_values=False, offset=0, duration=0, trim=False, keep_open=False, cache=None,
     ):
         """
         Load a file supported by librosa and return as an AudioSegment.
+        Only the frames of the window given by offset and duration are decoded.
         :param filename: path of file to load
         :param target_sr: the desired sample rate
         :param int_values: if true, load samples as 32-bit integers
         :param offset: offset in seconds when loading audio
         :param duration: duration in seconds when loading audio
+        :param keep_open: if true, keep the file open in a cache of the
+            process, for reading many segments of the same long recordings
+        :param cache: AudioCache to look the decoded audio up in and add it to
         :return: numpy array of samples
         """
-        with sf.SoundFile(filename, 'r') as f:
-            dtype = 'int32' if int_values else 'float32'
-            sample_rate = f.samplerate
-            if offset > 0:
-                f.seek(int(offset * sample_rate))
-            if duration > 0:
-                samples = f.read(int(duration * sample_rate), dtype=dtype)
-            else:
-                samples = f.read(dtype=dtype)
+        if cache is not None:
+            key = (filename, offset, duration, target_sr, int_values, trim)
+            entry = cache.get(key)
+            if entry is None:
+                audio = cls.from_file(
+                    filename,
+                    target_sr=target_sr,
+                    int_values=int_values,
+                    offset=offset,
+                    duration=duration,
+                    trim=trim,
+                    keep_open=keep_open,
+                )
+                cache.put(key, audio._samples, audio.sample_rate)
+                entry = audio._samples, audio.sample_rate
+            # Augmentations modify the samples, which are copied by the constructor
+            return cls(*entry)
+
+        if keep_open:
+            samples, sample_rate = cls._read_window(_open_sound_file(filename), int_values, offset, duration)
+        else:
+            with sf.SoundFile(filename, 'r') as f:
+                samples, sample_rate = cls._read_window(f, int_values, offset, duration)
 
         samples = samples.transpose()
         return cls(samples, sample_rate, target_sr=target_sr, trim=trim)
 
+    @staticmethod
+    def _read_window(f, int_values, offset, duration):
+        """Reads duration seconds (all if 0) from offset seconds of the open SoundFile f."""
+        dtype = 'int32' if int_values else 'float32'
+        sample_rate = f.samplerate
+        # Cached files are positioned at the end of their last read
+        f.seek(int(offset * sample_rate) if offset > 0 else 0)
+        if duration > 0:
+            samples = f.read(int(duration * sample_rate), dtype=dtype)
+        else:
+            samples = f.read(dtype=dtype)
+        return samples, sample_rate
+
     @classmethod
     def segment_from_file(cls, filename, target_sr=None, n_segments=0, trim=False):
         """Grabs n_segments number of samples from filename randomly from the
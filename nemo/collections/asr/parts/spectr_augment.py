@@ -1,20 +1,59 @@
-import random
-
 import torch
 import torch.nn as nn
 
 
+def _random_generator(rng, device):
+    """Returns a torch generator on device seeded from the python rng, or None to use the default generator."""
+    if rng is None:
+        return None
+    generator = torch.Generator(device=device)
+    generator.manual_seed(rng.getrandbits(63))
+    return generator
+
+
+def _random_ranges(generator, shape, max_start, max_width, limit):
+    """Samples ranges [start, start + width) with start uniform in [0, max_start) and width uniform in
+    [0, max_width), clipped to end before limit.
+
+    Args:
+        generator (torch.Generator): generator, None for the default one
+        shape (tuple): (batch, number of ranges)
+        max_start (torch.Tensor): upper bound of the start of the ranges of every batch item, shape [batch]
+        max_width (int): upper bound of the width of the ranges
+        limit (torch.Tensor): the ranges of every batch item end before it, shape [batch]
+
+    Returns:
+        start, end tensors of shape [batch, number of ranges, 1]
+    """
+    device = max_start.device
+    start = (torch.rand(shape, generator=generator, device=device) * max_start.unsqueeze(1)).long()
+    width = (torch.rand(shape, generator=generator, device=device) * max_width).long()
+    end = torch.min(start + width, limit.unsqueeze(1))
+    return start.unsqueeze(2), end.unsqueeze(2)
+
+
+def _in_ranges(start, end, size):
+    """Returns a [batch, number of ranges, size] bool tensor, true where the index is in the range."""
+    index = torch.arange(size, device=start.device)
+    return (index >= start) & (index < end)
+
+
 class SpecAugment(nn.Module):
     """
     Zeroes out(cuts) random continuous horisontal or
     vertical segments of the spectrogram as described in
     SpecAugment (https://arxiv.org/abs/1904.08779).
 
+    The masks of the whole batch are sampled at once and built on the
+    device of the spectrogram. If the lengths of the spectrograms are given,
+    masks only cover their valid time steps and never the padding.
+
     params:
     freq_masks - how many frequency segments should be cut
     time_masks - how many time segments should be cut
     freq_width - maximum number of frequencies to be cut in one segment
     time_width - maximum number of time steps to be cut in one segment
+    rng - python random.Random which seeds the masks, None to use the torch random generator
     """
 
     def __init__(
@@ -22,7 +61,7 @@ class SpecAugment(nn.Module):
     ):
         super(SpecAugment, self).__init__()
 
-        self._rng = random.Random() if rng is None else rng
+        self._rng = rng
 
         self.freq_masks = freq_masks
         self.time_masks = time_masks
@@ -31,27 +70,30 @@ class SpecAugment(nn.Module):
         self.time_width = time_width
 
     @torch.no_grad()
-    def forward(self, x):
-        sh = x.shape
-
-        mask = torch.zeros(x.shape).byte()
-
-        for idx in range(sh[0]):
-            for i in range(self.freq_masks):
-                x_left = int(self._rng.uniform(0, sh[1] - self.freq_width))
-
-                w = int(self._rng.uniform(0, self.freq_width))
-
-                mask[idx, x_left : x_left + w, :] = 1
-
-            for i in range(self.time_masks):
-                y_left = int(self._rng.uniform(0, sh[2] - self.time_width))
-
-                w = int(self._rng.uniform(0, self.time_width))
-
-                mask[idx, :, y_left : y_left + w] = 1
-
-        x = x.masked_fill(mask.type(torch.bool).to(device=x.device), 0)
+    def forward(self, x, length=None):
+        batch_size, num_freqs, num_steps = x.shape
+        generator = _random_generator(self._rng, x.device)
+        if length is None:
+            length = torch.full((batch_size,), num_steps, dtype=torch.long, device=x.device)
+        else:
+            length = length.to(device=x.device, dtype=torch.long).clamp(max=num_steps)
+        valid = torch.arange(num_steps, device=x.device) < length.unsqueeze(1)
+
+        freq_mask = torch.zeros(batch_size, num_freqs, dtype=torch.bool, device=x.device)
+        if self.freq_masks > 0:
+            max_start = torch.full_like(length, max(num_freqs - self.freq_width, 0))
+            limit = torch.full_like(length, num_freqs)
+            start, end = _random_ranges(generator, (batch_size, self.freq_masks), max_start, self.freq_width, limit)
+            freq_mask = _in_ranges(start, end, num_freqs).any(dim=1)
+
+        time_mask = torch.zeros(batch_size, num_steps, dtype=torch.bool, device=x.device)
+        if self.time_masks > 0:
+            max_start = (length - self.time_width).clamp(min=0)
+            start, end = _random_ranges(generator, (batch_size, self.time_masks), max_start, self.time_width, length)
+            time_mask = _in_ranges(start, end, num_steps).any(dim=1)
+
+        mask = (freq_mask.unsqueeze(2) | time_mask.unsqueeze(1)) & valid.unsqueeze(1)
+        x = x.masked_fill(mask, 0)
 
         return x
 
@@ -61,37 +103,51 @@ class SpecCutout(nn.Module):
     Zeroes out(cuts) random rectangles in the spectrogram
     as described in (https://arxiv.org/abs/1708.04552).
 
+    The rectangles of the whole batch are sampled at once and built on the
+    device of the spectrogram. If the lengths of the spectrograms are given,
+    rectangles only cover their valid time steps and never the padding.
+
     params:
     rect_masks - how many rectangular masks should be cut
     rect_freq - maximum size of cut rectangles along the frequency dimension
     rect_time - maximum size of cut rectangles along the time dimension
+    rng - python random.Random which seeds the masks, None to use the torch random generator
     """
 
     def __init__(self, rect_masks=0, rect_time=5, rect_freq=20, rng=None):
         super(SpecCutout, self).__init__()
 
-        self._rng = random.Random() if rng is None else rng
+        self._rng = rng
 
         self.rect_masks = rect_masks
         self.rect_time = rect_time
         self.rect_freq = rect_freq
 
     @torch.no_grad()
-    def forward(self, x):
-        sh = x.shape
-
-        mask = torch.zeros(x.shape).byte()
-
-        for idx in range(sh[0]):
-            for i in range(self.rect_masks):
-                rect_x = int(self._rng.uniform(0, sh[1] - self.rect_freq))
-                rect_y = int(self._rng.uniform(0, sh[2] - self.rect_time))
-
-                w_x = int(self._rng.uniform(0, self.rect_time))
-                w_y = int(self._rng.uniform(0, self.rect_freq))
-
-                mask[idx, rect_x : rect_x + w_x, rect_y : rect_y + w_y] = 1
-
-        x = x.masked_fill(mask.type(torch.bool).to(device=x.device), 0)
+    def forward(self, x, length=None):
+        batch_size, num_freqs, num_steps = x.shape
+        if self.rect_masks == 0:
+            return x
+        generator = _random_generator(self._rng, x.device)
+        if length is None:
+            length = torch.full((batch_size,), num_steps, dtype=torch.long, device=x.device)
+        else:
+            length = length.to(device=x.device, dtype=torch.long).clamp(max=num_steps)
+
+        shape = (batch_size, self.rect_masks)
+        # As in the original implementation, the width of the rectangles along the frequency dimension is bounded by
+        # rect_time and the one along the time dimension by rect_freq
+        max_start = torch.full_like(length, max(num_freqs - self.rect_freq, 0))
+        freq_start, freq_end = _random_ranges(
+            generator, shape, max_start, self.rect_time, torch.full_like(length, num_freqs)
+        )
+        max_start = (length - self.rect_time).clamp(min=0)
+        time_start, time_end = _random_ranges(generator, shape, max_start, self.rect_freq, length)
+
+        # [batch, freq, rect] x [batch, rect, time]: a time-frequency bin is masked if any rectangle covers it
+        in_freq = _in_ranges(freq_start, freq_end, num_freqs).transpose(1, 2).float()
+        in_time = _in_ranges(time_start, time_end, num_steps).float()
+        mask = torch.bmm(in_freq, in_time) > 0
+        x = x.masked_fill(mask, 0)
 
         return x
@@ -15,6 +15,9 @@
 # =============================================================================
 
 import nemo
-from nemo.collections.nlp import callbacks, data, nm, utils
+from nemo.utils.lazy_import import lazy_package
 
 backend = nemo.core.Backend.PyTorch
+
+# Subpackages (and their dependencies such as sklearn, h5py and sentencepiece) are imported on first use
+lazy_package(__name__, submodules=["callbacks", "data", "metrics", "nm", "utils"])
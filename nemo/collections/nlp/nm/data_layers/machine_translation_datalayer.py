@@ -22,6 +22,7 @@ from nemo.collections.nlp.data import TranslationDataset
 from nemo.collections.nlp.nm.data_layers.text_datalayer import TextDataLayer
 from nemo.core import ChannelType, LabelsType, NeuralType
 from nemo.utils.decorators import add_port_docs
+from nemo.utils.helpers import is_distributed_placement
 
 __all__ = ['TranslationDataLayer']
 
@@ -92,7 +93,7 @@ class TranslationDataLayer(TextDataLayer):
         }
         super().__init__(dataset_type, dataset_params, batch_size=1, shuffle=shuffle)
 
-        if self._placement == nemo.core.DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             sampler = pt_data.distributed.DistributedSampler(self._dataset)
         else:
             sampler = None
@@ -45,6 +45,7 @@ from nemo.collections.nlp.data.datasets import MultiWOZDataset
 from nemo.collections.nlp.nm.data_layers.text_datalayer import TextDataLayer
 from nemo.core.neural_types import ChannelType, LabelsType, LengthsType, NeuralType
 from nemo.utils.decorators import add_port_docs
+from nemo.utils.helpers import is_distributed_placement
 
 __all__ = ['MultiWOZDataLayer']
 
@@ -122,7 +123,7 @@ class MultiWOZDataLayer(TextDataLayer):
         }
         super().__init__(dataset_type, dataset_params, batch_size=batch_size)
 
-        if self._placement == nemo.core.DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             sampler = pt_data.distributed.DistributedSampler(self._dataset)
         else:
             sampler = None
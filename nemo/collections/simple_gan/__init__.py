@@ -12,7 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # =============================================================================
-from .gan import *
 from nemo.core import Backend
+from nemo.utils.lazy_import import lazy_package
 
 backend = Backend.PyTorch
+
+# gan (and torchvision) is imported on first use
+lazy_package(
+    __name__,
+    submodules=["gan"],
+    attributes={
+        name: ".gan"
+        for name in [
+            "SimpleDiscriminator",
+            "SimpleGenerator",
+            "DiscriminatorLoss",
+            "GradientPenalty",
+            "InterpolateImage",
+            "RandomDataLayer",
+            "MnistGanDataLayer",
+        ]
+    },
+)
@@ -13,17 +13,40 @@
 # limitations under the License.
 # =============================================================================
 
-from nemo.collections.tts.data_layers import AudioDataLayer
-from nemo.collections.tts.fastspeech_modules import *
-from nemo.collections.tts.fastspeech_modules import __all__ as fastspeech__all__
-from nemo.collections.tts.parts.helpers import *
-from nemo.collections.tts.parts.helpers import __all__ as helpers__all__
-from nemo.collections.tts.tacotron2_modules import *
-from nemo.collections.tts.tacotron2_modules import __all__ as tacotron2__all__
-from nemo.collections.tts.waveglow_modules import *
-from nemo.collections.tts.waveglow_modules import __all__ as waveglow__all__
 from nemo.core import Backend
+from nemo.utils.lazy_import import lazy_package
 
 backend = Backend.PyTorch
 
-__all__ = ["AudioDataLayer"] + helpers__all__ + tacotron2__all__ + waveglow__all__ + fastspeech__all__
+_modules = {
+    ".data_layers": ["AudioDataLayer"],
+    ".parts.helpers": [
+        "waveglow_log_to_tb_func",
+        "waveglow_process_eval_batch",
+        "waveglow_eval_log_to_tb_func",
+        "tacotron2_log_to_tb_func",
+        "tacotron2_process_eval_batch",
+        "tacotron2_process_final_eval",
+        "tacotron2_eval_log_to_tb_func",
+    ],
+    ".tacotron2_modules": [
+        "MakeGate",
+        "Tacotron2Loss",
+        "Tacotron2Postnet",
+        "Tacotron2Decoder",
+        "Tacotron2DecoderInfer",
+        "Tacotron2Encoder",
+        "TextEmbedding",
+    ],
+    ".waveglow_modules": ["WaveGlowNM", "WaveGlowInferNM", "WaveGlowLoss"],
+    ".fastspeech_modules": ["FastSpeechDataLayer", "FastSpeech", "FastSpeechLoss"],
+}
+
+__all__ = [name for names in _modules.values() for name in names]
+
+# Modules (and their dependencies such as librosa and matplotlib) are imported on first use
+lazy_package(
+    __name__,
+    submodules=["data_layers", "fastspeech_modules", "parts", "tacotron2_modules", "waveglow_modules"],
+    attributes={name: module for module, names in _modules.items() for name in names},
+)
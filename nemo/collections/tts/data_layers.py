@@ -4,9 +4,9 @@ import torch
 import nemo
 from .parts.datasets import AudioOnlyDataset
 from nemo.backends.pytorch.nm import DataLayerNM
-from nemo.core import DeviceType
 from nemo.core.neural_types import AudioSignal, LengthsType, NeuralType
 from nemo.utils.decorators import add_port_docs
+from nemo.utils.helpers import is_distributed_placement
 
 logging = nemo.logging
 
@@ -85,7 +85,7 @@ class AudioDataLayer(DataLayerNM):
         )
 
         sampler = None
-        if self._placement == DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             logging.info('Parallelizing DATALAYER')
             sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
 
@@ -25,6 +25,7 @@ from nemo.collections.asr.parts import AudioDataset, WaveformFeaturizer
 from nemo.collections.tts.parts import fastspeech, fastspeech_transformer
 from nemo.core.neural_types import AudioSignal, EmbeddedTextType, LengthsType, MaskType, MelSpectrogramType, NeuralType
 from nemo.utils.decorators import add_port_docs
+from nemo.utils.helpers import is_distributed_placement
 
 __all__ = ['FastSpeechDataLayer', 'FastSpeech', 'FastSpeechLoss']
 
@@ -135,7 +136,7 @@ class FastSpeechDataLayer(DataLayerNM):
         self.sample_rate = sample_rate
 
         sampler = None
-        if self._placement == nemo.core.DeviceType.AllGpu:
+        if is_distributed_placement(self._placement):
             sampler = torch.utils.data.distributed.DistributedSampler(self._dataset)
 
         self._dataloader = torch.utils.data.DataLoader(
@@ -15,7 +15,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import glob
 import os
 import sys
 import time
@@ -24,7 +23,7 @@ from abc import ABC, abstractmethod
 from collections import namedtuple
 
 import nemo
-from nemo.utils import get_checkpoint_from_dir
+from nemo.utils import AsyncCheckpointWriter, get_checkpoint_from_dir
 
 try:
     import wandb
@@ -103,14 +102,30 @@ class ModuleSaverCallback(ActionCallback):
     """
 
     def __init__(
-        self, save_modules_list, step_freq=1000, folder=None, checkpoints_to_keep=4,
+        self, save_modules_list, step_freq=1000, folder=None, checkpoints_to_keep=4, async_save=False,
     ):
         super().__init__()
         self._save_modules_list = save_modules_list
         self._folder = folder
         self._step_freq = step_freq
-        self._ckpt2keep = checkpoints_to_keep
-        self._saved_ckpts = []
+        self._async_save = async_save
+        self._writer = AsyncCheckpointWriter(checkpoints_to_keep=checkpoints_to_keep)
+
+    def __save(self):
+        files = {}
+        for m in self._save_modules_list:
+            class_name = m.__class__.__name__
+            uid = m.unique_instance_id
+            fn = f"{class_name}_{uid}-STEP-{self.step}.pt"
+            if self._folder is None:
+                file_name = fn
+            else:
+                file_name = os.path.join(self._folder, fn)
+            logging.info(f"Saving module {class_name} in {file_name}")
+            files[file_name] = m.save_to
+        self._writer.save(files, name=f"step {self.step}")
+        if not self._async_save:
+            self._writer.wait()
 
     def on_iteration_end(self):
         step = self.step
@@ -120,38 +135,12 @@ class ModuleSaverCallback(ActionCallback):
             and step > 0
             and (self.global_rank is None or self.global_rank == 0)
         ):
-            for m in self._save_modules_list:
-                class_name = m.__class__.__name__
-                uid = m.unique_instance_id
-                fn = f"{class_name}_{uid}-STEP-{step}.pt"
-                if self._folder is None:
-                    file_name = fn
-                else:
-                    file_name = os.path.join(self._folder, fn)
-                logging.info(f"Saving module {class_name} in {file_name}")
-                m.save_to(file_name)
-                logging.info("Saved.")
-            self._saved_ckpts.append(f'-{self.step}.pt')
-            if len(self._saved_ckpts) > self._ckpt2keep:
-                for end in self._saved_ckpts[: -self._ckpt2keep]:
-                    for file in glob.glob(f'{self._folder}/*{end}'):
-                        os.remove(file)
-                self._saved_ckpts = self._saved_ckpts[-self._ckpt2keep :]
+            self.__save()
 
     def on_action_end(self):
-        step = self.step
         if self.global_rank is None or self.global_rank == 0:
-            for m in self._save_modules_list:
-                class_name = m.__class__.__name__
-                uid = m.unique_instance_id
-                fn = f"{class_name}_{uid}-STEP-{step}.pt"
-                if self._folder is None:
-                    file_name = fn
-                else:
-                    file_name = os.path.join(self._folder, fn)
-                logging.info(f"Saving module {class_name} in {file_name}")
-                m.save_to(file_name)
-                logging.info("Saved.")
+            self.__save()
+            self._writer.wait()
 
 
 class SimpleLossLoggerCallback(ActionCallback):
@@ -242,7 +231,14 @@ class CheckpointCallback(ActionCallback):
     """
 
     def __init__(
-        self, folder, load_from_folder=None, step_freq=-1, epoch_freq=-1, checkpoints_to_keep=4, force_load=False,
+        self,
+        folder,
+        load_from_folder=None,
+        step_freq=-1,
+        epoch_freq=-1,
+        checkpoints_to_keep=4,
+        force_load=False,
+        async_save=False,
     ):
         super().__init__()
         if step_freq == -1 and epoch_freq == -1:
@@ -256,10 +252,12 @@ class CheckpointCallback(ActionCallback):
         self._epoch_freq = epoch_freq
         self._folder = folder
         self._load_from_folder = load_from_folder if load_from_folder else folder
-        self._ckpt2keep = checkpoints_to_keep
-        self._saved_ckpts = []
         # If True, run will fail if we cannot load module weights
         self._force_load = force_load
+        # If True, checkpoints are serialized into host memory on the training thread, written to disk in the
+        # background and training only waits for them at the end
+        self._async_save = async_save
+        self._writer = AsyncCheckpointWriter(checkpoints_to_keep=checkpoints_to_keep)
 
     def __save_to(self, path):
         if self.global_rank is not None and self.global_rank != 0:
@@ -267,6 +265,11 @@ class CheckpointCallback(ActionCallback):
         if not os.path.isdir(path):
             logging.info(f"Creating {path} folder")
             os.makedirs(path, exist_ok=True)
+        if self._step_freq > -1:
+            suffix = f"STEP-{self.step}.pt"
+        else:
+            suffix = f"EPOCH-{self.epoch_num}.pt"
+        files = {}
         unique_mod_names = set()
         for module in self.action.modules:
             if module.num_weights > 0:
@@ -276,27 +279,12 @@ class CheckpointCallback(ActionCallback):
                         "modules."
                     )
                 unique_mod_names.add(str(module))
-                if self._step_freq > -1:
-                    filename = f"{module}-STEP-{self.step}.pt"
-                else:
-                    filename = f"{module}-EPOCH-{self.epoch_num}.pt"
-                module.save_to(os.path.join(path, filename))
-
-        if self._step_freq > -1:
-            filename = f"trainer-STEP-{self.step}.pt"
-            self.action.save_state_to(f'{path}/{filename}')
-            self._saved_ckpts.append(f'-{self.step}.pt')
-        else:
-            filename = f"trainer-EPOCH-{self.epoch_num}.pt"
-            self.action.save_state_to(f'{path}/{filename}')
-            self._saved_ckpts.append(f'-{self.epoch_num}.pt')
-
-        if len(self._saved_ckpts) > self._ckpt2keep:
-            for end in self._saved_ckpts[: -self._ckpt2keep]:
-                for file in glob.glob(f'{path}/*{end}'):
-                    os.remove(file)
-            self._saved_ckpts = self._saved_ckpts[-self._ckpt2keep :]
-        logging.info(f'Saved checkpoint: {path}/{filename}')
+                files[os.path.join(path, f"{module}-{suffix}")] = module.save_to
+        filename = f"trainer-{suffix}"
+        files[os.path.join(path, filename)] = self.action.save_state_to
+        self._writer.save(files, name=f'{path}/{filename}')
+        if not self._async_save:
+            self._writer.wait()
 
     def __restore_from(self, path):
         if not os.path.isdir(path):
@@ -357,15 +345,44 @@ class CheckpointCallback(ActionCallback):
             logging.info(f"{name}")
         logging.info(f"Total model parameters: {num_parameters}")
         self.__restore_from(path=self._load_from_folder)
+        self.__sync_restored_state()
+
+    def __sync_restored_state(self):
+        """Makes all workers continue from the state restored by worker 0, in case workers found different (or no)
+        checkpoints, e.g. because the checkpoint folder is not shared.
+        """
+        if self.global_rank is None:
+            return
+        import torch
+
+        device = nemo.utils.get_distributed_device()
+        for module in self.action.modules:
+            if module.num_weights > 0:
+                for parameter, _ in module.get_weights().values():
+                    torch.distributed.broadcast(parameter.data, 0)
+        state = torch.tensor([self.action.step, self.action.epoch_num], dtype=torch.int64, device=device)
+        torch.distributed.broadcast(state, 0)
+        self.action.step, self.action.epoch_num = state.tolist()
+
+    def __wait_for_save(self, flush=False):
+        """Waits until worker 0 has written the checkpoint. With async_save, this only happens if flush is set."""
+        if not self._async_save or flush:
+            self._writer.wait()
+            if self.global_rank is not None:
+                import torch
+
+                torch.distributed.barrier()
 
     def on_iteration_end(self):
         step = self.step
         if self._step_freq > 0 and step % self._step_freq == 0 and step > 0:
             self.__save_to(path=self._folder)
+            self.__wait_for_save()
 
     def on_action_end(self):
         if self._step_freq > 0 or self._epoch_freq > 0:
             self.__save_to(path=self._folder)
+        self.__wait_for_save(flush=True)
 
     def on_epoch_start(self):
         self._last_epoch_start = time.time()
@@ -375,8 +392,9 @@ class CheckpointCallback(ActionCallback):
             if self.global_rank is None or self.global_rank == 0:
                 run_time = time.time() - self._last_epoch_start
                 logging.info(f'Finished epoch {self.epoch_num} in {run_time}')
-                if (self.epoch_num + 1) % self._epoch_freq == 0:
-                    self.__save_to(path=self._folder)
+            if (self.epoch_num + 1) % self._epoch_freq == 0:
+                self.__save_to(path=self._folder)
+                self.__wait_for_save()
 
 
 class EvaluatorCallback(ActionCallback):
@@ -396,6 +414,7 @@ class EvaluatorCallback(ActionCallback):
         eval_epoch=None,
         wandb_name=None,
         wandb_project=None,
+        cache_on_device=False,
     ):
         # TODO: Eval_epoch currently does nothing
         if eval_step is None and eval_epoch is None:
@@ -418,10 +437,18 @@ class EvaluatorCallback(ActionCallback):
         self._wandb_project = wandb_project
         self._wandb_name = wandb_name
 
+        # Keep all eval batches on the device after the first evaluation, in the order of that evaluation. Callbacks
+        # without cache_on_device load the data as usual.
+        self._cache_on_device = cache_on_device
+
     @property
     def eval_tensors(self):
         return self._eval_tensors
 
+    @property
+    def cache_on_device(self):
+        return self._cache_on_device
+
     @property
     def tb_writer_func(self):
         return self._tb_writer_func
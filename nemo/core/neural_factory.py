@@ -25,10 +25,11 @@ __all__ = [
     'DeploymentFormat',
 ]
 
+import os
 import random
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 
 import numpy as np
 
@@ -81,6 +82,7 @@ class DeviceType(Enum):
     GPU = 1
     CPU = 2
     AllGpu = 3
+    AllCpu = 4
 
 
 class Actions(ABC):
@@ -119,6 +121,9 @@ class Actions(ABC):
         lr_policy=None,
         batches_per_step=None,
         stop_on_nan_loss=False,
+        nan_check_freq=1,
+        nan_policy="skip",
+        profiler=None,
     ):
         """This action executes training and (optionally) evaluation.
 
@@ -138,6 +143,22 @@ class Actions(ABC):
                 will stop if loss=nan. If set to False, the training will
                 continue, but the gradients will be zeroed before next
                 mini-batch.
+            nan_check_freq: (default: 1) How often (in steps) the loss is
+                checked for NaN or inf values. Checking synchronizes the host
+                with the device, so for values > 1 non-finite flags are
+                accumulated on the device and only inspected every
+                nan_check_freq steps, at logging steps and at the end of
+                every epoch.
+            nan_policy: (default: "skip") What to do with updates computed
+                from a non-finite loss when nan_check_freq > 1. "skip" leaves
+                the parameters and optimizer state unchanged in such steps,
+                on the device for optimizers with conditional steps (AdamW and
+                Novograd) and by checking the loss on the host every step for
+                other optimizers. "rollback" restores the state of modules and
+                optimizers from the last successful check.
+            profiler: (default: None) StepProfiler recording the time spent in
+                every module, the backward pass, the optimizer, the callbacks
+                and waiting for data for a window of steps.
 
         Returns:
             None
@@ -156,11 +177,23 @@ class Actions(ABC):
         pass
 
     @abstractmethod
-    def save_state_to(self, path: str):
+    def infer_iter(self, tensors: List[NmTensor]):
+        """This action executes inference lazily. Nothing is optimized.
+        Args:
+          tensors: which tensors to evaluate.
+
+        Returns:
+          Generator of evaluated chunks of batches
+        """
+        pass
+
+    @abstractmethod
+    def save_state_to(self, path: Union[str, BinaryIO]):
         """
         Saves current state such as step, epoch and optimizer parameters
         Args:
-          path:
+          path: path of the file to save to, or a binary file object (such as
+            io.BytesIO) to write to
 
         Returns:
 
@@ -260,7 +293,10 @@ class NeuralModuleFactory(object):
         local_rank (int): Process rank. Should be set by distributed runner
         optimization_level (Optimization): Level of optimization to use. Will
             be passed to neural modules and actions created by this factory.
-        placement (DeviceType: where to place NeuralModule instances by default
+        placement (DeviceType: where to place NeuralModule instances by default.
+            With local_rank set, DeviceType.AllGpu (the default) runs data
+            parallel training on GPUs over nccl and DeviceType.AllCpu runs it
+            on CPUs over gloo.
         cudnn_benchmark (bool): (default False) If set to True it will use
             cudnnFind method to find the best kernels instead of using
             heuristics. If the shapes of your inputs are constant this
@@ -317,7 +353,7 @@ class NeuralModuleFactory(object):
             # TODO: Move all framework specific code from this file
             import torch
 
-            if self._placement != DeviceType.CPU:
+            if self._placement not in [DeviceType.CPU, DeviceType.AllCpu]:
                 if not torch.cuda.is_available():
                     raise ValueError(
                         "You requested to use GPUs but CUDA is "
@@ -339,7 +375,13 @@ class NeuralModuleFactory(object):
                 np.random.seed(random_seed)
                 random.seed(random_seed)
 
-            if self._local_rank is not None:
+            if self._local_rank is not None and self._placement == DeviceType.AllCpu:
+                # Data parallel training on CPUs
+                torch.distributed.init_process_group(backend="gloo", init_method="env://")
+                self._world_size = torch.distributed.get_world_size()
+                self._global_rank = torch.distributed.get_rank()
+
+            elif self._local_rank is not None:
                 torch.distributed.init_process_group(backend="nccl", init_method="env://")
 
                 cuda_set = True
@@ -372,15 +414,18 @@ class NeuralModuleFactory(object):
                 self._world_size = torch.distributed.get_world_size()
                 self._global_rank = torch.distributed.get_rank()
 
+            if self._local_rank is not None:
+
                 def torch_broadcast_wrapper(str_len=None, string=None, src=0):
                     """Wrapper function to broadcast string values across all
                     workers
                     """
-                    # Create byte cuda torch tensor
+                    # Create byte torch tensor on the device used by the process group
+                    device = nemo.utils.get_distributed_device()
                     if string is not None:
-                        string_tensor = torch.tensor(list(string.encode()), dtype=torch.uint8).cuda()
+                        string_tensor = torch.tensor(list(string.encode()), dtype=torch.uint8, device=device)
                     else:
-                        string_tensor = torch.tensor([0] * str_len, dtype=torch.uint8).cuda()
+                        string_tensor = torch.tensor([0] * str_len, dtype=torch.uint8, device=device)
                     # Run broadcast
                     torch.distributed.broadcast(string_tensor, src)
                     # turn byte tensor back to string
@@ -570,10 +615,39 @@ class NeuralModuleFactory(object):
         synced_batchnorm_groupsize=0,
         gradient_predivide=False,
         amp_max_loss_scale=2.0 ** 24,
+        nan_check_freq=1,
+        nan_policy="skip",
+        profile_steps=None,
         reset=False,
     ):
+        """Trains the model. See Actions.train() for the arguments.
+
+        Args:
+            profile_steps (tuple): (default: None) (first step, number of
+                steps) to profile. The time of every module's forward pass,
+                the backward pass, the optimizer, the callbacks and data
+                loading (and device memory deltas if CUDA is used) of these
+                steps are written to TensorBoard as "profiler/..." scalars and
+                to a Chrome trace file in the log directory.
+            reset (bool): (default: False) Re-create the trainer before
+                training.
+        """
         if reset:
             self.reset_trainer()
+        profiler = None
+        if profile_steps is not None:
+            trace_file = None
+            if self.work_dir is not None:
+                trace_file = os.path.join(self.work_dir, f"step_profile_globalrank-{self._global_rank or 0}.json")
+            else:
+                logging.warning("The factory has no log_dir, the Chrome trace of the profiled steps will not be saved")
+            profiler = NeuralModuleFactory.__name_import("nemo.backends.pytorch.StepProfiler")(
+                first_step=profile_steps[0],
+                num_steps=profile_steps[1],
+                tb_writer=self._tb_writer,
+                trace_file=trace_file,
+                pid=self._global_rank or 0,
+            )
         return self._trainer.train(
             tensors_to_optimize=tensors_to_optimize,
             optimizer=optimizer,
@@ -586,6 +660,9 @@ class NeuralModuleFactory(object):
             synced_batchnorm_groupsize=synced_batchnorm_groupsize,
             gradient_predivide=gradient_predivide,
             amp_max_loss_scale=amp_max_loss_scale,
+            nan_check_freq=nan_check_freq,
+            nan_policy=nan_policy,
+            profiler=profiler,
         )
 
     def eval(self, callbacks: List[EvaluatorCallback]):
@@ -630,6 +707,9 @@ class NeuralModuleFactory(object):
         use_cache=False,
         offload_to_cpu=True,
         modules_to_restore=None,
+        sink=None,
+        batches_per_chunk=1,
+        cache_dir=None,
     ):
         """Runs inference to obtain values for tensors
 
@@ -654,6 +734,21 @@ class NeuralModuleFactory(object):
             modules_to_restore (list): Defaults to None, in which case all
                 NMs inside callchain with weights will be restored. If
                 specified only the modules inside this list will be restored.
+            sink (callable): Defaults to None. If specified, results are not
+                accumulated. Instead, sink is called with the results of every
+                batches_per_chunk batches (in the format returned by
+                infer_iter()), e.g. to write them to disk, and None is
+                returned. Can only be used with cache if cache_dir is set.
+            batches_per_chunk (int): Number of batches passed to every sink
+                call. Defaults to 1.
+            cache_dir (str): Defaults to None. If specified, cache and
+                use_cache work with memory-mapped shard files in this
+                directory (one per worker) instead of keeping tensors in
+                memory. Cached tensors are identified by the configuration
+                (init params, which must be JSON serializable) and the weights
+                of the data layer and the modules producing them, so the cache
+                can be reused by other processes and sessions, but not with
+                other checkpoints. Can be used in distributed mode.
 
         Returns:
             List of evaluated tensors. Each element in the list is also a list
@@ -668,6 +763,68 @@ class NeuralModuleFactory(object):
             use_cache=use_cache,
             offload_to_cpu=offload_to_cpu,
             modules_to_restore=modules_to_restore,
+            sink=sink,
+            batches_per_chunk=batches_per_chunk,
+            cache_dir=cache_dir,
+        )
+
+    def infer_iter(
+        self,
+        tensors: List[NmTensor],
+        checkpoint_dir=None,
+        ckpt_pattern='',
+        verbose=True,
+        cache=False,
+        use_cache=False,
+        offload_to_cpu=True,
+        modules_to_restore=None,
+        batches_per_chunk=1,
+        cache_dir=None,
+    ):
+        """Runs inference lazily, yielding values of tensors chunk by chunk.
+        Only one chunk is held in memory at a time, so memory usage does not
+        grow with the size of the dataset.
+
+        Args:
+            tensors (list[NmTensor]): List of NeMo tensors that we want to get
+                values of.
+            checkpoint_dir (str): Path to checkpoint directory. Default is None
+                which does not load checkpoints.
+            ckpt_pattern (str): Pattern used to check for checkpoints inside
+                checkpoint_dir. Default is '' which matches any checkpoints
+                inside checkpoint_dir.
+            verbose (bool): Controls printing. Defaults to True.
+            cache (bool): If True, cache all `tensors` and intermediate tensors
+                in cache_dir. Defaults to False.
+            use_cache (bool): Re-use intermediate tensors cached by a previous
+                infer() or infer_iter() call with cache set. Defaults to False.
+            offload_to_cpu (bool): If True, all evaluated tensors are moved to
+                cpu memory after each inference batch. Defaults to True.
+            modules_to_restore (list): Defaults to None, in which case all
+                NMs inside callchain with weights will be restored. If
+                specified only the modules inside this list will be restored.
+            batches_per_chunk (int): Number of batches in every yielded chunk.
+                Defaults to 1.
+            cache_dir (str): Directory of the on-disk cache, see infer().
+                Required if cache is set.
+
+        Returns:
+            Generator of chunks. Every chunk has the same format as the result
+            of infer(): a list with an element for each tensor, which is a list
+            of batches of tensor values. In distributed mode chunks are only
+            yielded on the worker with global rank 0.
+        """
+        return self._trainer.infer_iter(
+            tensors=tensors,
+            checkpoint_dir=checkpoint_dir,
+            ckpt_pattern=ckpt_pattern,
+            verbose=verbose,
+            cache=cache,
+            use_cache=use_cache,
+            offload_to_cpu=offload_to_cpu,
+            modules_to_restore=modules_to_restore,
+            batches_per_chunk=batches_per_chunk,
+            cache_dir=cache_dir,
         )
 
     def clear_cache(self):
@@ -723,7 +880,7 @@ class NeuralModuleFactory(object):
         if self._backend == Backend.PyTorch:
             import torch
 
-            status_tensor = torch.cuda.IntTensor([status])
+            status_tensor = torch.tensor([status], dtype=torch.int32, device=nemo.utils.get_distributed_device())
             torch.distributed.all_reduce(status_tensor, op=torch.distributed.ReduceOp.MIN)
             if status_tensor.item() == 0:
                 logging.error("At least one process had a failure")
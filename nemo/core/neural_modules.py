@@ -25,7 +25,7 @@ from collections import namedtuple
 from enum import Enum
 from inspect import getargvalues, getfullargspec, stack
 from os import path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple, Union
 
 from ruamel.yaml import YAML
 
@@ -439,8 +439,7 @@ class NeuralModule(ABC):
           NmTensor object or tuple of NmTensor objects
         """
         # Get input and output ports definitions.
-        input_port_defs = self.input_ports
-        output_port_defs = self.output_ports
+        input_port_defs, output_port_defs, result_type = self.__get_port_definitions()
 
         first_input_nmtensor_type = None
         input_nmtensors_are_of_same_type = True
@@ -512,16 +511,31 @@ class NeuralModule(ABC):
                         )
                 result.append(NmTensor(producer=self, producer_args=kwargs, name=out_port, ntype=out_type,))
 
-            # Creating ad-hoc class for returning from module's forward pass.
-            output_class_name = f'{self.__class__.__name__}Output'
-            field_names = list(output_port_defs)
-            result_type = collections.namedtuple(typename=output_class_name, field_names=field_names,)
-
             # Tie tuple of output tensors with corresponding names.
             result = result_type(*result)
 
             return result
 
+    def __get_port_definitions(self):
+        """Returns input ports, output ports and the class of the tuple of output NmTensors.
+
+        input_ports and output_ports build new dicts every time they are accessed, so they are resolved only once per
+        module instance. Port definitions must not change after the module was called for the first time.
+        """
+        port_definitions = getattr(self, "_port_definitions", None)
+        if port_definitions is None:
+            input_port_defs = self.input_ports
+            output_port_defs = self.output_ports
+            # Creating ad-hoc class for returning from module's forward pass.
+            result_type = None
+            if len(output_port_defs) != 1:
+                output_class_name = f'{self.__class__.__name__}Output'
+                field_names = list(output_port_defs)
+                result_type = collections.namedtuple(typename=output_class_name, field_names=field_names,)
+            port_definitions = (input_port_defs, output_port_defs, result_type)
+            self._port_definitions = port_definitions
+        return port_definitions
+
     def __str__(self):
         return self.__class__.__name__
 
@@ -635,11 +649,12 @@ class NeuralModule(ABC):
         return False
 
     @abstractmethod
-    def save_to(self, path: str):
+    def save_to(self, path: Union[str, BinaryIO]):
         """Save module state to file.
 
         Args:
-          path (string): path to while where to save.
+          path (string or file object): path of the file to save to, or a binary file object (such as io.BytesIO)
+            to write to
         """
         pass
 
@@ -87,6 +87,14 @@ class AxisType(object):
         self.size = size
         self.is_list = is_list
 
+    def __eq__(self, other):
+        if not isinstance(other, AxisType):
+            return NotImplemented
+        return self.kind == other.kind and self.size == other.size and self.is_list == other.is_list
+
+    def __hash__(self):
+        return hash((self.kind, self.size, self.is_list))
+
     def __repr__(self):
         if self.size is None:
             representation = str(self.kind)
@@ -30,6 +30,11 @@ from nemo.core.neural_types.axes import AxisKind, AxisType
 from nemo.core.neural_types.comparison import NeuralTypeComparisonResult
 from nemo.core.neural_types.elements import *
 
+# Memo of NeuralType.compare() results: {(signature of first type, signature of second type) -> result}
+_COMPARISON_RESULTS = {}
+# The memo is cleared when it grows larger than this, e.g. because of many parametrized types
+_MAX_COMPARISON_RESULTS = 2 ** 16
+
 
 class NeuralType(object):
     """This is the main class which would represent neural type concept.
@@ -73,10 +78,42 @@ class NeuralType(object):
         else:
             self.axes = None
         self.optional = optional
+        self._signature = NeuralType.__make_signature(self.axes, self.elements_type)
+
+    @property
+    def signature(self):
+        """Hashable signature of the type: two types with the same signature compare the same way with any other
+        type. None if the type can not be hashed, e.g. because its elements type has unhashable type_parameters.
+        """
+        return self._signature
+
+    @staticmethod
+    def __make_signature(axes, elements_type):
+        try:
+            parameters = tuple(sorted(elements_type.type_parameters.items()))
+            signature = (axes, (type(elements_type), parameters, elements_type.fields))
+            hash(signature)
+        except TypeError:
+            return None
+        return signature
 
     def compare(self, second) -> NeuralTypeComparisonResult:
         """Performs neural type comparison of self with second. When you chain two modules' inputs/outputs via
-        __call__ method, this comparison will be called to ensure neural type compatibility."""
+        __call__ method, this comparison will be called to ensure neural type compatibility.
+
+        Results are memoized for types with a signature, so every pair of types is only compared once."""
+        second_signature = getattr(second, "_signature", None)
+        if self._signature is None or second_signature is None:
+            return self.__compare(second)
+        key = (self._signature, second_signature)
+        result = _COMPARISON_RESULTS.get(key)
+        if result is None:
+            if len(_COMPARISON_RESULTS) >= _MAX_COMPARISON_RESULTS:
+                _COMPARISON_RESULTS.clear()
+            result = _COMPARISON_RESULTS[key] = self.__compare(second)
+        return result
+
+    def __compare(self, second) -> NeuralTypeComparisonResult:
         # First, handle dimensionality
         axes_a = self.axes
         axes_b = second.axes
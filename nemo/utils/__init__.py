@@ -21,6 +21,35 @@ from .nemo_logging import LogMode as logging_mode
 
 logging = _Logger()
 
-from .argparse import NemoArgParser
-from .exp_logging import ExpManager, get_logger
-from .helpers import *
+from .lazy_import import lazy_package
+
+# Everything else is imported on first use, e.g. helpers imports torch
+lazy_package(
+    __name__,
+    submodules=[
+        "argparse",
+        "checkpoint_writer",
+        "decorators",
+        "env_var_parsing",
+        "exp_logging",
+        "formatters",
+        "helpers",
+        "lr_policies",
+        "metaclasses",
+        "misc",
+    ],
+    attributes={
+        "NemoArgParser": ".argparse",
+        "AsyncCheckpointWriter": ".checkpoint_writer",
+        "ExpManager": ".exp_logging",
+        "get_logger": ".exp_logging",
+        "rgetattr": ".helpers",
+        "rsetattr": ".helpers",
+        "get_checkpoint_from_dir": ".helpers",
+        "get_device": ".helpers",
+        "get_cuda_device": ".helpers",
+        "is_distributed_placement": ".helpers",
+        "get_distributed_device": ".helpers",
+        "maybe_download_from_cloud": ".helpers",
+    },
+)
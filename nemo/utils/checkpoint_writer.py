@@ -0,0 +1,124 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['AsyncCheckpointWriter']
+
+import io
+import os
+import queue
+import threading
+
+from nemo.utils import logging
+
+
+class AsyncCheckpointWriter(object):
+    """Writes checkpoints to disk in a background thread.
+
+    save() serializes every file of a checkpoint into CPU memory, which is as fast as copying the state to the host,
+    and hands the bytes over to a background thread. The thread writes every file to a temporary file in the same
+    directory and atomically renames it, so a checkpoint file is either complete or missing, even if training is
+    killed. Checkpoint files are committed in the order they were saved.
+
+    The writer remembers the files of the checkpoints it committed and deletes the files of the oldest ones once there
+    are more than checkpoints_to_keep, without scanning the directory.
+
+    Args:
+        checkpoints_to_keep (int): number of most recent checkpoints to keep, None to keep all of them
+        max_pending (int): number of checkpoints which can wait to be written. save() blocks while there are more,
+            which bounds the host memory used by the writer.
+    """
+
+    def __init__(self, checkpoints_to_keep=None, max_pending=2):
+        if checkpoints_to_keep is not None and checkpoints_to_keep < 1:
+            raise ValueError(f"checkpoints_to_keep must be at least 1, got {checkpoints_to_keep}")
+        self._ckpt2keep = checkpoints_to_keep
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Files of the committed checkpoints, oldest first
+        self._committed = []
+        self._error = None
+        self._thread = None
+
+    def save(self, files, name=None):
+        """Snapshots a checkpoint and queues it for writing.
+
+        Args:
+            files (dict): {path -> function which writes the contents of the file to a given file object}, e.g.
+                {"encoder.pt": lambda f: torch.save(state_dict, f)}. The functions are called before save() returns.
+            name (str): name of the checkpoint for logging
+        """
+        self._raise_error()
+        snapshot = []
+        for path, save_fn in files.items():
+            buffer = io.BytesIO()
+            save_fn(buffer)
+            # Modules without a state, such as data layers, do not write anything
+            if buffer.tell() > 0:
+                snapshot.append((path, buffer.getvalue()))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+        self._queue.put((snapshot, name))
+
+    def wait(self):
+        """Blocks until all queued checkpoints are written. Raises the error of the background thread, if any."""
+        if self._thread is not None:
+            self._queue.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write_loop(self):
+        while True:
+            snapshot, name = self._queue.get()
+            try:
+                if self._error is None:
+                    self._write(snapshot, name)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, snapshot, name):
+        paths = []
+        for path, data in snapshot:
+            folder, basename = os.path.split(os.path.abspath(path))
+            os.makedirs(folder, exist_ok=True)
+            # Hidden temporary files are not matched by the checkpoint patterns of get_checkpoint_from_dir()
+            tmp_path = os.path.join(folder, f".{basename}.tmp-{os.getpid()}")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            paths.append(os.path.abspath(path))
+        if name is not None:
+            logging.info(f"Saved checkpoint: {name}")
+
+        # A checkpoint may overwrite files of an older one, those files now belong to the new checkpoint
+        new_paths = set(paths)
+        self._committed = [[p for p in old if p not in new_paths] for old in self._committed]
+        self._committed = [old for old in self._committed if old]
+        if paths:
+            self._committed.append(paths)
+        if self._ckpt2keep is not None:
+            while len(self._committed) > self._ckpt2keep:
+                for path in self._committed.pop(0):
+                    if os.path.exists(path):
+                        os.remove(path)
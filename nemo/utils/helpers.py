@@ -104,6 +104,31 @@ def get_cuda_device(placement):
     return torch.device("cuda" if placement in gpu_devices else "cpu")
 
 
+def is_distributed_placement(placement):
+    """
+    Checks whether nemo.core.DeviceType places modules on all workers of a
+    data parallel job
+    Args:
+        placement: nemo.core.DeviceType
+
+    Returns:
+        bool
+    """
+    return placement in [nemo.core.DeviceType.AllGpu, nemo.core.DeviceType.AllCpu]
+
+
+def get_distributed_device():
+    """
+    Returns the device tensors have to be on to take part in collectives of
+    the default process group: the current GPU for nccl, CPU otherwise
+    Returns:
+        torch.device
+    """
+    if torch.distributed.get_backend() == torch.distributed.Backend.NCCL:
+        return torch.device("cuda", torch.cuda.current_device())
+    return torch.device("cpu")
+
+
 # def get_neural_factory(local_rank,
 #                        precision,
 #                        backend):
@@ -0,0 +1,67 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+__all__ = ['lazy_package']
+
+import importlib
+import sys
+import types
+
+
+class _LazyPackage(types.ModuleType):
+    """Module type of packages whose submodules and attributes are imported on first access."""
+
+    def __getattr__(self, name):
+        # Only called if name was not found in the module's dictionary
+        lazy_attributes = self.__dict__["_lazy_attributes"]
+        if name in lazy_attributes:
+            value = getattr(importlib.import_module(lazy_attributes[name], self.__name__), name)
+        elif name in self.__dict__["_lazy_submodules"]:
+            value = importlib.import_module(f".{name}", self.__name__)
+        else:
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{name}'")
+        # Cache the value, later accesses do not go through __getattr__ anymore
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        names = set(super().__dir__())
+        names.update(self.__dict__["_lazy_attributes"])
+        names.update(self.__dict__["_lazy_submodules"])
+        return sorted(names)
+
+
+def lazy_package(name, submodules=(), attributes=None):
+    """Makes submodules and attributes of a package load on first access instead of at import time.
+
+    Call it from the __init__.py of the package, instead of importing the submodules:
+
+        lazy_package(__name__, submodules=["data"], attributes={"JasperEncoder": ".jasper"})
+
+    After that, `package.data` imports package.data and `package.JasperEncoder` (or
+    `from package import JasperEncoder`) imports package.jasper when they are used for the first time.
+
+    Args:
+        name (str): name of the package, usually __name__
+        submodules (list): names of submodules which are imported on first access
+        attributes (dict): {attribute name -> (relative) name of the module defining it}
+    """
+    package = sys.modules[name]
+    package._lazy_submodules = set(submodules)
+    package._lazy_attributes = dict(attributes or {})
+    # Changing the type of the module object (instead of replacing it in sys.modules) keeps references to it valid
+    package.__class__ = _LazyPackage
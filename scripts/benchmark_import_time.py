@@ -0,0 +1,85 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measures how long importing NeMo packages takes in a fresh interpreter.
+
+Example:
+    python scripts/benchmark_import_time.py --modules nemo nemo.collections.asr --max_seconds 0.5
+
+Exits with status 1 if the median import time of a module exceeds --max_seconds, so it can be used as a regression
+check. Use `python -X importtime -c "import nemo"` to find out which import is slow.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+_HEAVY_MODULES = [
+    "torch",
+    "torchvision",
+    "librosa",
+    "kaldi_io",
+    "sklearn",
+    "matplotlib",
+    "h5py",
+    "sentencepiece",
+]
+
+
+def time_import(module, repeats):
+    """Imports module in `repeats` fresh interpreters.
+
+    Returns:
+        list of wall times in seconds, list of the heavy modules loaded by the import
+    """
+    code = f"import sys; import {module}; print(','.join(m for m in {_HEAVY_MODULES!r} if m in sys.modules))"
+    times = []
+    loaded = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr.decode()}")
+        output = result.stdout
+        times.append(time.perf_counter() - start)
+        loaded = [m for m in output.decode().strip().split(",") if m]
+    return times, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of NeMo packages")
+    parser.add_argument("--modules", nargs="+", default=["nemo", "nemo.collections.asr", "nemo.collections.tts"])
+    parser.add_argument("--repeats", type=int, default=5, help="number of fresh interpreters per module")
+    parser.add_argument("--max_seconds", type=float, default=None, help="fail if a median import time is larger")
+    args = parser.parse_args()
+
+    # Time of starting the interpreter, which is subtracted from all measurements
+    baseline = statistics.median(time_import("sys", args.repeats)[0])
+    failed = False
+    for module in args.modules:
+        times, loaded = time_import(module, args.repeats)
+        median = statistics.median(times) - baseline
+        loaded = ", ".join(loaded) or "nothing heavy"
+        print(f"{module}: {median:.3f}s (min {min(times) - baseline:.3f}s), loads: {loaded}")
+        if args.max_seconds is not None and median > args.max_seconds:
+            failed = True
+    if failed:
+        print(f"Import time regression: more than {args.max_seconds}s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compares the masked normalize_batch of the ASR features with a loop over the items of the batch.
+
+Example:
+    python scripts/benchmark_normalize_batch.py --batch_sizes 1 8 32 --device cuda
+"""
+
+import argparse
+import time
+
+import torch
+
+from nemo.collections.asr.parts.features import CONSTANT, normalize_batch
+
+
+def normalize_batch_loop(x, seq_len, normalize_type):
+    """Normalizes every item of the batch separately, as normalize_batch used to."""
+    if normalize_type == "per_feature":
+        x_mean = torch.zeros((seq_len.shape[0], x.shape[1]), dtype=x.dtype, device=x.device)
+        x_std = torch.zeros((seq_len.shape[0], x.shape[1]), dtype=x.dtype, device=x.device)
+        for i in range(x.shape[0]):
+            x_mean[i, :] = x[i, :, : seq_len[i]].mean(dim=1)
+            x_std[i, :] = x[i, :, : seq_len[i]].std(dim=1)
+        x_std += CONSTANT
+        return (x - x_mean.unsqueeze(2)) / x_std.unsqueeze(2)
+    x_mean = torch.zeros(seq_len.shape, dtype=x.dtype, device=x.device)
+    x_std = torch.zeros(seq_len.shape, dtype=x.dtype, device=x.device)
+    for i in range(x.shape[0]):
+        x_mean[i] = x[i, :, : seq_len[i].item()].mean()
+        x_std[i] = x[i, :, : seq_len[i].item()].std()
+    x_std += CONSTANT
+    return (x - x_mean.view(-1, 1, 1)) / x_std.view(-1, 1, 1)
+
+
+def time_ms(fn, device, repeats):
+    fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark normalize_batch")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--features", type=int, default=64)
+    parser.add_argument("--frames", type=int, default=1600, help="frames of the longest item, 16s at 10ms stride")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    torch.manual_seed(0)
+    print(f"{'mode':>12} {'batch':>5} {'loop ms':>9} {'masked ms':>9} {'speedup':>7} {'max diff':>9}")
+    for normalize_type in ["per_feature", "all_features"]:
+        for batch_size in args.batch_sizes:
+            x = torch.randn(batch_size, args.features, args.frames, device=device) * 4 - 10
+            seq_len = torch.randint(args.frames // 4, args.frames + 1, (batch_size,), device=device)
+            seq_len[0] = args.frames
+            loop = time_ms(lambda: normalize_batch_loop(x, seq_len, normalize_type), device, args.repeats)
+            masked = time_ms(lambda: normalize_batch(x, seq_len, normalize_type), device, args.repeats)
+
+            valid = (torch.arange(args.frames, device=device) < seq_len.unsqueeze(1)).unsqueeze(1).expand_as(x)
+            diff = normalize_batch_loop(x, seq_len, normalize_type) - normalize_batch(x, seq_len, normalize_type)
+            max_diff = diff[valid].abs().max().item()
+            print(
+                f"{normalize_type:>12} {batch_size:>5} {loop:>9.3f} {masked:>9.3f} {loop / masked:>6.1f}x "
+                f"{max_diff:>9.2e}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parses ASR manifests and saves them in the binary columnar form, which data layers memory-map.
+
+Example:
+    python scripts/build_columnar_manifest.py --manifest train.json --output_dir train_columnar \\
+        --model_config examples/asr/configs/jasper_an4.yaml --num_workers 16
+
+Training then uses the directory as manifest_filepath of an AudioToTextDataLayer with columnar_manifest=True. Filters
+like min_duration are applied when loading, so one directory serves all of them.
+"""
+
+import argparse
+
+from ruamel.yaml import YAML
+
+import nemo
+from nemo.collections.asr.parts import collections, parsers
+
+logging = nemo.logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a columnar ASR manifest")
+    parser.add_argument("--manifest", type=str, required=True, help="manifest, can be comma-separated paths")
+    parser.add_argument("--output_dir", type=str, required=True)
+    parser.add_argument("--model_config", type=str, required=True, help="yaml with the labels of the model")
+    parser.add_argument("--parser", type=str, default="en", help="name of the transcript parser")
+    parser.add_argument("--no_normalize", action="store_true", help="do not normalize the transcripts")
+    parser.add_argument("--num_workers", type=int, default=4, help="number of processes parsing the manifest")
+    args = parser.parse_args()
+
+    yaml = YAML(typ="safe")
+    with open(args.model_config) as f:
+        labels = yaml.load(f)['labels']
+    # Same parser as AudioDataset
+    text_parser = parsers.make_parser(labels=labels, name=args.parser, do_normalize=not args.no_normalize)
+    collection = collections.ColumnarAudioText.from_manifests(
+        args.manifest.split(','), text_parser, num_workers=args.num_workers
+    )
+    collection.save(args.output_dir, text_parser)
+    logging.info(f"Saved {len(collection)} entries to {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Trims the silence of the audio of a manifest once, writing the kept window of every entry as its offset and
+duration.
+
+Example:
+    python scripts/compute_trim_boundaries.py --manifest train.json --output train_trimmed.json --num_workers 16
+
+Data layers given the new manifest with trim_silence=False read only the trimmed audio, instead of decoding all of
+it and trimming it with librosa every epoch. The other fields of the entries are kept.
+"""
+
+import argparse
+import json
+import multiprocessing
+from functools import partial
+from os.path import expanduser
+
+import nemo
+from nemo.collections.asr.parts.segment import trim_boundaries
+
+logging = nemo.logging
+
+
+def trim_line(line, sample_rate, trim_db):
+    """Returns the json line of a manifest entry with the offset and duration of its trimmed audio."""
+    item = json.loads(line)
+    audio_file = item['audio_filename'] if 'audio_filename' in item else item['audio_filepath']
+    offset, duration = trim_boundaries(
+        expanduser(audio_file),
+        target_sr=sample_rate,
+        offset=item.get('offset') or 0,
+        duration=item['duration'],
+        trim_db=trim_db,
+    )
+    item['offset'], item['duration'] = offset, duration
+    return json.dumps(item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute the silence trimming boundaries of an ASR manifest")
+    parser.add_argument("--manifest", type=str, required=True)
+    parser.add_argument("--output", type=str, required=True, help="manifest with the trimmed offsets and durations")
+    parser.add_argument("--sample_rate", type=int, default=16000, help="sample rate of the data layer")
+    parser.add_argument("--trim_db", type=float, default=60, help="threshold below the peak considered silence")
+    parser.add_argument("--num_workers", type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+
+    with open(expanduser(args.manifest)) as f:
+        lines = [line for line in f if line.strip()]
+    trim = partial(trim_line, sample_rate=args.sample_rate, trim_db=args.trim_db)
+    with multiprocessing.Pool(args.num_workers) as pool, open(args.output, 'w') as f:
+        for line in pool.imap(trim, lines, chunksize=16):
+            f.write(line + '\n')
+    logging.info(f"Wrote the trimmed boundaries of {len(lines)} entries to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# Copyright (c) 2020, NVIDIA CORPORATION. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Computes the log-mel features of all audio files of a manifest and stores them in a feature cache.
+
+Example:
+    python scripts/precompute_asr_features.py --manifest train.json --cache_dir feature_cache \\
+        --model_config examples/asr/configs/jasper_an4.yaml
+
+Training then reads the features with nemo.collections.asr.FeatureCacheDataLayer, given the same manifest, cache_dir
+and preprocessor_params (printed by this script), instead of decoding the audio and computing the features every step.
+"""
+
+import argparse
+import os
+
+import torch
+from ruamel.yaml import YAML
+
+import nemo
+import nemo.collections.asr as nemo_asr
+from nemo.collections.asr.parts import manifest
+from nemo.collections.asr.parts.feature_cache import FeatureCacheWriter, feature_cache_dir, segment_key
+from nemo.collections.asr.parts.features import WaveformFeaturizer
+
+logging = nemo.logging
+
+
+class AudioFiles(torch.utils.data.Dataset):
+    """Audio of the distinct files and segments of a manifest, longest first, so batches need little padding."""
+
+    def __init__(self, manifest_filepath, featurizer, trim=False):
+        segments = {}
+        for item in manifest.item_iter(manifest_filepath.split(',')):
+            key = segment_key(item['audio_file'], item['offset'], item['duration'])
+            segments[key] = (item['audio_file'], item['offset'], item['duration'])
+        self.keys = sorted(segments, key=lambda key: segments[key][2], reverse=True)
+        self.segments = segments
+        self.featurizer = featurizer
+        self.trim = trim
+
+    def __getitem__(self, index):
+        key = self.keys[index]
+        audio_file, offset, duration = self.segments[key]
+        if offset is None:
+            return key, self.featurizer.process(audio_file, trim=self.trim)
+        signal = self.featurizer.process(audio_file, offset=offset, duration=duration, trim=self.trim, keep_open=True)
+        return key, signal
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def collate(batch):
+    audio_files, signals = zip(*batch)
+    lengths = torch.tensor([len(signal) for signal in signals])
+    signal = torch.zeros(len(signals), lengths.max().item())
+    for i, s in enumerate(signals):
+        signal[i, : len(s)] = s
+    return audio_files, signal, lengths
+
+
+def preprocessor_params_from_config(config_file):
+    """Reads the AudioToMelSpectrogramPreprocessor params from a model config, in the format of the examples."""
+    yaml = YAML(typ="safe")
+    with open(config_file) as f:
+        config = yaml.load(f)
+    if 'AudioToMelSpectrogramPreprocessor' not in config:
+        raise ValueError(f"{config_file} has no AudioToMelSpectrogramPreprocessor section")
+    params = dict(config['AudioToMelSpectrogramPreprocessor'])
+    params = dict(params.get('init_params', params))
+    if 'sample_rate' in config:
+        params.setdefault('sample_rate', config['sample_rate'])
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute log-mel features of an ASR manifest")
+    parser.add_argument("--manifest", type=str, required=True, help="manifest, can be comma-separated paths")
+    parser.add_argument("--cache_dir", type=str, required=True, help="root directory of the feature cache")
+    parser.add_argument("--model_config", type=str, default=None, help="yaml with the preprocessor configuration")
+    parser.add_argument("--int_values", action="store_true", help="audio files are stored as int data")
+    parser.add_argument("--trim_silence", action="store_true", help="trim silence from the audio")
+    parser.add_argument("--dtype", type=str, default="float32", choices=["float32", "float16"])
+    parser.add_argument("--shard_size_mb", type=int, default=1024, help="approximate size of a shard file")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_workers", type=int, default=4)
+    parser.add_argument("--overwrite", action="store_true", help="recompute the features if they are cached")
+    args = parser.parse_args(argv)
+
+    preprocessor_params = preprocessor_params_from_config(args.model_config) if args.model_config else {}
+    featurizer_config = nemo_asr.FeatureCacheDataLayer.featurizer_config(
+        preprocessor_params, args.int_values, args.trim_silence
+    )
+    directory = feature_cache_dir(args.cache_dir, args.manifest, featurizer_config)
+    logging.info(f"preprocessor_params: {preprocessor_params}")
+    if not args.overwrite and os.path.isdir(directory):
+        logging.info(f"Features are already cached in {directory}")
+        return
+
+    nemo.core.NeuralModuleFactory(
+        placement=nemo.core.DeviceType.GPU if torch.cuda.is_available() else nemo.core.DeviceType.CPU
+    )
+    preprocessor = nemo_asr.AudioToMelSpectrogramPreprocessor(**preprocessor_params)
+    # Features are cached as in evaluation, without random dither
+    preprocessor.featurizer.eval()
+    preprocessor.featurizer.dither = 0.0
+    featurizer = WaveformFeaturizer(
+        sample_rate=preprocessor_params.get('sample_rate', 16000), int_values=args.int_values
+    )
+    loader = torch.utils.data.DataLoader(
+        AudioFiles(args.manifest, featurizer, trim=args.trim_silence),
+        batch_size=args.batch_size,
+        collate_fn=collate,
+        num_workers=args.num_workers,
+    )
+
+    writer = FeatureCacheWriter(
+        directory, featurizer_config, dtype=args.dtype, shard_size=args.shard_size_mb * 2 ** 20
+    )
+    try:
+        with torch.no_grad():
+            for audio_files, signal, lengths in loader:
+                lengths = lengths.to(preprocessor._device)
+                features = preprocessor.get_features(signal.to(preprocessor._device), lengths)
+                feature_lengths = preprocessor.featurizer.get_seq_len(lengths.float())
+                for audio_file, f, length in zip(audio_files, features, feature_lengths.tolist()):
+                    writer.append(audio_file, f[:, :length])
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import os
+import socket
+import tempfile
+from unittest import TestCase
+
+import pytest
+import torch
+import torch.multiprocessing as mp
+
+import nemo
+
+
+def _train_worker(rank, world_size, port, work_dir):
+    os.environ["MASTER_ADDR"] = "127.0.0.1"
+    os.environ["MASTER_PORT"] = str(port)
+    os.environ["RANK"] = str(rank)
+    os.environ["WORLD_SIZE"] = str(world_size)
+    nf = nemo.core.NeuralModuleFactory(
+        placement=nemo.core.DeviceType.AllCpu, local_rank=rank, log_dir=os.path.join(work_dir, "logs")
+    )
+    assert nf.world_size == world_size
+
+    dl = nemo.backends.pytorch.tutorials.RealFunctionDataLayer(n=256, batch_size=16)
+    fx = nemo.backends.pytorch.tutorials.TaylorNet(dim=4)
+    loss = nemo.backends.pytorch.tutorials.MSELoss()
+    x, y = dl()
+    loss_tensor = loss(predictions=fx(x=x), target=y)
+
+    eval_losses = []
+    callbacks = [
+        nemo.core.CheckpointCallback(folder=os.path.join(work_dir, "checkpoints"), step_freq=4),
+        nemo.core.EvaluatorCallback(
+            eval_tensors=[loss_tensor],
+            user_iter_callback=lambda values, global_vars: eval_losses.append(values[loss_tensor.unique_name]),
+            user_epochs_done_callback=lambda global_vars: {},
+            eval_step=8,
+        ),
+    ]
+    nf.train(
+        tensors_to_optimize=[loss_tensor],
+        callbacks=callbacks,
+        optimizer="sgd",
+        optimization_params={"lr": 0.01, "num_epochs": 1},
+    )
+    nf.sync_all_processes()
+    if rank == 0:
+        assert len(eval_losses) > 0 and all(len(losses) == world_size for losses in eval_losses)
+    torch.save(fx.state_dict(), os.path.join(work_dir, f"weights-{rank}.pt"))
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestDistributedCPU(TestCase):
+    @pytest.mark.system
+    def test_data_parallel_training_gloo(self):
+        world_size = 2
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        with tempfile.TemporaryDirectory() as work_dir:
+            mp.spawn(_train_worker, args=(world_size, port, work_dir), nprocs=world_size, join=True)
+
+            # Gradients were averaged over all workers, so all replicas are identical
+            weights = [torch.load(os.path.join(work_dir, f"weights-{rank}.pt")) for rank in range(world_size)]
+            for name, value in weights[0].items():
+                self.assertTrue(torch.equal(value, weights[1][name]))
+            self.assertTrue(
+                any(f.startswith("trainer-STEP-") for f in os.listdir(os.path.join(work_dir, "checkpoints")))
+            )
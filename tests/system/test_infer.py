@@ -16,13 +16,16 @@
 # limitations under the License.
 # =============================================================================
 
+import os
+import shutil
+import tempfile
 from unittest import TestCase
 
 import pytest
 import torch
 
 import nemo
-from nemo.backends.pytorch.nm import NonTrainableNM
+from nemo.backends.pytorch.nm import DataLayerNM, NonTrainableNM
 from nemo.core.neural_types import AxisKind, AxisType, ChannelType, NeuralType
 from nemo.utils.decorators import add_port_docs
 
@@ -65,6 +68,33 @@ class SubtractsTen(NonTrainableNM):
         return mod_in - 10
 
 
+class ZerosDataLayer(DataLayerNM):
+    """Emits zeros like nemo.backends.pytorch.common.ZerosDataLayer, but has JSON serializable init params, so its
+    outputs can be cached on disk.
+    """
+
+    def __init__(self, size, batch_size):
+        super().__init__()
+        self._batch_size = batch_size
+        self._dataset = torch.utils.data.TensorDataset(torch.zeros(size, 1))
+
+    @property
+    @add_port_docs()
+    def output_ports(self):
+        return {"dl_out": NeuralType((AxisType(AxisKind.Batch), AxisType(AxisKind.Dimension, 1)), ChannelType())}
+
+    def __len__(self):
+        return len(self._dataset)
+
+    @property
+    def data_iterator(self):
+        return None
+
+    @property
+    def dataset(self):
+        return self._dataset
+
+
 @pytest.mark.usefixtures("neural_factory")
 class TestInfer(TestCase):
     def setUp(self) -> None:
@@ -134,3 +164,122 @@ class TestInfer(TestCase):
                 tensors=[twenty_tensor, thirty_tensor], verbose=False, cache=True, use_cache=True
             )
         self.assertEqual(evaluated_tensors[0][0].squeeze().data, 10)
+
+    @pytest.mark.system
+    def test_infer_disk_cache(self):
+        def create_graph():
+            data_source = ZerosDataLayer(size=6, batch_size=2)
+            addten = AddsTen()
+            twenty_tensor = addten(mod_in=addten(mod_in=data_source()))
+            return twenty_tensor, SubtractsTen()(mod_in=twenty_tensor)
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            with self.assertRaisesRegex(ValueError, "no usable cache was found"):
+                self.nf.infer(tensors=[create_graph()[0]], verbose=False, use_cache=True, cache_dir=cache_dir)
+
+            twenty_tensor, _ = create_graph()
+            evaluated_tensors = self.nf.infer(tensors=[twenty_tensor], verbose=False, cache=True, cache_dir=cache_dir)
+            self.assertEqual(len(evaluated_tensors[0]), 3)
+            # The in-memory cache is not used
+            with self.assertRaisesRegex(ValueError, "use_cache was set, but cache was empty"):
+                self.nf.infer(tensors=[twenty_tensor], verbose=False, use_cache=True)
+
+            # Modules and tensors of a new session get new names, the cache is found by their configuration
+            self.nf = nemo.core.NeuralModuleFactory(placement=self.nf.placement)
+            _, new_ten_tensor = create_graph()
+            chunks = list(
+                self.nf.infer_iter(tensors=[new_ten_tensor], verbose=False, use_cache=True, cache_dir=cache_dir)
+            )
+            self.assertEqual(len(chunks), 3)
+            for chunk in chunks:
+                self.assertTrue(torch.equal(chunk[0][0], torch.full((2, 1), 10.0)))
+
+            # Modules configured by params which cannot be serialized to JSON are not cached
+            data_source = nemo.backends.pytorch.common.ZerosDataLayer(
+                size=6,
+                dtype=torch.FloatTensor,
+                batch_size=2,
+                output_ports={
+                    "dl_out": NeuralType((AxisType(AxisKind.Batch), AxisType(AxisKind.Dimension, 1)), ChannelType())
+                },
+            )
+            with self.assertRaisesRegex(ValueError, "cannot be serialized to JSON"):
+                self.nf.infer(
+                    tensors=[AddsTen()(mod_in=data_source())], verbose=False, cache=True, cache_dir=cache_dir
+                )
+        finally:
+            shutil.rmtree(cache_dir)
+
+    @pytest.mark.system
+    def test_infer_disk_cache_closed_early(self):
+        data_source = ZerosDataLayer(size=6, batch_size=2)
+        ten_tensor = AddsTen()(mod_in=data_source())
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            chunks = self.nf.infer_iter(tensors=[ten_tensor], verbose=False, cache=True, cache_dir=cache_dir)
+            self.assertTrue(torch.equal(next(chunks)[0][0], torch.full((2, 1), 10.0)))
+            chunks.close()
+            # The incomplete shard is discarded
+            for _, dirs, files in os.walk(cache_dir):
+                self.assertEqual(files, [])
+                self.assertFalse(any(".tmp-" in d for d in dirs))
+            with self.assertRaisesRegex(ValueError, "no usable cache was found"):
+                self.nf.infer(tensors=[ten_tensor], verbose=False, use_cache=True, cache_dir=cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    @pytest.mark.system
+    def test_infer_iter(self):
+        data_source = nemo.backends.pytorch.common.ZerosDataLayer(
+            size=10,
+            dtype=torch.FloatTensor,
+            batch_size=2,
+            output_ports={
+                "dl_out": NeuralType((AxisType(AxisKind.Batch), AxisType(AxisKind.Dimension, 1)), ChannelType())
+            },
+        )
+        addten = AddsTen()
+        ten_tensor = addten(mod_in=data_source())
+        twenty_tensor = addten(mod_in=ten_tensor)
+
+        chunks = list(self.nf.infer_iter(tensors=[ten_tensor, twenty_tensor], verbose=False, batches_per_chunk=2))
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [2, 2, 1])
+        for chunk in chunks:
+            self.assertEqual(len(chunk), 2)
+            for batch in chunk[0]:
+                self.assertTrue(torch.equal(batch, torch.full((2, 1), 10.0)))
+            for batch in chunk[1]:
+                self.assertTrue(torch.equal(batch, torch.full((2, 1), 20.0)))
+
+        # Results are the same as the ones of infer()
+        evaluated_tensors = self.nf.infer(tensors=[ten_tensor, twenty_tensor], verbose=False)
+        for i in range(2):
+            streamed = [batch for chunk in chunks for batch in chunk[i]]
+            self.assertEqual(len(streamed), len(evaluated_tensors[i]))
+            for s, e in zip(streamed, evaluated_tensors[i]):
+                self.assertTrue(torch.equal(s, e))
+
+        with self.assertRaisesRegex(ValueError, "batches_per_chunk"):
+            self.nf.infer_iter(tensors=[ten_tensor], batches_per_chunk=0)
+
+    @pytest.mark.system
+    def test_infer_sink(self):
+        data_source = nemo.backends.pytorch.common.ZerosDataLayer(
+            size=10,
+            dtype=torch.FloatTensor,
+            batch_size=2,
+            output_ports={
+                "dl_out": NeuralType((AxisType(AxisKind.Batch), AxisType(AxisKind.Dimension, 1)), ChannelType())
+            },
+        )
+        ten_tensor = AddsTen()(mod_in=data_source())
+
+        chunks = []
+        result = self.nf.infer(tensors=[ten_tensor], verbose=False, sink=chunks.append, batches_per_chunk=3)
+        self.assertIsNone(result)
+        self.assertEqual([len(chunk[0]) for chunk in chunks], [3, 2])
+
+        with self.assertRaisesRegex(ValueError, "cache requires cache_dir when streaming"):
+            self.nf.infer(tensors=[ten_tensor], verbose=False, sink=chunks.append, cache=True)
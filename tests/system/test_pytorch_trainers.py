@@ -16,9 +16,13 @@
 # limitations under the License.
 # =============================================================================
 
+import json
+import os
+import tempfile
 from unittest import TestCase
 
 import pytest
+import torch
 
 import nemo
 
@@ -79,3 +83,122 @@ class TestPytorchTrainers(TestCase):
         optimizer.train(
             tensors_to_optimize=[loss_tensor], optimizer="sgd", optimization_params={"lr": 0.0003, "num_epochs": 1},
         )
+
+    @pytest.mark.system
+    def test_simple_train_async_nan_check(self):
+        """ Train test with non-finite losses checked every few steps """
+        x_data = torch.rand(64, 1)
+        y_data = torch.sin(x_data)
+        # The loss of the second batch is NaN
+        y_data[32:] = float("nan")
+
+        def train(optimizer_class, nan_policy, num_batches, initial_state):
+            data_source = nemo.backends.pytorch.tutorials.RealFunctionDataLayer(n=64, batch_size=32)
+            data_source._data_iterator = torch.utils.data.DataLoader(
+                torch.utils.data.TensorDataset(x_data[: 32 * num_batches], y_data[: 32 * num_batches]), batch_size=32
+            )
+            trainable_module = nemo.backends.pytorch.tutorials.TaylorNet(dim=4)
+            if initial_state is not None:
+                trainable_module.load_state_dict(initial_state)
+            loss = nemo.backends.pytorch.tutorials.MSELoss()
+            x, y = data_source()
+            loss_tensor = loss(predictions=trainable_module(x=x), target=y)
+            actions = nemo.backends.pytorch.actions.PtActions()
+            actions.train(
+                tensors_to_optimize=[loss_tensor],
+                optimizer=optimizer_class,
+                optimization_params={"lr": 0.0003, "num_epochs": 1},
+                nan_check_freq=8,
+                nan_policy=nan_policy,
+            )
+            return trainable_module.state_dict(), actions.optimizers[0].state_dict()["state"]
+
+        for optimizer_class in ["novograd", "sgd"]:
+            initial_state = nemo.backends.pytorch.tutorials.TaylorNet(dim=4).state_dict()
+            one_step, one_step_optimizer = train(optimizer_class, "skip", 1, initial_state)
+
+            # The NaN step leaves the parameters and the optimizer state as after the first step
+            with self.assertLogs("nemo_logger", level="WARNING") as logs:
+                params, optimizer_state = train(optimizer_class, "skip", 2, initial_state)
+            self.assertIn("Loss was NaN or inf in 1 steps, these updates were skipped", "\n".join(logs.output))
+            for name, value in one_step.items():
+                self.assertTrue(torch.equal(params[name], value))
+            self.assertEqual(optimizer_state.keys(), one_step_optimizer.keys())
+            for index, state in one_step_optimizer.items():
+                for key, value in state.items():
+                    self.assertTrue(torch.equal(torch.as_tensor(optimizer_state[index][key]), torch.as_tensor(value)))
+            if optimizer_class == "novograd":
+                self.assertEqual([float(state["step"]) for state in optimizer_state.values()], [1.0, 1.0])
+
+            # Both steps are rolled back
+            with self.assertLogs("nemo_logger", level="WARNING") as logs:
+                params, optimizer_state = train(optimizer_class, "rollback", 2, initial_state)
+            self.assertIn("rolling back to the last good state", "\n".join(logs.output))
+            for name, value in initial_state.items():
+                self.assertTrue(torch.equal(params[name], value))
+            self.assertEqual(optimizer_state, {})
+
+    @pytest.mark.system
+    def test_simple_train_profiled(self):
+        """ Train test with a window of profiled steps """
+
+        class ScalarRecorder:
+            def __init__(self):
+                self.scalars = []
+
+            def add_scalar(self, tag, value, step):
+                self.scalars.append((tag, step))
+
+        data_source = nemo.backends.pytorch.tutorials.RealFunctionDataLayer(n=320, batch_size=32)
+        trainable_module1 = nemo.backends.pytorch.tutorials.TaylorNet(dim=4)
+        trainable_module2 = nemo.backends.pytorch.tutorials.TaylorNet(dim=2)
+        loss = nemo.backends.pytorch.tutorials.MSELoss()
+        x, y = data_source()
+        loss_tensor = loss(predictions=trainable_module2(x=trainable_module1(x=x)), target=y)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_file = os.path.join(tmp_dir, "trace.json")
+            tb_writer = ScalarRecorder()
+            profiler = nemo.backends.pytorch.StepProfiler(
+                first_step=2, num_steps=3, tb_writer=tb_writer, trace_file=trace_file
+            )
+            optimizer = nemo.backends.pytorch.actions.PtActions()
+            optimizer.train(
+                tensors_to_optimize=[loss_tensor],
+                optimizer="sgd",
+                optimization_params={"lr": 0.0003, "num_epochs": 1},
+                profiler=profiler,
+            )
+            with open(trace_file) as f:
+                events = json.load(f)["traceEvents"]
+
+        regions = {"data_wait", "forward", "forward/TaylorNet", "forward/TaylorNet_1", "forward/MSELoss"}
+        regions |= {"backward", "optimizer", "callbacks"}
+        self.assertEqual({event["name"] for event in events}, regions)
+        self.assertEqual({event["args"]["step"] for event in events}, {2, 3, 4})
+        self.assertEqual({tag for tag, _ in tb_writer.scalars}, {f"profiler/time_ms/{r}" for r in regions})
+        self.assertEqual({step for _, step in tb_writer.scalars}, {2, 3, 4})
+
+    @pytest.mark.system
+    def test_simple_train_checkpoints(self):
+        """ Train test with checkpoints written in the background """
+        data_source = nemo.backends.pytorch.tutorials.RealFunctionDataLayer(n=320, batch_size=32)
+        trainable_module = nemo.backends.pytorch.tutorials.TaylorNet(dim=4)
+        loss = nemo.backends.pytorch.tutorials.MSELoss()
+        x, y = data_source()
+        loss_tensor = loss(predictions=trainable_module(x=x), target=y)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            optimizer = nemo.backends.pytorch.actions.PtActions()
+            optimizer.train(
+                tensors_to_optimize=[loss_tensor],
+                optimizer="sgd",
+                optimization_params={"lr": 0.0003, "num_epochs": 1},
+                callbacks=[nemo.core.CheckpointCallback(folder=tmp_dir, step_freq=2, checkpoints_to_keep=2)],
+            )
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                ["TaylorNet-STEP-10.pt", "TaylorNet-STEP-8.pt", "trainer-STEP-10.pt", "trainer-STEP-8.pt"],
+            )
+            state = torch.load(os.path.join(tmp_dir, "trainer-STEP-10.pt"))
+            self.assertEqual(state["step"], 10)
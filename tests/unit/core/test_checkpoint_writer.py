@@ -0,0 +1,90 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import pytest
+import torch
+
+from nemo.utils import AsyncCheckpointWriter
+
+
+class TestAsyncCheckpointWriter(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    def save(self, writer, step, state):
+        files = {
+            os.path.join(self.folder, f"{name}-STEP-{step}.pt"): lambda f, s=s: torch.save(s, f)
+            for name, s in state.items()
+        }
+        writer.save(files)
+
+    @pytest.mark.unit
+    def test_snapshot_and_retention(self):
+        writer = AsyncCheckpointWriter(checkpoints_to_keep=2)
+        weights = torch.zeros(4)
+        for step in range(1, 5):
+            weights += 1
+            self.save(writer, step, {"encoder": {"w": weights}, "trainer": {"step": step}})
+        writer.wait()
+
+        self.assertEqual(
+            sorted(os.listdir(self.folder)),
+            ["encoder-STEP-3.pt", "encoder-STEP-4.pt", "trainer-STEP-3.pt", "trainer-STEP-4.pt"],
+        )
+        # Checkpoints contain the state at the time of save(), not of the write
+        encoder = torch.load(os.path.join(self.folder, "encoder-STEP-3.pt"))
+        self.assertTrue(torch.equal(encoder["w"], torch.full((4,), 3.0)))
+        self.assertEqual(torch.load(os.path.join(self.folder, "trainer-STEP-4.pt"))["step"], 4)
+
+    @pytest.mark.unit
+    def test_overwritten_files_are_kept(self):
+        writer = AsyncCheckpointWriter(checkpoints_to_keep=1)
+        self.save(writer, 1, {"encoder": {"w": torch.ones(1)}})
+        # The same checkpoint is saved again, e.g. at the end of training
+        self.save(writer, 1, {"encoder": {"w": torch.ones(1)}})
+        self.save(writer, 1, {"encoder": {"w": torch.ones(1)}, "decoder": {"w": torch.ones(1)}})
+        writer.wait()
+        self.assertEqual(sorted(os.listdir(self.folder)), ["decoder-STEP-1.pt", "encoder-STEP-1.pt"])
+
+    @pytest.mark.unit
+    def test_empty_files_are_skipped(self):
+        writer = AsyncCheckpointWriter()
+        writer.save({os.path.join(self.folder, "datalayer.pt"): lambda f: None})
+        writer.wait()
+        self.assertEqual(os.listdir(self.folder), [])
+
+    @pytest.mark.unit
+    def test_write_error(self):
+        not_a_folder = os.path.join(self.folder, "file")
+        open(not_a_folder, "w").close()
+        writer = AsyncCheckpointWriter()
+        writer.save({os.path.join(not_a_folder, "encoder.pt"): lambda f: torch.save({}, f)})
+        with self.assertRaises(OSError):
+            writer.wait()
+        # The writer keeps working after the error was raised
+        self.save(writer, 1, {"encoder": {}})
+        writer.wait()
+        self.assertIn("encoder-STEP-1.pt", os.listdir(self.folder))
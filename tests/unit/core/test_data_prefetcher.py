@@ -0,0 +1,95 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import threading
+from unittest import TestCase
+
+import pytest
+import torch
+
+from nemo.backends.pytorch.data_prefetcher import DataPrefetcher
+from nemo.backends.pytorch.tutorials import RealFunctionDataLayer
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestDataPrefetcher(TestCase):
+    def setUp(self) -> None:
+        dataset = torch.utils.data.TensorDataset(torch.arange(20).float(), torch.arange(20))
+        self.dataloader = torch.utils.data.DataLoader(dataset, batch_size=4)
+
+    @pytest.mark.unit
+    def test_prefetched_batches(self):
+        for num_batches in [0, 1, 3]:
+            prefetcher = DataPrefetcher(self.dataloader, torch.device("cpu"), num_batches=num_batches)
+            self.assertEqual(len(prefetcher), 5)
+            batches = list(prefetcher)
+            self.assertEqual(len(batches), 5)
+            for i, (x, y) in enumerate(batches):
+                self.assertTrue(torch.equal(y, torch.arange(4 * i, 4 * i + 4)))
+                self.assertTrue(torch.equal(x, y.float()))
+
+    @pytest.mark.unit
+    def test_single_tensor_batches(self):
+        batches = list(DataPrefetcher([torch.ones(2), torch.zeros(2)], "cpu"))
+        self.assertEqual(len(batches), 2)
+        self.assertTrue(torch.equal(batches[1][0], torch.zeros(2)))
+
+    @pytest.mark.unit
+    def test_early_stop(self):
+        num_threads = threading.active_count()
+        for i, _ in enumerate(DataPrefetcher(self.dataloader, "cpu", num_batches=1)):
+            if i == 1:
+                break
+        self.assertEqual(threading.active_count(), num_threads)
+
+    @pytest.mark.unit
+    def test_exception_is_propagated(self):
+        def failing_iterable():
+            yield torch.ones(1)
+            raise RuntimeError("data loading failed")
+
+        with self.assertRaisesRegex(RuntimeError, "data loading failed"):
+            list(DataPrefetcher(failing_iterable(), "cpu"))
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('GPU')
+    def test_cuda_prefetch(self):
+        for x, y in DataPrefetcher(self.dataloader, torch.device("cuda")):
+            self.assertTrue(x.is_cuda)
+            self.assertTrue(torch.equal(x, y.float()))
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('GPU')
+    def test_cuda_pinned_buffers_are_reused(self):
+        # Batches of different sizes are staged in the same pinned buffers
+        batches = [(torch.full((n, 3), float(n)), torch.arange(n)) for n in [4, 2, 5, 1, 3, 5]]
+        for num_batches in [1, 2]:
+            prefetched = list(DataPrefetcher(batches, torch.device("cuda"), num_batches=num_batches))
+            self.assertEqual(len(prefetched), len(batches))
+            for (x, y), (expected_x, expected_y) in zip(prefetched, batches):
+                self.assertTrue(torch.equal(x.cpu(), expected_x))
+                self.assertTrue(torch.equal(y.cpu(), expected_y))
+
+    @pytest.mark.unit
+    def test_prefetch_batches_setter(self):
+        dl = RealFunctionDataLayer(n=10, batch_size=2)
+        self.assertEqual(dl.prefetch_batches, 2)
+        dl.prefetch_batches = 0
+        self.assertEqual(dl.prefetch_batches, 0)
+        with self.assertRaises(ValueError):
+            dl.prefetch_batches = -1
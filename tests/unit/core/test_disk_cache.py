@@ -0,0 +1,108 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase
+
+import pytest
+import torch
+
+from nemo.backends.pytorch.disk_cache import DiskCacheReader, DiskCacheWriter, find_disk_cache, tensor_cache_keys
+
+
+class _Linear(torch.nn.Linear):
+    """Stands in for a trainable module of a call chain."""
+
+    def __init__(self, init_params):
+        super().__init__(2, 2)
+        self.init_params = init_params
+
+
+class TestDiskCache(TestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir)
+
+    @pytest.mark.unit
+    def test_round_trip(self):
+        keys = {"audio~~~dl~~~0": "a", "length~~~dl~~~1": "b", "logits~~~enc~~~2": "c"}
+        batches = [
+            {
+                "audio~~~dl~~~0": torch.randn(2, 3),
+                "length~~~dl~~~1": torch.tensor([3, 2]),
+                "logits~~~enc~~~2": torch.randn(2, 5).half(),
+            },
+            {
+                "audio~~~dl~~~0": torch.randn(1, 7).double(),
+                "length~~~dl~~~1": torch.tensor([7]),
+                "logits~~~enc~~~2": torch.zeros(1, 0),
+            },
+        ]
+        writer = DiskCacheWriter(self.cache_dir, keys)
+        for batch in batches:
+            writer.append(batch)
+        # Incomplete shards are not visible
+        self.assertIsNone(find_disk_cache(self.cache_dir, keys, ["a", "b"]))
+        writer.close()
+
+        # Names of the tensors change in a new session, keys do not
+        new_keys = {"audio~~~dl~~~3": "a", "length~~~dl~~~4": "b", "other~~~x~~~5": "d"}
+        rank_dir = find_disk_cache(self.cache_dir, new_keys, ["a", "b"])
+        self.assertIsNotNone(rank_dir)
+        self.assertIsNone(find_disk_cache(self.cache_dir, new_keys, ["d"]))
+        self.assertIsNone(find_disk_cache(self.cache_dir, new_keys, ["a"], rank=0, world_size=2))
+
+        reader = DiskCacheReader(rank_dir, new_keys)
+        self.assertEqual(len(reader), 2)
+        for batch, cached in zip(batches, reader):
+            self.assertEqual(set(cached.keys()), {"audio~~~dl~~~3", "length~~~dl~~~4"})
+            for old_name, new_name in [("audio~~~dl~~~0", "audio~~~dl~~~3"), ("length~~~dl~~~1", "length~~~dl~~~4")]:
+                self.assertEqual(cached[new_name].dtype, batch[old_name].dtype)
+                self.assertTrue(torch.equal(cached[new_name], batch[old_name]))
+
+    @pytest.mark.unit
+    def test_abort(self):
+        writer = DiskCacheWriter(self.cache_dir, {"x~~~dl~~~0": "a"})
+        writer.append({"x~~~dl~~~0": torch.ones(3)})
+        writer.abort()
+        self.assertIsNone(find_disk_cache(self.cache_dir, {"x~~~dl~~~0": "a"}, ["a"]))
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, os.listdir(self.cache_dir)[0])), [])
+
+    @pytest.mark.unit
+    def test_keys(self):
+        def key(module):
+            call_chain = [(module, {}, {"out": SimpleNamespace(unique_name="out~~~linear~~~0")})]
+            return tensor_cache_keys(call_chain)["out~~~linear~~~0"]
+
+        module = _Linear({"dim": 2})
+        other = _Linear({"dim": 2})
+        self.assertNotEqual(key(other), key(module))
+        # Modules with the same configuration and weights, e.g. in a new session, produce the same outputs
+        other.load_state_dict(module.state_dict())
+        self.assertEqual(key(other), key(module))
+        with torch.no_grad():
+            other.weight.add_(1)
+        self.assertNotEqual(key(other), key(module))
+
+        with self.assertRaisesRegex(ValueError, "cannot be serialized to JSON"):
+            key(_Linear({"dtype": torch.float32}))
@@ -0,0 +1,96 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import os
+import tempfile
+from unittest import TestCase
+
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from nemo.backends.pytorch.distributed_gather import DistributedGatherer, pack_tensors, unpack_tensors
+
+
+def _outputs(rank):
+    """Outputs of a worker: a different number of batches with different shapes on every rank"""
+    return {
+        "loss": [torch.tensor(float(rank + i)) for i in range(rank + 2)],
+        "logits": [torch.full((rank + 1, 2, 1, 3, 1, 2), float(i), dtype=torch.float16) for i in range(rank + 2)],
+        "lengths": [torch.arange(rank + i + 1) for i in range(rank + 2)],
+    }
+
+
+def _gather_worker(rank, world_size, init_file, result_file):
+    dist.init_process_group("gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size)
+    outputs = _outputs(rank)
+    gatherer = DistributedGatherer(list(outputs.keys()))
+    for name, tensors in outputs.items():
+        for t in tensors:
+            gatherer.append(name, t)
+    gathered = gatherer.gather()
+    # Outputs are only gathered on worker 0
+    if rank == 0:
+        torch.save(gathered, result_file)
+    elif gathered is not None:
+        raise AssertionError(f"Worker {rank} received the gathered outputs")
+    dist.destroy_process_group()
+
+
+class TestDistributedGather(TestCase):
+    @pytest.mark.unit
+    def test_pack_unpack(self):
+        tensors = [
+            torch.tensor(3.5),
+            torch.randn(2, 1, 3, 1, 2, 2),
+            torch.arange(7, dtype=torch.int32),
+            torch.tensor([True, False]),
+            torch.randn(3, 4).t(),
+            torch.empty(0, 5, dtype=torch.float64),
+        ]
+        buffer = pack_tensors(tensors)
+        self.assertEqual(buffer.dtype, torch.uint8)
+        padded = torch.cat([buffer, torch.zeros(13, dtype=torch.uint8)])
+        unpacked = unpack_tensors(padded)
+        self.assertEqual(len(unpacked), len(tensors))
+        for t, u in zip(tensors, unpacked):
+            self.assertEqual(t.dtype, u.dtype)
+            self.assertTrue(torch.equal(t, u))
+        self.assertEqual(unpack_tensors(pack_tensors([])), [])
+
+    @pytest.mark.unit
+    def test_gather_gloo(self):
+        world_size = 3
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result_file = os.path.join(tmp_dir, "gathered.pt")
+            mp.spawn(
+                _gather_worker,
+                args=(world_size, os.path.join(tmp_dir, "init"), result_file),
+                nprocs=world_size,
+                join=True,
+            )
+            gathered = torch.load(result_file)
+
+        for name in ["loss", "logits", "lengths"]:
+            self.assertEqual(len(gathered[name]), world_size)
+            for rank in range(world_size):
+                expected = _outputs(rank)[name]
+                self.assertEqual(len(gathered[name][rank]), len(expected))
+                for t, e in zip(gathered[name][rank], expected):
+                    self.assertTrue(torch.equal(t, e))
@@ -0,0 +1,107 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+from unittest import TestCase
+
+import pytest
+import torch
+
+import nemo
+from nemo.backends.pytorch.tutorials import MSELoss, RealFunctionDataLayer, TaylorNet
+
+
+class CountingDataset(torch.utils.data.Dataset):
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.num_reads = 0
+
+    def __len__(self):
+        return len(self.dataset)
+
+    def __getitem__(self, idx):
+        self.num_reads += 1
+        return self.dataset[idx]
+
+
+class MapStyleRealFunctionDataLayer(RealFunctionDataLayer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._num_workers = 0
+        self._dataset = CountingDataset(self._data_iterator.dataset)
+
+    @property
+    def data_iterator(self):
+        return None
+
+    @property
+    def dataset(self):
+        return self._dataset
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestEvalDataCache(TestCase):
+    def setUp(self) -> None:
+        self.dl = MapStyleRealFunctionDataLayer(n=20, batch_size=4)
+        x, y = self.dl()
+        y_pred = TaylorNet(dim=4)(x=x)
+        self.loss = MSELoss()(predictions=y_pred, target=y)
+        self.losses = []
+
+    def _callback(self, cache_on_device):
+        def iter_callback(values, global_vars):
+            self.losses.append(values[self.loss.unique_name][0].item())
+
+        return nemo.core.EvaluatorCallback(
+            eval_tensors=[self.loss],
+            user_iter_callback=iter_callback,
+            user_epochs_done_callback=lambda global_vars: {},
+            cache_on_device=cache_on_device,
+        )
+
+    @pytest.mark.unit
+    def test_dataloader_is_reused(self):
+        actions = nemo.backends.pytorch.PtActions()
+        callback = self._callback(cache_on_device=False)
+        actions._eval([self.loss], callback, 0)
+        dataloader = actions._get_eval_dataloader(self.dl)
+        actions._eval([self.loss], callback, 1)
+        self.assertIs(actions._get_eval_dataloader(self.dl), dataloader)
+        self.assertEqual(self.dl.dataset.num_reads, 40)
+
+        actions.clear_eval_data_cache()
+        self.assertIsNot(actions._get_eval_dataloader(self.dl), dataloader)
+
+    @pytest.mark.unit
+    def test_cache_on_device(self):
+        actions = nemo.backends.pytorch.PtActions()
+        callback = self._callback(cache_on_device=True)
+        for step in range(3):
+            actions._eval([self.loss], callback, step)
+        # Data is loaded only by the first evaluation
+        self.assertEqual(self.dl.dataset.num_reads, 20)
+        self.assertEqual(len(self.losses), 15)
+        self.assertEqual(self.losses[:5], self.losses[5:10])
+        self.assertEqual(self.losses[:5], self.losses[10:])
+
+        # Other callbacks of the data layer do not read the cache
+        actions._eval([self.loss], self._callback(cache_on_device=False), 3)
+        self.assertEqual(self.dl.dataset.num_reads, 40)
+
+        actions.clear_eval_data_cache()
+        actions._eval([self.loss], callback, 4)
+        self.assertEqual(self.dl.dataset.num_reads, 60)
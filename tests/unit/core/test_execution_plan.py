@@ -0,0 +1,101 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+from unittest import TestCase
+
+import pytest
+
+import nemo
+from nemo.backends.pytorch import ExecutionPlan
+from nemo.backends.pytorch.tutorials import MSELoss, RealFunctionDataLayer, TaylorNet
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestExecutionPlan(TestCase):
+    @pytest.mark.unit
+    def test_topological_order(self):
+        dl = RealFunctionDataLayer(n=10, batch_size=2)
+        fx = TaylorNet(dim=4)
+        loss = MSELoss()
+        x, y = dl()
+        y_pred = fx(x=x)
+        loss_tensor = loss(predictions=y_pred, target=y)
+
+        plan = ExecutionPlan.compile([loss_tensor])
+        self.assertEqual(plan.modules, [dl, fx, loss])
+        self.assertIs(plan.data_layer, dl)
+        # Both data layer outputs are used by the DAG
+        self.assertIs(plan.call_chain[0][2]["x"], x)
+        self.assertIs(plan.call_chain[0][2]["y"], y)
+        self.assertEqual(plan.call_chain[2][1], {"predictions": y_pred, "target": y})
+
+    @pytest.mark.unit
+    def test_long_chain(self):
+        dl = RealFunctionDataLayer(n=10, batch_size=2)
+        x, y = dl()
+        modules = []
+        for _ in range(300):
+            fx = TaylorNet(dim=1)
+            modules.append(fx)
+            x = fx(x=x)
+        plan = ExecutionPlan.compile([x])
+        self.assertEqual(plan.modules, [dl] + modules)
+
+    @pytest.mark.unit
+    def test_multiple_data_layers(self):
+        dl = RealFunctionDataLayer(n=10, batch_size=2)
+        x, _ = dl()
+        fx = TaylorNet(dim=4)
+        y_pred = fx(x=x)
+        plan = ExecutionPlan.compile([y_pred])
+        self.assertEqual(len(plan), 2)
+
+        dl2 = RealFunctionDataLayer(n=10, batch_size=2)
+        _, y2 = dl2()
+        with self.assertRaisesRegex(ValueError, "more than one DataLayer"):
+            ExecutionPlan.compile([MSELoss()(predictions=y_pred, target=y2)])
+
+    @pytest.mark.unit
+    def test_plan_is_reused(self):
+        dl = RealFunctionDataLayer(n=10, batch_size=2)
+        fx = TaylorNet(dim=4)
+        loss = MSELoss()
+        x, y = dl()
+        y_pred = fx(x=x)
+        loss_tensor = loss(predictions=y_pred, target=y)
+
+        actions = nemo.backends.pytorch.PtActions()
+        get_plan = actions._PtActions__get_top_sorted_modules_and_dataloader
+        call_chain, dataset = get_plan(hook=[loss_tensor, y_pred])
+        self.assertIs(dataset, dl.dataset)
+        # Order and duplicates of the hook tensors do not matter
+        hooks = [y_pred, loss_tensor, y_pred]
+        self.assertIs(get_plan(hook=hooks)[0], call_chain)
+        self.assertEqual(hooks, [y_pred, loss_tensor])
+        self.assertIsNot(get_plan(hook=[loss_tensor])[0], call_chain)
+
+        actions.clear_execution_plans()
+        self.assertIsNot(get_plan(hook=[loss_tensor, y_pred])[0], call_chain)
+
+        # Plans of tensors created in a loop do not pile up, the least recently used ones are dropped
+        call_chain = get_plan(hook=[loss_tensor])[0]
+        for _ in range(2 * nemo.backends.pytorch.actions._MAX_EXECUTION_PLANS):
+            get_plan(hook=[fx(x=x)])
+            self.assertIs(get_plan(hook=[loss_tensor])[0], call_chain)
+        self.assertEqual(len(actions._execution_plans), nemo.backends.pytorch.actions._MAX_EXECUTION_PLANS)
+        self.assertNotIn(ExecutionPlan.key([loss_tensor, y_pred]), actions._execution_plans)
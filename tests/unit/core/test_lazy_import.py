@@ -0,0 +1,52 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+import subprocess
+import sys
+from unittest import TestCase
+
+import pytest
+
+
+class TestLazyImport(TestCase):
+    def loaded_modules(self, code, modules):
+        """Runs code in a fresh interpreter and returns which of modules it loaded."""
+        check = f"import sys; print(','.join(m for m in {modules!r} if m in sys.modules))"
+        output = subprocess.run(
+            [sys.executable, "-c", f"{code}; {check}"], check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        ).stdout
+        return [m for m in output.decode().strip().split(",") if m]
+
+    @pytest.mark.unit
+    def test_import_nemo_is_light(self):
+        self.assertEqual(self.loaded_modules("import nemo", ["torch", "nemo.core", "nemo.backends"]), [])
+        # Accessing a subpackage imports it
+        self.assertEqual(self.loaded_modules("import nemo; nemo.core", ["nemo.core"]), ["nemo.core"])
+        self.assertEqual(
+            self.loaded_modules("import nemo; nemo.backends.pytorch.tutorials.TaylorNet", ["torchvision"]), []
+        )
+
+    @pytest.mark.unit
+    def test_collections_load_dependencies_on_access(self):
+        heavy = ["librosa", "kaldi_io", "sklearn", "matplotlib"]
+        self.assertEqual(self.loaded_modules("import nemo.collections.asr", heavy), [])
+        self.assertEqual(self.loaded_modules("import nemo.collections.tts", heavy), [])
+        self.assertIn(
+            "librosa", self.loaded_modules("import nemo.collections.asr as a; a.AudioToTextDataLayer", heavy)
+        )
+        self.assertIn("librosa", self.loaded_modules("from nemo.collections.asr.parts import features", heavy))
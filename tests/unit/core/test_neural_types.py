@@ -241,3 +241,57 @@ class NeuralTypeSystemTests(TestCase):
             ),
         )
         self.assertEqual(T2.compare(T1), NeuralTypeComparisonResult.INCOMPATIBLE)
+
+    @pytest.mark.unit
+    def test_signature(self):
+        T1 = NeuralType(('B', 'T'), AudioSignal(16000))
+        T2 = NeuralType(axes=(AxisType(AxisKind.Batch), AxisType(AxisKind.Time)), elements_type=AudioSignal(16000))
+        self.assertEqual(T1.signature, T2.signature)
+        self.assertEqual(hash(T1.signature), hash(T2.signature))
+        self.assertNotEqual(T1.signature, NeuralType(('B', 'T'), AudioSignal(8000)).signature)
+        self.assertNotEqual(T1.signature, NeuralType(('T', 'B'), AudioSignal(16000)).signature)
+
+        class ListParameterType(ElementType):
+            @property
+            def type_parameters(self):
+                return {"values": [1, 2]}
+
+        unhashable = NeuralType(('B', 'T'), ListParameterType())
+        self.assertIsNone(unhashable.signature)
+        self.assertEqual(unhashable.compare(unhashable), NeuralTypeComparisonResult.SAME)
+
+    @pytest.mark.unit
+    def test_memoized_comparison(self):
+        audio16K = NeuralType(('B', 'T'), AudioSignal(16000))
+        audio8K = NeuralType(('B', 'T'), AudioSignal(8000))
+        transposed = NeuralType(('T', 'B'), AudioSignal(16000))
+        # Comparing twice gives the result of the first comparison
+        for _ in range(2):
+            self.assertEqual(audio16K.compare(audio16K), NeuralTypeComparisonResult.SAME)
+            self.assertEqual(audio8K.compare(audio16K), NeuralTypeComparisonResult.SAME_TYPE_INCOMPATIBLE_PARAMS)
+            self.assertEqual(audio16K.compare(transposed), NeuralTypeComparisonResult.TRANSPOSE_SAME)
+            self.assertEqual(
+                NeuralType(('B', 'T'), ChannelType()).compare(audio16K), NeuralTypeComparisonResult.INCOMPATIBLE
+            )
+
+
+@pytest.mark.usefixtures("neural_factory")
+class NeuralModulePortsTests(TestCase):
+    @pytest.mark.unit
+    def test_port_definitions_are_resolved_once(self):
+        class CountingTaylorNet(TaylorNet):
+            accessed = 0
+
+            @property
+            def input_ports(self):
+                CountingTaylorNet.accessed += 1
+                return super().input_ports
+
+        data_source = RealFunctionDataLayer(n=10, batch_size=1)
+        trainable_module = CountingTaylorNet(dim=4)
+        x, y = data_source()
+        first = trainable_module(x=x)
+        second = trainable_module(x=x)
+        self.assertEqual(CountingTaylorNet.accessed, 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.compare(second), NeuralTypeComparisonResult.SAME)
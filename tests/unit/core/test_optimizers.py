@@ -0,0 +1,66 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+from unittest import TestCase
+
+import pytest
+import torch
+
+from nemo.backends.pytorch.optimizers import AdamW, Novograd
+
+
+class TestMultiTensorOptimizers(TestCase):
+    def train(self, optimizer_class, foreach, **kwargs):
+        """Runs a few steps with parameters of different shapes, some of which have no or zero gradients at first."""
+        torch.manual_seed(0)
+        params = [torch.nn.Parameter(torch.randn(*shape)) for shape in [(4, 3), (7,), (2, 2, 2), (5,)]]
+        optimizer = optimizer_class(params, foreach=foreach, **kwargs)
+        generator = torch.Generator().manual_seed(1)
+        for step in range(5):
+            for i, p in enumerate(params):
+                if i == 3 and step < 2:
+                    p.grad = None
+                elif i == 2 and step < 2:
+                    p.grad = torch.zeros_like(p)
+                else:
+                    p.grad = torch.randn(p.shape, generator=generator)
+            optimizer.step()
+        return params, optimizer
+
+    def assert_same_training(self, optimizer_class, **kwargs):
+        expected_params, expected_optimizer = self.train(optimizer_class, foreach=False, **kwargs)
+        params, optimizer = self.train(optimizer_class, foreach=True, **kwargs)
+        for expected, p in zip(expected_params, params):
+            self.assertTrue(torch.allclose(expected, p, rtol=1e-6, atol=1e-7))
+            expected_state, state = expected_optimizer.state[expected], optimizer.state[p]
+            self.assertEqual(expected_state.keys(), state.keys())
+            self.assertEqual(expected_state["step"], state["step"])
+            for name in expected_state:
+                if name != "step":
+                    self.assertTrue(torch.allclose(expected_state[name], state[name], rtol=1e-6, atol=1e-7))
+
+    @pytest.mark.unit
+    def test_adamw(self):
+        self.assert_same_training(AdamW, lr=0.1)
+        self.assert_same_training(AdamW, lr=0.1, weight_decay=0.1, amsgrad=True)
+
+    @pytest.mark.unit
+    def test_novograd(self):
+        self.assert_same_training(Novograd, lr=0.1)
+        self.assert_same_training(Novograd, lr=0.1, weight_decay=0.01, amsgrad=True, grad_averaging=True)
+        self.assert_same_training(Novograd, lr=0.1, luc=True)
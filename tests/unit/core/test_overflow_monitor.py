@@ -0,0 +1,149 @@
+# ! /usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright 2020 NVIDIA. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# =============================================================================
+
+from unittest import TestCase
+
+import pytest
+import torch
+
+from nemo.backends.pytorch.optimizers import AdamW, Novograd
+from nemo.backends.pytorch.overflow_monitor import OverflowMonitor
+
+
+class _CountingSGD(torch.optim.SGD):
+    """SGD with a Python scalar in its state, which cannot be restored on the device."""
+
+    def step(self, closure=None):
+        for group in self.param_groups:
+            for p in group["params"]:
+                if p.grad is not None:
+                    self.state[p]["count"] = self.state[p].get("count", 0) + 1
+        return super().step(closure)
+
+
+class TestOverflowMonitor(TestCase):
+    def setUp(self) -> None:
+        self.module = torch.nn.Linear(3, 1)
+        self.optimizer = torch.optim.SGD(self.module.parameters(), lr=0.1, momentum=0.9)
+
+    def _train_step(self, monitor, x):
+        self.optimizer.zero_grad()
+        loss = self.module(x).sum()
+        monitor.update(loss)
+        loss.backward()
+        monitor.step(self.optimizer)
+
+    def _state(self):
+        return {k: v.clone() for k, v in self.module.state_dict().items()}
+
+    def _assert_state_equal(self, state):
+        for k, v in self.module.state_dict().items():
+            self.assertTrue(torch.equal(v, state[k]))
+
+    @pytest.mark.unit
+    def test_skip(self):
+        monitor = OverflowMonitor(policy="skip")
+        self._train_step(monitor, torch.ones(2, 3))
+        state = self._state()
+        momentum = self.optimizer.state[self.module.weight]["momentum_buffer"].clone()
+        self._train_step(monitor, torch.full((2, 3), float("nan")))
+        self._assert_state_equal(state)
+        self.assertTrue(torch.equal(self.optimizer.state[self.module.weight]["momentum_buffer"], momentum))
+        self._train_step(monitor, torch.ones(2, 3))
+        self.assertFalse(torch.equal(self.module.weight, state["weight"]))
+        self.assertEqual(monitor.check(), 1)
+        self.assertEqual(monitor.check(), 0)
+
+    @pytest.mark.unit
+    def test_skip_conditional_steps(self):
+        good, nan = torch.ones(2, 3), torch.full((2, 3), float("nan"))
+        for make_optimizer in [
+            lambda params, foreach: AdamW(params, lr=0.1, weight_decay=0.1, amsgrad=True, foreach=foreach),
+            lambda params, foreach: Novograd(params, lr=0.1, weight_decay=0.1, foreach=foreach),
+            lambda params, foreach: Novograd(params, lr=0.1, luc=True, foreach=foreach),
+        ]:
+            for foreach in [False, True]:
+                initial = self._state()
+                reference = torch.nn.Linear(3, 1)
+                reference.load_state_dict(initial)
+                reference_optimizer = make_optimizer(reference.parameters(), foreach)
+                for x in [good, 2 * good]:
+                    reference_optimizer.zero_grad()
+                    reference(x).sum().backward()
+                    reference_optimizer.step()
+
+                self.optimizer = make_optimizer(self.module.parameters(), foreach)
+                monitor = OverflowMonitor(policy="skip")
+                self._train_step(monitor, good)
+                state = self._state()
+                optimizer_state = {k: v.clone() for k, v in self.optimizer.state[self.module.weight].items()}
+                # The step is counted on the device from the first step which may be skipped
+                self._train_step(monitor, nan)
+                self._assert_state_equal(state)
+                for k, v in self.optimizer.state[self.module.weight].items():
+                    self.assertTrue(torch.equal(v, optimizer_state[k].to(v)), k)
+                self.assertEqual(self.optimizer.state[self.module.weight]["step"].item(), 1)
+                self.assertEqual(monitor.check(), 1)
+
+                # Later steps are the same as without the skipped one
+                self._train_step(monitor, 2 * good)
+                self.assertEqual(monitor.check(), 0)
+                for p, expected in zip(self.module.parameters(), reference.parameters()):
+                    self.assertTrue(torch.allclose(p, expected, atol=1e-6))
+                for k, v in reference_optimizer.state[reference.weight].items():
+                    actual = self.optimizer.state[self.module.weight][k]
+                    self.assertTrue(torch.allclose(torch.as_tensor(actual).float(), torch.as_tensor(v).float()), k)
+                self.module.load_state_dict(initial)
+
+    @pytest.mark.unit
+    def test_skip_without_conditional_steps(self):
+        self.optimizer = _CountingSGD(self.module.parameters(), lr=0.1, momentum=0.9)
+        monitor = OverflowMonitor(policy="skip")
+        # Skipped steps are not run, so they create no state
+        self._train_step(monitor, torch.full((2, 3), float("nan")))
+        self.assertNotIn(self.module.weight, self.optimizer.state)
+        self._train_step(monitor, torch.ones(2, 3))
+        state = self._state()
+        self._train_step(monitor, torch.full((2, 3), float("inf")))
+        self._assert_state_equal(state)
+        self.assertEqual(self.optimizer.state[self.module.weight]["count"], 1)
+        self.assertEqual(monitor.check(), 2)
+
+    @pytest.mark.unit
+    def test_rollback(self):
+        monitor = OverflowMonitor(policy="rollback", modules=[self.module], optimizers=[self.optimizer])
+        self._train_step(monitor, torch.ones(2, 3))
+        self.assertEqual(monitor.check(), 0)
+        state = self._state()
+        self._train_step(monitor, torch.ones(2, 3))
+        self._train_step(monitor, torch.full((2, 3), float("inf")))
+        self.assertEqual(monitor.check(), 1)
+        self._assert_state_equal(state)
+        self.assertTrue(torch.isfinite(self.optimizer.state[self.module.weight]["momentum_buffer"]).all())
+
+    @pytest.mark.unit
+    def test_stop_on_nan_loss(self):
+        monitor = OverflowMonitor(stop_on_nan_loss=True)
+        self._train_step(monitor, torch.full((2, 3), float("nan")))
+        with self.assertRaisesRegex(ValueError, "Loss is NaN or inf"):
+            monitor.check()
+
+    @pytest.mark.unit
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            OverflowMonitor(policy="ignore")
@@ -16,18 +16,43 @@
 # limitations under the License.
 # =============================================================================
 
+import copy
+import importlib.util
+import json
 import os
+import random
 import shutil
 import tarfile
+import tempfile
 import unittest
 from unittest import TestCase
 
+import numpy as np
 import pytest
+import soundfile as sf
+import torch
 from ruamel.yaml import YAML
 
 import nemo
 import nemo.collections.asr as nemo_asr
-from nemo.collections.asr.parts import AudioDataset, WaveformFeaturizer, collections, parsers
+from nemo.collections.asr.helpers import post_process_predictions, post_process_transcripts
+from nemo.collections.asr.metrics import ErrorRateAccumulator, edit_operations, word_error_rate
+from nemo.collections.asr.parts import (
+    AudioDataset,
+    DurationBucketingBatchSampler,
+    WaveformFeaturizer,
+    collections,
+    parsers,
+    segment,
+)
+from nemo.collections.asr.parts.feature_cache import (
+    FeatureCache,
+    FeatureCacheDataset,
+    FeatureCacheWriter,
+    feature_cache_dir,
+)
+from nemo.collections.asr.parts.features import normalize_batch
+from nemo.collections.asr.parts.spectr_augment import SpecAugment, SpecCutout
 from nemo.core import DeviceType
 
 logging = nemo.logging
@@ -202,6 +227,23 @@ class TestASRPytorch(TestCase):
             self.assertTrue(data[2].size(0) == batch_size)
             self.assertTrue(data[3].size(0) == batch_size)
 
+    @pytest.mark.unit
+    def test_bucketing_dataloader(self):
+        dl = nemo_asr.AudioToTextDataLayer(
+            manifest_filepath=self.manifest_filepath,
+            labels=self.labels,
+            batch_size=-1,
+            num_buckets=4,
+            max_batch_duration=16.0,
+        )
+        durations = [entry.duration for entry in dl._dataset.collection]
+        num_files = 0
+        for audio_signal, audio_lengths, _, _ in dl.data_iterator:
+            num_files += audio_signal.size(0)
+            # Batches are padded to the longest file and hold at most 16 seconds of padded audio
+            self.assertLessEqual(audio_signal.numel(), 16.0 * freq + 1)
+        self.assertEqual(num_files, len(durations))
+
     @pytest.mark.unit
     def test_preprocessor_errors(self):
         def create_broken_preprocessor_1():
@@ -326,3 +368,619 @@ class TestASRPytorch(TestCase):
             if installed_torchaudio:
                 self.assertTrue(spec[0].shape[1] == 201)  # n_fft // 2 + 1 bins
                 self.assertTrue(mfcc[0].shape[1] == 15)
+
+
+class TestDurationBucketingBatchSampler(TestCase):
+    durations = [0.5 + (i * 7 % 20) for i in range(20)]
+
+    @pytest.mark.unit
+    def test_batch_size(self):
+        sampler = DurationBucketingBatchSampler(self.durations, batch_size=3, num_buckets=4, seed=1)
+        batches = list(sampler)
+        self.assertEqual(len(batches), len(sampler))
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(20)))
+        for batch in batches:
+            self.assertLessEqual(len(batch), 3)
+            # Every batch comes from a bucket of 5 files of similar duration
+            self.assertLessEqual(max(self.durations[i] for i in batch) - min(self.durations[i] for i in batch), 4)
+
+        # Every epoch is shuffled differently, and the same way for the same epoch
+        sampler.set_epoch(1)
+        self.assertNotEqual(list(sampler), batches)
+        sampler.set_epoch(0)
+        self.assertEqual(list(sampler), batches)
+        sampler = DurationBucketingBatchSampler(self.durations, batch_size=3, num_buckets=4, drop_last=True)
+        self.assertTrue(all(len(batch) == 3 for batch in sampler))
+
+    @pytest.mark.unit
+    def test_max_batch_duration(self):
+        sampler = DurationBucketingBatchSampler(self.durations, max_batch_duration=20.0, num_buckets=2)
+        batches = list(sampler)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(20)))
+        for batch in batches:
+            self.assertLessEqual(len(batch) * max(self.durations[i] for i in batch), 20.0)
+        with self.assertRaises(ValueError):
+            DurationBucketingBatchSampler(self.durations)
+
+    @pytest.mark.unit
+    def test_distributed(self):
+        samplers = [
+            DurationBucketingBatchSampler(self.durations, batch_size=2, num_buckets=3, num_replicas=3, rank=rank)
+            for rank in range(3)
+        ]
+        for epoch in range(2):
+            for sampler in samplers:
+                sampler.set_epoch(epoch)
+            rank_batches = [list(sampler) for sampler in samplers]
+            # Every rank gets the same number of batches and together they cover the dataset
+            self.assertEqual(len(set(len(batches) for batches in rank_batches)), 1)
+            files = {i for batches in rank_batches for batch in batches for i in batch}
+            self.assertEqual(files, set(range(20)))
+            # Batches of the same step have a similar duration, except for the padded last step
+            for step in list(zip(*rank_batches))[:-1]:
+                longest = [max(self.durations[i] for i in batch) for batch in step]
+                self.assertLessEqual(max(longest) - min(longest), 8)
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestFeatureCacheDataLayer(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.folder, "manifest.json")
+        with open(self.manifest, "w") as f:
+            for i, text in enumerate(["ab", "abc", "a"]):
+                f.write(json.dumps({"audio_filepath": f"{i}.wav", "duration": 1.0 + i, "text": text}) + "\n")
+
+        # Features of 3 files, 100 frames per second of audio
+        self.features = {f"{i}.wav": torch.randn(8, 100 * (i + 1)) for i in range(3)}
+        config = nemo_asr.FeatureCacheDataLayer.featurizer_config({"features": 8})
+        writer = FeatureCacheWriter(feature_cache_dir(self.folder, self.manifest, config), config, shard_size=8000)
+        for audio_file, features in self.features.items():
+            writer.append(audio_file, features)
+        writer.close()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_read_features(self):
+        dl = nemo_asr.FeatureCacheDataLayer(
+            cache_dir=self.folder,
+            manifest_filepath=self.manifest,
+            labels=[" ", "a", "b", "c"],
+            batch_size=2,
+            preprocessor_params={"features": 8},
+            shuffle=False,
+        )
+        batches = list(dl.data_iterator)
+        self.assertEqual(len(batches), 2)
+        features, lengths, transcripts, transcript_lengths = batches[0]
+        # Padded to the longest file and a multiple of 16 frames
+        self.assertEqual(features.shape, (2, 8, 208))
+        self.assertEqual(lengths.tolist(), [100, 200])
+        self.assertTrue(torch.equal(features[0, :, :100], self.features["0.wav"]))
+        self.assertTrue(torch.equal(features[1, :, :200], self.features["1.wav"]))
+        self.assertEqual(features[0, :, 100:].abs().sum().item(), 0)
+        self.assertEqual(transcripts.tolist(), [[1, 2, 0], [1, 2, 3]])
+        self.assertEqual(transcript_lengths.tolist(), [2, 3])
+
+    @pytest.mark.unit
+    def test_other_configuration_is_not_cached(self):
+        with self.assertRaises(ValueError):
+            nemo_asr.FeatureCacheDataLayer(
+                cache_dir=self.folder,
+                manifest_filepath=self.manifest,
+                labels=[" ", "a", "b", "c"],
+                batch_size=2,
+                preprocessor_params={"features": 64},
+            )
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestPrecomputeFeatures(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.manifest = os.path.join(self.folder, "manifest.json")
+        rng = np.random.RandomState(0)
+        with open(self.manifest, "w") as f:
+            for i, text in enumerate(["ab", "abc", "a"]):
+                audio_file = os.path.join(self.folder, f"{i}.wav")
+                sf.write(audio_file, rng.uniform(-0.5, 0.5, 4000 * (i + 1)).astype(np.float32), 16000)
+                f.write(json.dumps({"audio_filepath": audio_file, "duration": 0.25 * (i + 1), "text": text}) + "\n")
+        self.preprocessor_params = {"features": 16, "stft_conv": True}
+        self.model_config = os.path.join(self.folder, "model.yaml")
+        with open(self.model_config, "w") as f:
+            YAML(typ="safe").dump({"AudioToMelSpectrogramPreprocessor": self.preprocessor_params}, f)
+
+        path = os.path.join(os.path.dirname(__file__), "../../scripts/precompute_asr_features.py")
+        spec = importlib.util.spec_from_file_location("precompute_asr_features", path)
+        self.script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.script)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_cached_features(self):
+        cache_dir = os.path.join(self.folder, "cache")
+        self.script.main(
+            ["--manifest", self.manifest, "--cache_dir", cache_dir, "--model_config", self.model_config]
+            + ["--batch_size", "2", "--num_workers", "0"]
+        )
+
+        config = nemo_asr.FeatureCacheDataLayer.featurizer_config(self.preprocessor_params)
+        cache = FeatureCache(feature_cache_dir(cache_dir, self.manifest, config))
+        dataset = FeatureCacheDataset(cache, self.manifest, labels=[" ", "a", "b", "c"])
+        preprocessor = nemo_asr.AudioToMelSpectrogramPreprocessor(dither=0.0, **self.preprocessor_params)
+        preprocessor.featurizer.eval()
+        featurizer = WaveformFeaturizer(sample_rate=16000)
+        for i, sample in enumerate(dataset.collection):
+            features, length = dataset[i][:2]
+            # Features of every file on its own, without dither and padding of the batch
+            signal = featurizer.process(sample.audio_file).unsqueeze(0)
+            signal_length = torch.tensor([signal.shape[1]])
+            expected = preprocessor.get_features(
+                signal.to(preprocessor._device), signal_length.to(preprocessor._device)
+            )
+            expected_length = preprocessor.get_seq_len(signal_length.float()).item()
+            self.assertEqual(length.item(), expected_length)
+            self.assertEqual(features.shape, (16, expected_length))
+            self.assertTrue(torch.allclose(features, expected[0, :, :expected_length].cpu(), atol=1e-4))
+
+
+class TestNormalizeBatch(TestCase):
+    @pytest.mark.unit
+    def test_masked_statistics(self):
+        torch.manual_seed(0)
+        x = torch.randn(4, 8, 50) * 3 - 10
+        seq_len = torch.tensor([50, 20, 2, 37])
+        per_feature = normalize_batch(x, seq_len, "per_feature")
+        all_features = normalize_batch(x, seq_len, "all_features")
+        for i, length in enumerate(seq_len.tolist()):
+            item = x[i, :, :length]
+            expected = (item - item.mean(dim=1, keepdim=True)) / (item.std(dim=1, keepdim=True) + 1e-5)
+            self.assertTrue(torch.allclose(per_feature[i, :, :length], expected, atol=1e-5))
+            expected = (item - item.mean()) / (item.std() + 1e-5)
+            self.assertTrue(torch.allclose(all_features[i, :, :length], expected, atol=1e-5))
+        # Padded frames do not change the statistics of the valid ones
+        padded = torch.cat([x, torch.full((4, 8, 10), 100.0)], dim=2)
+        self.assertTrue(torch.allclose(normalize_batch(padded, seq_len, "per_feature")[:, :, :50], per_feature))
+        self.assertTrue(torch.equal(normalize_batch(x, seq_len, "none"), x))
+
+
+class TestSpectrogramMasks(TestCase):
+    @pytest.mark.unit
+    def test_masks_respect_lengths(self):
+        x = torch.ones(4, 64, 200)
+        length = torch.tensor([200, 120, 50, 10])
+        for augment in [
+            SpecAugment(freq_masks=2, time_masks=2, freq_width=15, time_width=25, rng=random.Random(0)),
+            SpecCutout(rect_masks=5, rect_time=5, rect_freq=20, rng=random.Random(0)),
+        ]:
+            masked = augment(x, length)
+            self.assertGreater((masked == 0).sum().item(), 0)
+            for i, l in enumerate(length.tolist()):
+                # Padding is never masked
+                self.assertTrue(torch.equal(masked[i, :, l:], x[i, :, l:]))
+            # The same rng state gives the same masks
+            augment._rng = random.Random(0)
+            self.assertTrue(torch.equal(augment(x, length), masked))
+
+    @pytest.mark.unit
+    def test_mask_widths(self):
+        x = torch.ones(8, 64, 100)
+        masked = SpecAugment(freq_masks=1, time_masks=0, freq_width=10)(x)
+        masked_freqs = (masked == 0).all(dim=2).sum(dim=1)
+        self.assertTrue(((masked == 0).any(dim=2).sum(dim=1) == masked_freqs).all())
+        self.assertLess(masked_freqs.max().item(), 10)
+        masked = SpecAugment(freq_masks=0, time_masks=1, time_width=30)(x)
+        self.assertLess((masked == 0).all(dim=1).sum(dim=1).max().item(), 30)
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestStreaming(TestCase):
+    @staticmethod
+    def stream(process, x, chunk_sizes):
+        outputs = []
+        for i, chunk in enumerate(torch.split(x, chunk_sizes, dim=-1)):
+            outputs.append(process(chunk, last=i == len(chunk_sizes) - 1))
+        return torch.cat(outputs, dim=2)
+
+    @pytest.mark.unit
+    def test_streaming_encoder(self):
+        def block(filters, kernel, stride=1, dilation=1, repeat=1, residual=False, **kwargs):
+            return dict(
+                filters=filters,
+                repeat=repeat,
+                kernel=[kernel],
+                stride=[stride],
+                dilation=[dilation],
+                dropout=0.0,
+                residual=residual,
+                **kwargs,
+            )
+
+        jasper = [
+            block(32, 11, stride=2, separable=True),
+            block(32, 7, repeat=3, residual=True, residual_dense=True),
+            block(32, 5, repeat=2, residual=True, residual_dense=True, separable=True, groups=2),
+            block(48, 3, dilation=2),
+            block(48, 1),
+        ]
+        encoder = nemo_asr.JasperEncoder(jasper=jasper, activation="relu", feat_in=16)
+        for m in encoder.modules():
+            if isinstance(m, torch.nn.BatchNorm1d):
+                m.running_mean.normal_()
+                m.running_var.uniform_(0.5, 2.0)
+        encoder.eval()
+        with self.assertRaises(ValueError):
+            encoder.train()
+            encoder.stream(torch.randn(1, 16, 10))
+        encoder.eval()
+
+        x = torch.randn(2, 16, 101)
+        offline, _ = encoder.forward(x, torch.tensor([101, 101]))
+        for chunk_sizes in [[101], [1] * 101, [7, 3, 20, 1, 40, 30], [0, 50, 51]]:
+            streamed = self.stream(encoder.stream, x, chunk_sizes)
+            self.assertTrue(torch.allclose(streamed, offline, atol=1e-5))
+
+        # Outputs are returned as soon as their receptive field was seen, and then never change
+        first = encoder.stream(x[:, :, :60])
+        encoder.reset_stream()
+        self.assertGreater(first.shape[2], 0)
+        self.assertTrue(torch.allclose(first, offline[:, :, : first.shape[2]], atol=1e-5))
+
+    @pytest.mark.unit
+    def test_streaming_features(self):
+        preprocessor = nemo_asr.AudioToMelSpectrogramPreprocessor(
+            normalize=None, dither=0, stft_conv=True, window_stride=0.0125
+        )
+        x = torch.randn(2, 16123)
+        num_frames = preprocessor.get_seq_len(torch.tensor(16123.0)).item()
+        offline = preprocessor.get_features(x.clone(), torch.tensor([16123, 16123]))[:, :, :num_frames]
+        for chunk_sizes in [[16123], [1000] * 16 + [123], [37] * 435 + [28], [0, 8000, 8123]]:
+            streamed = self.stream(preprocessor.stream, x, chunk_sizes)
+            self.assertTrue(torch.allclose(streamed, offline, atol=1e-5))
+
+        preprocessor = nemo_asr.AudioToMelSpectrogramPreprocessor(normalize="per_feature")
+        with self.assertRaises(ValueError):
+            preprocessor.stream(x)
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestJasperInferenceOptimization(TestCase):
+    @pytest.mark.unit
+    def test_fused_encoder(self):
+        jasper = [
+            dict(filters=32, repeat=1, kernel=[11], stride=[2], dilation=[1], dropout=0.0, residual=False),
+            dict(
+                filters=32,
+                repeat=3,
+                kernel=[7],
+                stride=[1],
+                dilation=[1],
+                dropout=0.0,
+                residual=True,
+                residual_dense=True,
+                separable=True,
+            ),
+            dict(filters=48, repeat=2, kernel=[3], stride=[1], dilation=[2], dropout=0.0, residual=True, groups=2),
+        ]
+        encoder = nemo_asr.JasperEncoder(jasper=jasper, activation="relu", feat_in=16)
+        for m in encoder.modules():
+            if isinstance(m, torch.nn.BatchNorm1d):
+                m.running_mean.normal_()
+                m.running_var.uniform_(0.5, 2.0)
+                m.weight.data.normal_()
+                m.bias.data.normal_()
+        encoder.eval()
+
+        x = torch.randn(3, 16, 80)
+        length = torch.tensor([80, 53, 9])
+        outputs, encoded_lengths = encoder.forward(x, length)
+        # Masks keep the padding from leaking into the valid frames
+        for i, l in enumerate(length.tolist()):
+            single, single_length = encoder.forward(x[i : i + 1, :, :l], length[i : i + 1])
+            self.assertEqual(single_length.item(), encoded_lengths[i].item())
+            valid = int(single_length.item())
+            self.assertTrue(torch.allclose(outputs[i, :, :valid], single[0, :, :valid], atol=1e-5))
+
+        # Preparing for deployment keeps the batch normalizations, so the encoder can still be trained
+        deployed = copy.deepcopy(encoder)
+        deployed.prepare_for_deployment()
+        self.assertEqual(sum(isinstance(m, torch.nn.BatchNorm1d) for m in deployed.modules()), 8)
+
+        self.assertEqual(encoder.optimize_for_inference(), 8)
+        self.assertFalse(any(isinstance(m, torch.nn.BatchNorm1d) for m in encoder.modules()))
+        fused_outputs, fused_lengths = encoder.forward(x, length)
+        self.assertTrue(torch.equal(fused_lengths, encoded_lengths))
+        self.assertTrue(torch.allclose(fused_outputs, outputs, atol=1e-5))
+
+
+class TestCTCDecoding(TestCase):
+    @staticmethod
+    def decode(prediction, labels):
+        blank_id = len(labels)
+        decoded = []
+        previous = blank_id
+        for p in prediction:
+            if p != previous and p != blank_id:
+                decoded.append(labels[p])
+            previous = p
+        return ''.join(decoded)
+
+    @pytest.mark.unit
+    def test_greedy_predictions(self):
+        labels = [" ", "a", "b", "ch"]
+        torch.manual_seed(0)
+        predictions = [torch.randint(0, 5, (8, 30)), torch.full((2, 7), 4), torch.randint(3, 5, (3, 1))]
+        lengths = [torch.randint(0, 31, (8,)), torch.tensor([7, 0]), torch.tensor([1, 0, 1])]
+
+        hypotheses = post_process_predictions(predictions, labels)
+        expected = [self.decode(p.tolist(), labels) for batch in predictions for p in batch]
+        self.assertEqual(hypotheses, expected)
+        self.assertEqual(hypotheses[8:10], ["", ""])
+
+        hypotheses = post_process_predictions(predictions, labels, lengths=lengths)
+        expected = [
+            self.decode(p[:l].tolist(), labels) for batch, ls in zip(predictions, lengths) for p, l in zip(batch, ls)
+        ]
+        self.assertEqual(hypotheses, expected)
+
+    @pytest.mark.unit
+    def test_transcripts(self):
+        labels = [" ", "a", "b", "ch"]
+        transcripts = [torch.tensor([[1, 3, 0, 2], [2, 2, 0, 0]]), torch.tensor([[3, 1]])]
+        lengths = [torch.tensor([4, 2]), torch.tensor([0])]
+        self.assertEqual(post_process_transcripts(transcripts, lengths, labels), ["ach b", "bb", ""])
+
+
+class TestErrorRate(TestCase):
+    @staticmethod
+    def levenshtein(a, b):
+        current = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            previous, current = current, [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+        return current[-1]
+
+    @pytest.mark.unit
+    def test_edit_operations(self):
+        rng = random.Random(0)
+        hypotheses = [[rng.randrange(4) for _ in range(rng.randrange(25))] for _ in range(300)]
+        references = [[rng.randrange(4) for _ in range(rng.randrange(25))] for _ in range(300)]
+        counts = edit_operations(hypotheses, references, batch_size=32)
+        for (substitutions, insertions, deletions), h, r in zip(counts.tolist(), hypotheses, references):
+            self.assertEqual(substitutions + insertions + deletions, self.levenshtein(h, r))
+            self.assertEqual(len(h), len(r) + insertions - deletions)
+            self.assertLessEqual(substitutions + deletions, len(r))
+
+    @pytest.mark.unit
+    def test_word_error_rate(self):
+        references = ["the cat sat on the mat", "hello world", "a b c"]
+        hypotheses = ["the cat sat on mat", "hello big world", "x b c"]
+        self.assertAlmostEqual(word_error_rate(hypotheses, references), 3 / 11)
+        self.assertAlmostEqual(word_error_rate(["abd"], ["abc"], use_cer=True), 1 / 3)
+        self.assertEqual(word_error_rate([""], [""]), float('inf'))
+        with self.assertRaises(ValueError):
+            word_error_rate(["a"], [])
+
+        accumulator = ErrorRateAccumulator()
+        counts = accumulator.update(hypotheses[:2], references[:2])
+        self.assertEqual(counts.tolist(), [[0, 0, 1], [0, 1, 0]])
+        accumulator.update(hypotheses[2:], references[2:])
+        self.assertEqual((accumulator.substitutions, accumulator.insertions, accumulator.deletions), (1, 1, 1))
+        self.assertAlmostEqual(accumulator.error_rate, word_error_rate(hypotheses, references))
+
+
+class TestColumnarAudioText(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.manifests = [os.path.join(self.folder, f"manifest{i}.json") for i in range(2)]
+        rng = random.Random(0)
+        for manifest in self.manifests:
+            with open(manifest, "w") as f:
+                for i in range(50):
+                    item = {
+                        "audio_filepath": f"~/audio/{i % 7}.wav",
+                        "duration": round(rng.uniform(0.1, 5.0), 2),
+                        "text": "".join(rng.choice("abc ") for _ in range(rng.randrange(1, 20))),
+                    }
+                    if i % 3 == 0:
+                        item["offset"] = i * 1.5
+                    f.write(json.dumps(item) + "\n")
+        self.parser = parsers.make_parser(labels=[" ", "a", "b", "c"], name="en")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_same_entries_as_audio_text(self):
+        for kwargs in [{}, dict(min_duration=1.0, max_duration=4.0, max_number=40, do_sort_by_duration=True)]:
+            expected = list(collections.ASRAudioText(self.manifests, parser=self.parser, **kwargs))
+            for num_workers in [0, 2]:
+                columnar = collections.ColumnarAudioText.from_manifests(
+                    self.manifests, self.parser, num_workers=num_workers, **kwargs
+                )
+                self.assertEqual(len(columnar), len(expected))
+                self.assertEqual(list(columnar), expected)
+                self.assertEqual(columnar.durations.tolist(), [entry.duration for entry in expected])
+        offsets = collections.ColumnarAudioText.from_manifests(self.manifests[0], self.parser).offsets
+        self.assertEqual(offsets[::3].tolist(), [i * 1.5 for i in range(0, 50, 3)])
+        self.assertTrue(np.isnan(offsets[1]))
+
+    @pytest.mark.unit
+    def test_save_and_load(self):
+        directory = os.path.join(self.folder, "columnar")
+        collections.ColumnarAudioText.from_manifests(self.manifests, self.parser).save(directory, self.parser)
+
+        kwargs = dict(min_duration=1.0, max_duration=4.0, max_number=40, do_sort_by_duration=True)
+        loaded = collections.ColumnarAudioText.load(directory, self.parser, **kwargs)
+        self.assertEqual(list(loaded), list(collections.ASRAudioText(self.manifests, parser=self.parser, **kwargs)))
+        self.assertIsInstance(loaded._columns["tokens"], np.memmap)
+
+        # A filtered collection saves its entries only
+        loaded.save(os.path.join(self.folder, "filtered"))
+        self.assertEqual(list(collections.ColumnarAudioText.load(os.path.join(self.folder, "filtered"))), list(loaded))
+
+        with self.assertRaises(ValueError):
+            collections.ColumnarAudioText.load(directory, parsers.make_parser(labels=["a", "b"], name="en"))
+
+        dataset = AudioDataset(
+            directory, labels=[" ", "a", "b", "c"], featurizer=None, load_audio=False, columnar_manifest=True
+        )
+        self.assertEqual(len(dataset), 100)
+        self.assertEqual(dataset[0][2].tolist(), loaded._columns["tokens"][: len(dataset[0][2])].tolist())
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestSegmentLoading(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.audio_file = os.path.join(self.folder, "long.wav")
+        rng = np.random.RandomState(0)
+        self.samples = (rng.uniform(-0.5, 0.5, 16000 * 10)).astype(np.float32)
+        sf.write(self.audio_file, self.samples, 16000, subtype="FLOAT")
+        self.manifest = os.path.join(self.folder, "manifest.json")
+        with open(self.manifest, "w") as f:
+            f.write(json.dumps({"audio_filepath": self.audio_file, "duration": 10.0, "text": "a"}) + "\n")
+            for i in range(5):
+                item = {"audio_filepath": self.audio_file, "duration": 1.5, "offset": 2.0 * i, "text": "b"}
+                f.write(json.dumps(item) + "\n")
+
+    def tearDown(self) -> None:
+        segment.close_open_files()
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_window_reads(self):
+        for keep_open in [False, True]:
+            for offset, duration in [(0, 0), (0, 1.0), (3.25, 2.0), (9.5, 2.0), (3.25, 0)]:
+                audio = segment.AudioSegment.from_file(
+                    self.audio_file, offset=offset, duration=duration, keep_open=keep_open
+                )
+                start = int(offset * 16000)
+                end = start + int(duration * 16000) if duration > 0 else len(self.samples)
+                np.testing.assert_array_equal(audio.samples, self.samples[start:end])
+        self.assertIn(self.audio_file, segment._open_files)
+
+    @pytest.mark.unit
+    def test_open_files_are_bounded(self):
+        for i in range(segment._MAX_OPEN_FILES + 3):
+            audio_file = os.path.join(self.folder, f"{i}.wav")
+            sf.write(audio_file, self.samples[:1600], 16000, subtype="FLOAT")
+            segment.AudioSegment.from_file(audio_file, offset=0.01, keep_open=True)
+        self.assertEqual(len(segment._open_files), segment._MAX_OPEN_FILES)
+        self.assertNotIn(os.path.join(self.folder, "0.wav"), segment._open_files)
+
+    @pytest.mark.unit
+    def test_dataset_offsets(self):
+        featurizer = WaveformFeaturizer(sample_rate=16000)
+        dataset = AudioDataset(self.manifest, labels=[" ", "a", "b"], featurizer=featurizer)
+        self.assertEqual([sample.offset for sample in dataset.collection], [None, 0.0, 2.0, 4.0, 6.0, 8.0])
+        np.testing.assert_array_equal(dataset[0][0].numpy(), self.samples)
+        for i in range(5):
+            start = 32000 * i
+            np.testing.assert_array_equal(dataset[i + 1][0].numpy(), self.samples[start : start + 24000])
+
+
+class TestAudioCache(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.audio_files = []
+        for i in range(4):
+            audio_file = os.path.join(self.folder, f"{i}.wav")
+            sf.write(audio_file, rng.uniform(-0.5, 0.5, 8000).astype(np.float32), 8000, subtype="FLOAT")
+            self.audio_files.append(audio_file)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_hits_and_copies(self):
+        cache = segment.AudioCache(2 ** 20)
+        featurizer = WaveformFeaturizer(sample_rate=16000, cache=cache)
+        expected = WaveformFeaturizer(sample_rate=16000).process(self.audio_files[0], trim=True)
+        first = featurizer.process(self.audio_files[0], trim=True)
+        first.zero_()
+        second = featurizer.process(self.audio_files[0], trim=True)
+        self.assertTrue(torch.equal(second, expected))
+        # Another window, sample rate or trimming is decoded again
+        featurizer.process(self.audio_files[0], trim=False)
+        segment.AudioSegment.from_file(self.audio_files[0], target_sr=8000, trim=True, cache=cache)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 3)
+        self.assertEqual(len(cache), 3)
+
+    @pytest.mark.unit
+    def test_memory_budget(self):
+        # Every file is 16000 float32 samples at 16kHz, the budget fits two of them
+        cache = segment.AudioCache(2 * 16000 * 4)
+        featurizer = WaveformFeaturizer(sample_rate=16000, cache=cache)
+        for audio_file in self.audio_files[:3]:
+            featurizer.process(audio_file)
+        self.assertEqual(cache.stats()["bytes"], 2 * 16000 * 4)
+        featurizer.process(self.audio_files[2])
+        featurizer.process(self.audio_files[0])
+        self.assertEqual(cache.stats()["hits"], 1)
+        with self.assertRaises(ValueError):
+            segment.AudioCache(0)
+
+    @pytest.mark.unit
+    def test_worker_stats(self):
+        cache = segment.AudioCache(2 ** 20)
+        featurizer = WaveformFeaturizer(sample_rate=16000, cache=cache)
+        dataset = [self.audio_files[i % 4] for i in range(8)]
+        loader = torch.utils.data.DataLoader(
+            dataset, num_workers=2, persistent_workers=True, collate_fn=lambda batch: featurizer.process(batch[0])
+        )
+        for _ in range(2):
+            for _ in loader:
+                pass
+        # Every worker decodes the files of its indices once
+        self.assertEqual(cache.stats()["misses"], 4)
+        self.assertEqual(cache.stats()["hits"], 12)
+        self.assertAlmostEqual(cache.stats()["hit_rate"], 0.75)
+
+
+@pytest.mark.usefixtures("neural_factory")
+class TestTrimBoundaries(TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.audio_file = os.path.join(self.folder, "speech.wav")
+        rng = np.random.RandomState(0)
+        silence = np.zeros(8000, dtype=np.float32)
+        samples = np.concatenate([silence, rng.uniform(-0.5, 0.5, 16000).astype(np.float32), silence, silence])
+        sf.write(self.audio_file, samples, 16000, subtype="FLOAT")
+
+    def tearDown(self) -> None:
+        segment.close_open_files()
+        shutil.rmtree(self.folder)
+
+    @pytest.mark.unit
+    def test_boundaries(self):
+        # Boundaries are frames of librosa.effects.trim, 2048 samples with a hop of 512
+        offset, duration = segment.trim_boundaries(self.audio_file, target_sr=16000)
+        self.assertAlmostEqual(offset, 0.5, delta=0.1)
+        self.assertAlmostEqual(duration, 1.0, delta=0.2)
+        # Within a window of the file, the offset is relative to the file
+        window_offset, window_duration = segment.trim_boundaries(self.audio_file, offset=0.25, duration=1.5)
+        self.assertAlmostEqual(window_offset, offset, delta=0.04)
+        self.assertAlmostEqual(window_duration, duration, delta=0.04)
+        # All silence is kept as is
+        self.assertEqual(segment.trim_boundaries(self.audio_file, offset=1.5, duration=0.5), (1.5, 0.5))
+
+    @pytest.mark.unit
+    def test_trimmed_manifest(self):
+        offset, duration = segment.trim_boundaries(self.audio_file, target_sr=16000, duration=2.5)
+        manifests = [os.path.join(self.folder, name) for name in ["manifest.json", "trimmed.json"]]
+        for manifest, item in zip(manifests, [{"duration": 2.5}, {"duration": duration, "offset": offset}]):
+            with open(manifest, "w") as f:
+                f.write(json.dumps(dict(audio_filepath=self.audio_file, text="a", **item)) + "\n")
+
+        featurizer = WaveformFeaturizer(sample_rate=16000)
+        trimmed_online = AudioDataset(manifests[0], labels=["a"], featurizer=featurizer, trim=True)[0][0]
+        trimmed_offline = AudioDataset(manifests[1], labels=["a"], featurizer=featurizer)[0][0]
+        self.assertTrue(torch.equal(trimmed_offline, trimmed_online))